@@ -0,0 +1,174 @@
+"""
+Admission control for registration bursts
+
+Each expensive stage of /api/register (image processing, the database write)
+runs behind an ``AdmissionLimiter``: at most ``limit`` requests are inside
+the stage, at most ``max_waiting`` more wait for a slot, and nobody waits
+longer than ``wait_timeout``. Anything beyond that is turned away at once
+with ``503 Service Unavailable`` and a ``Retry-After`` estimate, instead of
+every request decoding images at the same time and all of them slowing
+down. The registration form retries with jittered backoff.
+
+Limits are per worker process. In-flight, waiting and limit values are
+exported as gauges on /metrics, with rejections and queue wait times.
+"""
+
+import asyncio
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+
+from dotenv import load_dotenv
+from fastapi import HTTPException
+
+from app.metrics import Counter, Gauge, Histogram
+
+# Load environment variables
+load_dotenv()
+
+ADMISSION_IN_FLIGHT = Gauge(
+    "admission_in_flight",
+    "Requests currently inside a limited stage",
+    ("stage",),
+)
+ADMISSION_WAITING = Gauge(
+    "admission_waiting",
+    "Requests queued for a slot in a limited stage",
+    ("stage",),
+)
+ADMISSION_LIMIT = Gauge(
+    "admission_limit",
+    "Configured concurrency limit of a stage",
+    ("stage",),
+)
+ADMISSION_QUEUE_LIMIT = Gauge(
+    "admission_queue_limit",
+    "Configured maximum queue length of a stage",
+    ("stage",),
+)
+ADMISSION_REJECTED = Counter(
+    "admission_rejected_total",
+    "Requests turned away with 503 (queue_full or timeout)",
+    ("stage", "reason"),
+)
+ADMISSION_WAIT_SECONDS = Histogram(
+    "admission_wait_seconds",
+    "Time admitted requests spent queued for a slot",
+    ("stage",),
+)
+
+
+class Overloaded(HTTPException):
+    """
+    503 with Retry-After; passes through handlers that re-raise HTTPException
+    """
+
+    def __init__(self, stage: str, retry_after: int):
+        super().__init__(
+            status_code=503,
+            detail="The server is busy registering other students. Please retry in a few seconds.",
+            headers={"Retry-After": str(retry_after)},
+        )
+        self.stage = stage
+        self.retry_after = retry_after
+
+
+class AdmissionLimiter:
+    """
+    Concurrency limit with a bounded, time-limited wait queue
+    """
+
+    def __init__(self, stage: str, limit: int, max_waiting: int, wait_timeout: float):
+        self.stage = stage
+        self.limit = max(1, limit)
+        self.max_waiting = max(0, max_waiting)
+        self.wait_timeout = wait_timeout
+        self.in_flight = 0
+        self.waiting = 0
+        # Exponentially weighted average time a request holds a slot
+        self.average_hold = 0.1
+        # Created on first use so it binds to the server's event loop
+        self._semaphore = None
+
+        ADMISSION_LIMIT.set(self.limit, stage=stage)
+        ADMISSION_QUEUE_LIMIT.set(self.max_waiting, stage=stage)
+        ADMISSION_IN_FLIGHT.set(0, stage=stage)
+        ADMISSION_WAITING.set(0, stage=stage)
+
+    def retry_after(self) -> int:
+        """
+        Seconds until the current queue has likely drained
+        """
+        return max(1, math.ceil((self.waiting + 1) / self.limit * self.average_hold))
+
+    def _reject(self, reason: str):
+        ADMISSION_REJECTED.inc(stage=self.stage, reason=reason)
+        return Overloaded(self.stage, self.retry_after())
+
+    async def acquire(self) -> None:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.limit)
+
+        if self._semaphore.locked():
+            if self.waiting >= self.max_waiting:
+                raise self._reject("queue_full")
+
+            started = time.perf_counter()
+            self.waiting += 1
+            ADMISSION_WAITING.inc(stage=self.stage)
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.wait_timeout)
+            except asyncio.TimeoutError:
+                raise self._reject("timeout")
+            finally:
+                self.waiting -= 1
+                ADMISSION_WAITING.dec(stage=self.stage)
+            ADMISSION_WAIT_SECONDS.observe(time.perf_counter() - started, stage=self.stage)
+        else:
+            await self._semaphore.acquire()
+            ADMISSION_WAIT_SECONDS.observe(0, stage=self.stage)
+
+        self.in_flight += 1
+        ADMISSION_IN_FLIGHT.inc(stage=self.stage)
+
+    def release(self, held: float) -> None:
+        self.in_flight -= 1
+        ADMISSION_IN_FLIGHT.dec(stage=self.stage)
+        self.average_hold += 0.2 * (held - self.average_hold)
+        self._semaphore.release()
+
+    @asynccontextmanager
+    async def slot(self):
+        """
+        async with limiter.slot(): ... (raises Overloaded if not admitted)
+        """
+        await self.acquire()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.release(time.perf_counter() - started)
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+REGISTRATION_QUEUE_TIMEOUT = float(os.getenv("REGISTRATION_QUEUE_TIMEOUT", "10"))
+
+# Image decoding/resizing is CPU-bound and runs in worker threads (Pillow releases the GIL)
+IMAGE_LIMITER = AdmissionLimiter(
+    "image_processing",
+    limit=_env_int("REGISTRATION_IMAGE_CONCURRENCY", os.cpu_count() or 2),
+    max_waiting=_env_int("REGISTRATION_IMAGE_QUEUE", 64),
+    wait_timeout=REGISTRATION_QUEUE_TIMEOUT,
+)
+
+# Keep concurrent writes within the connection pool (DB_POOL_SIZE)
+DB_LIMITER = AdmissionLimiter(
+    "db_write",
+    limit=_env_int("REGISTRATION_DB_CONCURRENCY", _env_int("DB_POOL_SIZE", 10)),
+    max_waiting=_env_int("REGISTRATION_DB_QUEUE", 128),
+    wait_timeout=REGISTRATION_QUEUE_TIMEOUT,
+)
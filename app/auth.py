@@ -0,0 +1,33 @@
+"""
+Admin authentication helpers
+"""
+
+import hmac
+import os
+from typing import Optional
+
+from dotenv import load_dotenv
+from fastapi import HTTPException
+
+# Load environment variables
+load_dotenv()
+
+# Simple shared admin password (change it in .env)
+ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "admin123")
+
+
+def is_admin(password: Optional[str]) -> bool:
+    """
+    Check an admin password in constant time
+    """
+    if not password:
+        return False
+    return hmac.compare_digest(password.encode("utf-8"), ADMIN_PASSWORD.encode("utf-8"))
+
+
+def require_admin(password: Optional[str]) -> None:
+    """
+    Raise 401 unless the admin password is correct (for admin API endpoints)
+    """
+    if not is_admin(password):
+        raise HTTPException(status_code=401, detail="Admin password required")
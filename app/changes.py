@@ -0,0 +1,148 @@
+"""
+Incremental change feed for downstream systems (/api/changes)
+
+Every transaction that creates or updates a student also inserts a row into
+``student_changes`` (``record_change``). Its ``seq`` is the feed cursor: a
+client passes the last ``next_cursor`` it received as ``?since=`` and gets
+only what changed after it, so a sync costs O(changes), not O(students).
+
+Sequence numbers must become visible in order, or a client could read 11,
+move its cursor past 10 and never see 10 commit. SQLite has a single writer,
+so that holds by itself; on PostgreSQL ``record_change`` takes a
+transaction-level advisory lock, so writers of change rows commit one after
+the other (only for the commit itself: it is the last statement before it).
+
+With ``?wait=`` the request long-polls: when nothing changed it returns as
+soon as a registration in this worker commits, or re-checks the database
+every CHANGES_POLL_SECONDS for writes made elsewhere, until the wait is over.
+"""
+
+import asyncio
+import os
+import time
+
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, text
+
+from app.database import SessionLocal
+from app.models import Student, StudentChange, row_to_dict, student_columns
+
+# Load environment variables
+load_dotenv()
+
+CHANGES_PAGE_SIZE = int(os.getenv("CHANGES_PAGE_SIZE", "500"))
+CHANGES_MAX_PAGE_SIZE = int(os.getenv("CHANGES_MAX_PAGE_SIZE", "5000"))
+CHANGES_MAX_WAIT_SECONDS = float(os.getenv("CHANGES_MAX_WAIT_SECONDS", "60"))
+CHANGES_POLL_SECONDS = float(os.getenv("CHANGES_POLL_SECONDS", "2"))
+
+# Arbitrary application-wide key for pg_advisory_xact_lock
+CHANGES_LOCK_KEY = 0x5354554443484E47
+
+
+def record_change(db, student, operation: str) -> None:
+    """
+    Add a change row for a student to the session's transaction
+    (the student must have an id: flush first when it is new)
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": CHANGES_LOCK_KEY})
+    db.add(StudentChange(student_id=student.id, register_number=student.register_number, operation=operation))
+
+
+class ChangeNotifier:
+    """
+    Wakes long-polling requests of this worker when a change commits
+    """
+
+    def __init__(self):
+        self._event = None
+
+    def current(self) -> asyncio.Event:
+        """
+        Event set by the next notify(); take it before querying, so a commit
+        between the query and the wait is not missed
+        """
+        if self._event is None:
+            self._event = asyncio.Event()
+        return self._event
+
+    def notify(self) -> None:
+        if self._event is not None:
+            self._event.set()
+            self._event = None
+
+
+notifier = ChangeNotifier()
+
+
+def notify_changes() -> None:
+    """
+    Call from the event loop after committing a change
+    """
+    notifier.notify()
+
+
+def read_changes(since: int, limit: int) -> dict:
+    """
+    One page of changes after `since`, each with the student's current data
+    Raises 410 if the cursor is ahead of the feed (the database was reset)
+    """
+    db = SessionLocal()
+    try:
+        rows = db.query(
+            StudentChange.seq,
+            StudentChange.operation,
+            StudentChange.register_number,
+            *student_columns()
+        ).outerjoin(
+            Student, Student.id == StudentChange.student_id
+        ).filter(
+            StudentChange.seq > since
+        ).order_by(StudentChange.seq).limit(limit + 1).all()
+
+        if not rows and since > 0:
+            latest = db.query(func.max(StudentChange.seq)).scalar() or 0
+            if since > latest:
+                raise HTTPException(
+                    status_code=410,
+                    detail="Cursor is ahead of the change feed (was the database reset?). Resync with since=0."
+                )
+    finally:
+        db.close()
+
+    page = rows[:limit]
+    return {
+        "since": since,
+        "next_cursor": page[-1].seq if page else since,
+        "has_more": len(rows) > limit,
+        "count": len(page),
+        "changes": [
+            {
+                "seq": row[0],
+                "operation": row[1],
+                "register_number": row[2],
+                # None if the student no longer exists
+                "student": row_to_dict(row[3:]) if row[3] is not None else None,
+            }
+            for row in page
+        ],
+    }
+
+
+async def changes_since(since: int, limit: int, wait: float = 0) -> dict:
+    """
+    read_changes(), long-polling up to `wait` seconds while there are none
+    """
+    deadline = time.monotonic() + wait
+    while True:
+        changed = notifier.current()
+        page = await run_in_threadpool(read_changes, since, limit)
+        remaining = deadline - time.monotonic()
+        if page["changes"] or remaining <= 0:
+            return page
+        try:
+            await asyncio.wait_for(changed.wait(), min(remaining, CHANGES_POLL_SECONDS))
+        except asyncio.TimeoutError:
+            pass
@@ -0,0 +1,216 @@
+"""
+Near-duplicate photo detection
+
+Every stored photo gets a 64-bit perceptual hash (``students.photo_dhash``,
+see app/perceptual_hash.py), so a friend's photo or the same stock image
+submitted again is found without comparing images pairwise.
+
+At registration, ``find_similar_photos`` looks the new hash up in a
+per-process PhotoIndex (multi-index hashing), which answers in well under
+a millisecond. The index is loaded from the database on first use and then
+catches up through the change feed (``student_changes.seq``, committed in
+order) before each lookup, so students registered by other workers are
+found too. PHOTO_DUPLICATE_ACTION decides what a match does:
+
+- ``warn`` (default): the student is registered and the response lists the
+  matching register numbers
+- ``reject``: the registration fails with 400
+
+``duplicate_clusters`` groups every hashed photo with its near duplicates
+for GET /api/photo-duplicates. ``python photo_duplicates.py backfill``
+hashes photos stored before migration 7 and records each as an ``updated``
+change, so running workers pick the hashes up without a restart.
+"""
+
+import os
+import threading
+
+from dotenv import load_dotenv
+from sqlalchemy import func
+
+from app.changes import record_change
+from app.metrics import Counter
+from app.models import Student, StudentChange, row_to_dict, student_columns
+from app.perceptual_hash import HashIndex, dhash, to_signed, to_unsigned
+from app.storage import resolve_upload_path
+
+# Load environment variables
+load_dotenv()
+
+# Above this, every lookup probes the index with 3-bit chunk variations
+# (about 2 ms instead of 0.3 ms at 100k students)
+PHOTO_MAX_DISTANCE = 11
+
+# Hashes at most this many bits apart (of 64) count as the same photo: a
+# slightly cropped copy differs in up to about 10, unrelated photos in 15 or more
+PHOTO_DUPLICATE_DISTANCE = min(int(os.getenv("PHOTO_DUPLICATE_DISTANCE", "10")), PHOTO_MAX_DISTANCE)
+PHOTO_DUPLICATE_ACTION = os.getenv("PHOTO_DUPLICATE_ACTION", "warn")
+
+# Rows fetched per round trip while loading hashes or backfilling
+BATCH_SIZE = 1000
+
+PHOTO_DUPLICATES = Counter(
+    "photo_duplicate_registrations_total",
+    "Registrations whose photo was within PHOTO_DUPLICATE_DISTANCE of another student's",
+    ("action",),
+)
+
+
+class PhotoIndex:
+    """
+    Photo hashes of every student, kept current through the change feed
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index = None
+        self._hashes = {}
+        self._last_seq = 0
+
+    def _add(self, student_id: int, register_number: str, value) -> None:
+        value = None if value is None else to_unsigned(value)
+        item = (student_id, register_number)
+        # Updates reach the feed too; an unchanged student needs nothing
+        previous = self._hashes.get(student_id)
+        if previous == (value, item):
+            return
+        # A replaced (or removed) photo must stop matching
+        if previous is not None:
+            self._index.remove(*previous)
+            del self._hashes[student_id]
+        if value is not None:
+            self._hashes[student_id] = (value, item)
+            self._index.add(value, item)
+
+    def refresh(self, db) -> None:
+        """
+        Load every hash on first use, then add students changed since the last call
+        """
+        with self._lock:
+            if self._index is None:
+                self._index = HashIndex()
+                # Read first: anything committed during the scan comes again through the feed
+                self._last_seq = db.query(func.max(StudentChange.seq)).scalar() or 0
+                rows = db.query(Student.id, Student.register_number, Student.photo_dhash).filter(
+                    Student.photo_dhash.isnot(None)
+                ).execution_options(yield_per=BATCH_SIZE)
+                for student_id, register_number, value in rows:
+                    self._add(student_id, register_number, value)
+                return
+
+            rows = db.query(StudentChange.seq, Student.id, Student.register_number, Student.photo_dhash).join(
+                Student, Student.id == StudentChange.student_id
+            ).filter(StudentChange.seq > self._last_seq).order_by(StudentChange.seq).all()
+            for seq, student_id, register_number, value in rows:
+                self._add(student_id, register_number, value)
+                self._last_seq = seq
+
+    def search(self, value: int, max_distance: int) -> list:
+        with self._lock:
+            return self._index.search(value, max_distance) if self._index is not None else []
+
+
+photo_index = PhotoIndex()
+
+
+def find_similar_photos(db, value: int, max_distance: int = PHOTO_DUPLICATE_DISTANCE) -> list:
+    """
+    [{student_id, register_number, distance}] of students whose photo hash is
+    within `max_distance` bits of `value`, closest first
+    """
+    photo_index.refresh(db)
+    return [
+        {"student_id": student_id, "register_number": register_number, "distance": distance}
+        for distance, (student_id, register_number) in photo_index.search(value, max_distance)
+    ]
+
+
+def duplicate_clusters(db, max_distance: int = PHOTO_DUPLICATE_DISTANCE) -> list:
+    """
+    Groups of two or more students whose photos are near duplicates, largest first
+
+    Near-duplicate pairs are joined transitively (union-find), so a cluster
+    can hold photos further apart than `max_distance` through a chain.
+    """
+    index = HashIndex()
+    rows = db.query(Student.id, Student.photo_dhash).filter(
+        Student.photo_dhash.isnot(None)
+    ).execution_options(yield_per=BATCH_SIZE)
+    for student_id, value in rows:
+        index.add(to_unsigned(value), student_id)
+
+    parent = {}
+
+    def find(item):
+        parent.setdefault(item, item)
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    for value, student_ids in index:
+        # Identical hashes share an entry; near ones are found by searching
+        matches = [student_id for _, student_id in index.search(value, max_distance)]
+        if len(matches) < 2:
+            continue
+        root = find(student_ids[0])
+        for student_id in matches:
+            parent[find(student_id)] = root
+
+    groups = {}
+    for student_id in parent:
+        groups.setdefault(find(student_id), []).append(student_id)
+    members = [ids for ids in groups.values() if len(ids) > 1]
+    if not members:
+        return []
+
+    students = {}
+    wanted = [student_id for ids in members for student_id in ids]
+    for start in range(0, len(wanted), BATCH_SIZE):
+        batch = wanted[start:start + BATCH_SIZE]
+        for row in db.query(*student_columns(), Student.photo_dhash).filter(Student.id.in_(batch)):
+            students[row[0]] = {**row_to_dict(row[:-1]), "photo_dhash": f"{to_unsigned(row[-1]):016x}"}
+
+    clusters = []
+    for ids in members:
+        cluster = sorted((students[i] for i in ids if i in students), key=lambda s: s["created_at"] or "")
+        if len(cluster) > 1:
+            clusters.append({"size": len(cluster), "students": cluster})
+    clusters.sort(key=lambda cluster: -cluster["size"])
+    return clusters
+
+
+def backfill_photo_hashes(db) -> dict:
+    """
+    Hash the stored photo of every student without a photo_dhash
+    (students registered before migration 7); returns counts
+
+    Each hashed student enters the change feed, which is how the PhotoIndex
+    of running workers learns about the new hash.
+    """
+    hashed, missing, failed = 0, 0, 0
+    last_id = 0
+    while True:
+        students = db.query(Student).filter(
+            Student.id > last_id, Student.photo_dhash.is_(None)
+        ).order_by(Student.id).limit(BATCH_SIZE).all()
+        if not students:
+            break
+        for student in students:
+            last_id = student.id
+            filepath = resolve_upload_path(student.photo_path)
+            if not filepath or not os.path.exists(filepath):
+                missing += 1
+                continue
+            try:
+                with open(filepath, "rb") as f:
+                    student.photo_dhash = to_signed(dhash(f.read()))
+            except (OSError, ValueError) as e:
+                print(f"⚠️  {student.register_number}: {e}")
+                failed += 1
+                continue
+            record_change(db, student, "updated")
+            hashed += 1
+        # One transaction per batch (hashes and their changes) keeps progress if interrupted
+        db.commit()
+    return {"hashed": hashed, "missing_files": missing, "failed": failed}
@@ -0,0 +1,144 @@
+"""
+Live dashboard events (Server-Sent Events)
+
+``publish()`` serializes an event once and hands the same bytes to every
+connected dashboard. Each subscriber has a small bounded buffer: a client
+that stops reading never grows memory or slows registration down. When its
+buffer fills, the backlog is dropped and replaced by a single ``resync``
+event telling the page to re-fetch its data.
+
+Events are delivered within one worker process. With several workers
+(serve.py) a dashboard only hears about registrations its own worker
+handled, so the page also re-fetches counters whenever it reconnects.
+Call ``publish()`` from the event loop (async route handlers).
+"""
+
+import asyncio
+import json
+import os
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from app.metrics import Counter, Gauge
+
+# Load environment variables
+load_dotenv()
+
+EVENT_BUFFER_SIZE = int(os.getenv("EVENT_BUFFER_SIZE", "64"))
+EVENT_HEARTBEAT_SECONDS = float(os.getenv("EVENT_HEARTBEAT_SECONDS", "15"))
+
+# Tells EventSource how long to wait before reconnecting
+RETRY_MS = 3000
+
+EVENTS_PUBLISHED = Counter(
+    "dashboard_events_published_total",
+    "Events published to live dashboards",
+    ("event",),
+)
+EVENTS_RESYNCED = Counter(
+    "dashboard_event_resyncs_total",
+    "Subscriber buffers that overflowed and were replaced by a resync event",
+)
+
+
+def format_event(event: str, data) -> bytes:
+    """
+    Encode one SSE message
+    """
+    payload = json.dumps(data, separators=(",", ":"), default=str)
+    return f"event: {event}\ndata: {payload}\n\n".encode("utf-8")
+
+
+RESYNC_MESSAGE = format_event("resync", {})
+HEARTBEAT_MESSAGE = b": ping\n\n"
+
+
+class Subscription:
+    """
+    One connected client: a bounded queue of encoded messages
+    """
+
+    def __init__(self, buffer_size: int):
+        self.queue = asyncio.Queue(maxsize=buffer_size)
+
+    def offer(self, message: bytes) -> None:
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Too far behind: drop the backlog, the client re-fetches instead
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC_MESSAGE)
+            EVENTS_RESYNCED.inc()
+
+    async def next_message(self, timeout: float) -> Optional[bytes]:
+        """
+        The next message, or None if nothing arrived within timeout
+        """
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventBroker:
+    """
+    In-process publish/subscribe for dashboard events
+    """
+
+    def __init__(self, buffer_size: int = EVENT_BUFFER_SIZE):
+        self.buffer_size = buffer_size
+        self._subscribers = set()
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self.buffer_size)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event: str, data) -> None:
+        EVENTS_PUBLISHED.inc(event=event)
+        if not self._subscribers:
+            return
+        message = format_event(event, data)
+        for subscription in tuple(self._subscribers):
+            subscription.offer(message)
+
+
+broker = EventBroker()
+
+EVENT_SUBSCRIBERS = Gauge(
+    "dashboard_event_subscribers",
+    "Dashboards connected to /api/events",
+    function=broker.subscriber_count,
+)
+
+
+def publish(event: str, data) -> None:
+    broker.publish(event, data)
+
+
+async def event_stream(request, initial_events=()):
+    """
+    Async generator of SSE bytes for one client, until it disconnects
+    """
+    subscription = broker.subscribe()
+    try:
+        yield f"retry: {RETRY_MS}\n\n".encode("utf-8")
+        for event, data in initial_events:
+            yield format_event(event, data)
+
+        while True:
+            message = await subscription.next_message(EVENT_HEARTBEAT_SECONDS)
+            if await request.is_disconnected():
+                break
+            # Heartbeats keep proxies from closing an idle connection
+            yield message if message is not None else HEARTBEAT_MESSAGE
+    finally:
+        broker.unsubscribe(subscription)
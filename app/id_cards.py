@@ -0,0 +1,438 @@
+"""
+Print-ready ID card sheets (/api/id-cards/{year}/{section})
+
+Each card combines the stored 300x300 photo, the 200x100 signature, the
+student's name, register number, year and section. Cards are laid out on
+A4 or US Letter sheets (TEMPLATES) and returned as one PDF, or as a ZIP of
+PNG sheets.
+
+- Layout: ``card_layout(template)`` computes the page size, card grid and
+  every box on a card once per template (lru_cache); each worker process
+  also draws the empty card (border, header band) once per template.
+- Rendering: whole pages are composited in a process pool (ID_CARD_WORKERS),
+  so a year of cards uses every core instead of one request thread.
+- Streaming: at most one page per worker is in flight; each finished page
+  is encoded (JPEG inside the PDF, PNG in the ZIP) and sent before the next
+  one is started, so memory is bounded by the workers' pages whatever the
+  number of students. The PDF is written object by object with the page
+  tree and cross-reference table at the end, which needs no seeking.
+
+Pillow is imported inside the worker functions, like the image helpers in
+app.utils.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import AsyncIterator, NamedTuple, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from app.utils import IMAGE_SIZE, SIGNATURE_SIZE
+
+# Load environment variables
+load_dotenv()
+
+ID_CARD_WORKERS = int(os.getenv("ID_CARD_WORKERS", "0")) or os.cpu_count() or 1
+ID_CARD_DPI = int(os.getenv("ID_CARD_DPI", "300"))
+
+# Page sizes in inches
+TEMPLATES = {
+    "a4": (8.27, 11.69),
+    "letter": (8.5, 11.0),
+}
+
+# ISO/IEC 7810 ID-1 (credit card) size in inches, margins between cards
+CARD_SIZE = (3.375, 2.125)
+CARD_GAP = 0.2
+PAGE_MARGIN = 0.4
+
+HEADER_TEXT = "STUDENT ID CARD"
+HEADER_COLOR = (0, 102, 204)
+TEXT_COLOR = (33, 37, 41)
+MUTED_COLOR = (108, 117, 125)
+BORDER_COLOR = (173, 181, 189)
+
+PAGE_JPEG_QUALITY = 90
+
+
+class CardLayout(NamedTuple):
+    """
+    Pixel geometry of one template at ID_CARD_DPI; boxes are (left, top, right, bottom)
+    """
+    page_size: Tuple[int, int]
+    card_size: Tuple[int, int]
+    # Top-left corner of every card on the page, row by row
+    origins: Tuple[Tuple[int, int], ...]
+    header_box: Tuple[int, int, int, int]
+    photo_box: Tuple[int, int, int, int]
+    signature_box: Tuple[int, int, int, int]
+    # Left edge and top of the name, register number and year/section lines
+    text_left: int
+    text_tops: Tuple[int, int, int]
+    font_sizes: Tuple[int, int, int]
+    text_width: int
+
+    @property
+    def cards_per_page(self) -> int:
+        return len(self.origins)
+
+
+class CardStudent(NamedTuple):
+    """
+    What one card shows; photo and signature are filesystem paths (or None)
+    """
+    name: str
+    register_number: str
+    year: int
+    section: str
+    photo: Optional[str]
+    signature: Optional[str]
+
+
+@lru_cache(maxsize=None)
+def card_layout(template: str) -> CardLayout:
+    page_width, page_height = (round(inches * ID_CARD_DPI) for inches in TEMPLATES[template])
+    card_width, card_height = (round(inches * ID_CARD_DPI) for inches in CARD_SIZE)
+    gap = round(CARD_GAP * ID_CARD_DPI)
+    margin = round(PAGE_MARGIN * ID_CARD_DPI)
+
+    columns = max(1, (page_width - 2 * margin + gap) // (card_width + gap))
+    rows = max(1, (page_height - 2 * margin + gap) // (card_height + gap))
+    # Center the grid on the page
+    left = (page_width - columns * card_width - (columns - 1) * gap) // 2
+    top = (page_height - rows * card_height - (rows - 1) * gap) // 2
+    origins = tuple(
+        (left + column * (card_width + gap), top + row * (card_height + gap))
+        for row in range(rows)
+        for column in range(columns)
+    )
+
+    padding = card_height // 20
+    header_height = card_height // 7
+    # Photo: square, as tall as the card below the header band
+    photo_size = card_height - header_height - 2 * padding
+    photo_box = (padding, header_height + padding, padding + photo_size, header_height + padding + photo_size)
+
+    text_left = photo_box[2] + 2 * padding
+    text_width = card_width - text_left - padding
+    # Signature: bottom right, keeping the 2:1 aspect of stored signatures
+    signature_width = min(text_width, photo_size * SIGNATURE_SIZE[0] // IMAGE_SIZE[0])
+    signature_height = signature_width * SIGNATURE_SIZE[1] // SIGNATURE_SIZE[0]
+    signature_box = (card_width - padding - signature_width, card_height - padding - signature_height,
+                     card_width - padding, card_height - padding)
+
+    name_size = card_height // 12
+    detail_size = card_height // 16
+    text_top = header_height + 2 * padding
+    text_tops = (text_top, text_top + name_size * 3 // 2, text_top + name_size * 3 // 2 + detail_size * 3 // 2)
+
+    return CardLayout(
+        page_size=(page_width, page_height),
+        card_size=(card_width, card_height),
+        origins=origins,
+        header_box=(0, 0, card_width, header_height),
+        photo_box=photo_box,
+        signature_box=signature_box,
+        text_left=text_left,
+        text_tops=text_tops,
+        font_sizes=(name_size, detail_size, detail_size),
+        text_width=text_width,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Worker side (runs in the process pool)
+# ---------------------------------------------------------------------------
+
+@lru_cache(maxsize=16)
+def _font(size: int):
+    from PIL import ImageFont
+
+    try:
+        return ImageFont.truetype("DejaVuSans.ttf", size)
+    except OSError:
+        return ImageFont.load_default(size)
+
+
+@lru_cache(maxsize=None)
+def _card_background(template: str):
+    """
+    Empty card with border and header band, drawn once per template and worker
+    """
+    from PIL import Image, ImageDraw
+
+    layout = card_layout(template)
+    card = Image.new("RGB", layout.card_size, "white")
+    draw = ImageDraw.Draw(card)
+    draw.rectangle(layout.header_box, fill=HEADER_COLOR)
+    header_font = _font(layout.header_box[3] * 3 // 5)
+    draw.text((layout.text_left, layout.header_box[3] // 2), HEADER_TEXT, font=header_font,
+              fill="white", anchor="lm")
+    draw.rectangle((0, 0, layout.card_size[0] - 1, layout.card_size[1] - 1), outline=BORDER_COLOR, width=2)
+    return card
+
+
+def _fit_text(draw, text: str, font, width: int) -> str:
+    """
+    `text`, shortened with an ellipsis until it fits in `width` pixels
+    """
+    if draw.textlength(text, font=font) <= width:
+        return text
+    while text and draw.textlength(text + "…", font=font) > width:
+        text = text[:-1]
+    return text.rstrip() + "…"
+
+
+def _paste_image(card, path: Optional[str], box: Tuple[int, int, int, int]) -> None:
+    from PIL import Image, ImageDraw
+
+    size = (box[2] - box[0], box[3] - box[1])
+    if path and os.path.exists(path):
+        try:
+            with Image.open(path) as img:
+                # JPEG: decode at the nearest reduced scale first
+                img.draft("RGB", size)
+                card.paste(img.convert("RGB").resize(size, Image.Resampling.LANCZOS), box[:2])
+            return
+        except OSError:
+            pass
+    # Missing or unreadable file: a labelled placeholder keeps the layout
+    draw = ImageDraw.Draw(card)
+    draw.rectangle(box, outline=BORDER_COLOR, width=2)
+    draw.text(((box[0] + box[2]) // 2, (box[1] + box[3]) // 2), "No image", font=_font(size[1] // 8),
+              fill=MUTED_COLOR, anchor="mm")
+
+
+def render_card(template: str, student: CardStudent):
+    from PIL import ImageDraw
+
+    layout = card_layout(template)
+    card = _card_background(template).copy()
+    _paste_image(card, student.photo, layout.photo_box)
+    _paste_image(card, student.signature, layout.signature_box)
+
+    draw = ImageDraw.Draw(card)
+    lines = (
+        (student.name, TEXT_COLOR),
+        (student.register_number, TEXT_COLOR),
+        (f"Year {student.year}, Section {student.section}", MUTED_COLOR),
+    )
+    for (text, color), top, size in zip(lines, layout.text_tops, layout.font_sizes):
+        font = _font(size)
+        draw.text((layout.text_left, top), _fit_text(draw, text, font, layout.text_width), font=font, fill=color)
+    return card
+
+
+def render_page(template: str, fmt: str, students: Tuple[CardStudent, ...]) -> bytes:
+    """
+    One encoded sheet: JPEG for a PDF page, PNG otherwise
+    """
+    import io
+
+    from PIL import Image
+
+    layout = card_layout(template)
+    page = Image.new("RGB", layout.page_size, "white")
+    for student, origin in zip(students, layout.origins):
+        page.paste(render_card(template, student), origin)
+
+    buffer = io.BytesIO()
+    if fmt == "pdf":
+        page.save(buffer, "JPEG", quality=PAGE_JPEG_QUALITY, dpi=(ID_CARD_DPI, ID_CARD_DPI))
+    else:
+        page.save(buffer, "PNG", compress_level=1, dpi=(ID_CARD_DPI, ID_CARD_DPI))
+    return buffer.getvalue()
+
+
+# ---------------------------------------------------------------------------
+# Output containers
+# ---------------------------------------------------------------------------
+
+class PdfStream:
+    """
+    Minimal PDF writer emitting one full-page JPEG per page as it arrives
+
+    Objects 1 (catalog) and 2 (page tree) are written last; pages refer to
+    object 2 by number, and the cross-reference table lists every offset.
+    """
+
+    def __init__(self, page_size: Tuple[int, int]):
+        self.width_px, self.height_px = page_size
+        # Points (1/72 in) at ID_CARD_DPI
+        self.width_pt = self.width_px * 72 / ID_CARD_DPI
+        self.height_pt = self.height_px * 72 / ID_CARD_DPI
+        self.offset = 0
+        self.offsets = {}
+        self.next_number = 3
+        self.pages = []
+
+    def _emit(self, data: bytes) -> bytes:
+        self.offset += len(data)
+        return data
+
+    def _object(self, number: int, body: bytes, stream: bytes = None) -> bytes:
+        self.offsets[number] = self.offset
+        data = f"{number} 0 obj\n".encode() + body
+        if stream is not None:
+            data += b"\nstream\n" + stream + b"\nendstream"
+        return self._emit(data + b"\nendobj\n")
+
+    def start(self) -> bytes:
+        return self._emit(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def add_page(self, jpeg: bytes) -> bytes:
+        image, content, page = self.next_number, self.next_number + 1, self.next_number + 2
+        self.next_number += 3
+        self.pages.append(page)
+
+        drawing = f"q {self.width_pt:.2f} 0 0 {self.height_pt:.2f} 0 0 cm /Im0 Do Q".encode()
+        return b"".join((
+            self._object(image, (
+                f"<< /Type /XObject /Subtype /Image /Width {self.width_px} /Height {self.height_px} "
+                f"/ColorSpace /DeviceRGB /BitsPerComponent 8 /Filter /DCTDecode /Length {len(jpeg)} >>"
+            ).encode(), jpeg),
+            self._object(content, f"<< /Length {len(drawing)} >>".encode(), drawing),
+            self._object(page, (
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {self.width_pt:.2f} {self.height_pt:.2f}] "
+                f"/Resources << /XObject << /Im0 {image} 0 R >> >> /Contents {content} 0 R >>"
+            ).encode()),
+        ))
+
+    def finish(self) -> bytes:
+        kids = " ".join(f"{page} 0 R" for page in self.pages)
+        data = self._object(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(self.pages)} >>".encode())
+        data += self._object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+
+        xref_offset = self.offset
+        entries = ["0000000000 65535 f "] + [f"{self.offsets[n]:010d} 00000 n " for n in range(1, self.next_number)]
+        data += (
+            f"xref\n0 {self.next_number}\n" + "\n".join(entries) + "\n"
+            f"trailer\n<< /Size {self.next_number} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n"
+        ).encode()
+        return self._emit(data)
+
+
+class _Drain:
+    """
+    Write-only file for zipfile whose contents are taken as they are written
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data: bytes) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def take(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+class ZipStream:
+    """
+    ZIP of PNG sheets written entry by entry (PNG is compressed already: stored)
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.sink = _Drain()
+        self.archive = zipfile.ZipFile(self.sink, "w", zipfile.ZIP_STORED)
+        self.count = 0
+
+    def start(self) -> bytes:
+        return b""
+
+    def add_page(self, png: bytes) -> bytes:
+        self.count += 1
+        self.archive.writestr(f"{self.name}_page_{self.count:03d}.png", png)
+        return self.sink.take()
+
+    def finish(self) -> bytes:
+        self.archive.close()
+        return self.sink.take()
+
+
+# ---------------------------------------------------------------------------
+# Pool and streaming
+# ---------------------------------------------------------------------------
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # Spawned, not forked: the server process has threads and open database connections
+        _pool = ProcessPoolExecutor(max_workers=ID_CARD_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False)
+        _pool = None
+
+
+def card_students(records: list) -> list:
+    """
+    CardStudent for every student record (rows_to_records() dicts)
+    """
+    from app.storage import resolve_upload_path
+
+    return [
+        CardStudent(
+            name=record["name"],
+            register_number=record["register_number"],
+            year=record["year"],
+            section=record["section"],
+            photo=resolve_upload_path(record["photo_path"]),
+            signature=resolve_upload_path(record["signature_path"]),
+        )
+        for record in records
+    ]
+
+
+def page_count(students: list, template: str) -> int:
+    per_page = card_layout(template).cards_per_page
+    return (len(students) + per_page - 1) // per_page
+
+
+async def id_card_sheets(students: list, template: str, fmt: str, name: str,
+                         pool=None, window: int = ID_CARD_WORKERS) -> AsyncIterator[bytes]:
+    """
+    The PDF or ZIP of sheets for `students` (CardStudent list), in chunks as pages finish
+    At most `window` pages (one per worker) are rendered at a time.
+    """
+    layout = card_layout(template)
+    pool = pool or get_pool()
+    loop = asyncio.get_running_loop()
+    output = PdfStream(layout.page_size) if fmt == "pdf" else ZipStream(name)
+
+    per_page = layout.cards_per_page
+    pages = (tuple(students[start:start + per_page]) for start in range(0, len(students), per_page))
+    pending = deque()
+    try:
+        yield output.start()
+        for page in pages:
+            pending.append(loop.run_in_executor(pool, render_page, template, fmt, page))
+            # One page per worker in flight; the oldest is sent before another starts
+            if len(pending) >= window:
+                yield output.add_page(await pending.popleft())
+        while pending:
+            yield output.add_page(await pending.popleft())
+        yield output.finish()
+    finally:
+        # Client went away: drop pages not started yet
+        for future in pending:
+            future.cancel()
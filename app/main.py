@@ -2,13 +2,56 @@
 FastAPI main application
 """
 
-from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, Request
+from fastapi.exception_handlers import http_exception_handler
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from starlette.exceptions import HTTPException as StarletteHTTPException
+import asyncio
 import os
 
-from app.database import init_db
+from app.database import init_db, pool_status
+from app.id_cards import shutdown_pool as shutdown_id_card_pool
+from app.metrics import HTTP_EXCEPTIONS, render_metrics
+from app.middleware import CompressionMiddleware, MetricsMiddleware, route_label
+from app.profiling import ProfilingMiddleware
+from app.reconcile import RECONCILE_INTERVAL_SECONDS, reconciler
+from app.resumable import garbage_collector
 from app.routes import router
+from app.static_files import CachedStaticFiles, static_cache_policy, uploads_cache_policy
+
+# Set by serve.py once directories and tables exist, before workers start
+RUNTIME_PREPARED_ENV = "APP_RUNTIME_PREPARED"
+
+RUNTIME_DIRECTORIES = ("uploads", "reports", "app/static/css", "app/static/js")
+
+# Static mounts, used to label requests that do not match an API route
+MOUNT_PREFIXES = ("/static", "/uploads")
+
+
+def create_runtime_directories():
+    """
+    Create directories the application writes to or serves from
+    """
+    for directory in RUNTIME_DIRECTORIES:
+        os.makedirs(directory, exist_ok=True)
+
+
+def prepare_runtime():
+    """
+    One-time setup for a deployment: directories and database tables
+    Called by serve.py in the master process before any worker is forked
+    """
+    create_runtime_directories()
+    init_db()
+
+
+def runtime_prepared() -> bool:
+    """
+    Whether a launcher already ran prepare_runtime() for this process tree
+    """
+    return os.getenv(RUNTIME_PREPARED_ENV) == "1"
+
 
 # Create FastAPI app
 app = FastAPI(
@@ -26,15 +69,33 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Create necessary directories
-os.makedirs("uploads", exist_ok=True)
-os.makedirs("reports", exist_ok=True)
-os.makedirs("app/static/css", exist_ok=True)
-os.makedirs("app/static/js", exist_ok=True)
+# Compress JSON/HTML responses above the size threshold (gzip, or brotli when installed)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+)
+
+# Admin-requested profiling of single requests (?profile=1&password=...)
+app.add_middleware(ProfilingMiddleware)
+
+# Per-route latency and status metrics (outermost, so it times everything)
+app.add_middleware(MetricsMiddleware, mount_prefixes=MOUNT_PREFIXES)
+
+# Create necessary directories (skipped in workers started by serve.py)
+if not runtime_prepared():
+    create_runtime_directories()
 
-# Mount static files
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+# Mount static files (fingerprinted assets are immutable, uploads are revalidated)
+app.mount(
+    "/static",
+    CachedStaticFiles(directory="app/static", cache_policy=static_cache_policy, precompressed=True),
+    name="static"
+)
+app.mount(
+    "/uploads",
+    CachedStaticFiles(directory="uploads", cache_policy=uploads_cache_policy),
+    name="uploads"
+)
 
 # Include routes
 app.include_router(router)
@@ -45,6 +106,18 @@ async def startup_event():
     """
     Initialize database on startup
     """
+    # Every worker sweeps abandoned resumable uploads (deletes are idempotent)
+    app.state.staging_gc = asyncio.create_task(garbage_collector())
+    
+    # One worker per period reconciles uploads/ with the database (a lock file decides which)
+    app.state.reconciler = None
+    if RECONCILE_INTERVAL_SECONDS > 0:
+        app.state.reconciler = asyncio.create_task(reconciler())
+    
+    if runtime_prepared():
+        # serve.py already created the tables before forking workers
+        return
+
     print("🚀 Starting College Data Collection Application...")
     print("📊 Initializing database...")
     try:
@@ -57,6 +130,27 @@ async def startup_event():
         print("⚠️  Please check your database configuration in .env file")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """
+    Stop background tasks and the ID card worker pool
+    """
+    for name in ("staging_gc", "reconciler"):
+        task = getattr(app.state, name, None)
+        if task is not None:
+            task.cancel()
+    shutdown_id_card_pool()
+
+
+@app.exception_handler(StarletteHTTPException)
+async def counting_http_exception_handler(request: Request, exc: StarletteHTTPException):
+    """
+    Count HTTPExceptions by status before rendering the default error response
+    """
+    HTTP_EXCEPTIONS.inc(route=route_label(request.scope, MOUNT_PREFIXES), status=exc.status_code)
+    return await http_exception_handler(request, exc)
+
+
 @app.get("/health")
 async def health_check():
     """
@@ -65,11 +159,21 @@ async def health_check():
     return {
         "status": "healthy",
         "application": "College Data Collection Application",
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "database_pool": pool_status()
     }
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Prometheus metrics for this worker process
+    """
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
+    # Development server with auto-reload; use serve.py for production
     import uvicorn
     uvicorn.run(
         "app.main:app",
@@ -0,0 +1,165 @@
+"""
+ASGI middleware for the application
+"""
+
+import gzip
+import time
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.metrics import REQUEST_LATENCY, REQUESTS_TOTAL
+from app.static_files import accepted_encodings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "image/svg+xml",
+    "text/",
+)
+
+
+def negotiate_encoding(request_headers: Headers):
+    """
+    Pick the best compression the client accepts (brotli over gzip)
+    """
+    accepted = accepted_encodings(request_headers)
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def is_compressible(content_type: str) -> bool:
+    """
+    Only text-like payloads are worth compressing
+    """
+    return bool(content_type) and content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class CompressionMiddleware:
+    """
+    Negotiated gzip/brotli compression for complete (non-streaming) responses
+
+    Responses smaller than ``minimum_size``, already encoded (precompressed
+    static files), non-text, or streamed in several chunks (file downloads,
+    event streams) are passed through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+
+        async def send_wrapper(message):
+            nonlocal start_message
+
+            if message["type"] == "http.response.start":
+                # Hold the headers back until we know whether to compress
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=start_message["headers"])
+            body = message.get("body", b"")
+            compressible = is_compressible(headers.get("content-type", ""))
+            if compressible:
+                headers.add_vary_header("Accept-Encoding")
+
+            if (
+                not compressible
+                or message.get("more_body", False)
+                or len(body) < self.minimum_size
+                or "content-encoding" in headers
+            ):
+                await send(start_message)
+                start_message = None
+                await send(message)
+                return
+
+            compressed = self.compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+
+            await send(start_message)
+            start_message = None
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def route_label(scope, mount_prefixes=()) -> str:
+    """
+    Route template for a request ("/api/download-year-report/{year}")
+
+    Requests under a mount (/static, /uploads) are labelled with its prefix
+    and the rest that match no route as "unmatched", so arbitrary URLs
+    cannot blow up label cardinality.
+    """
+    route = scope.get("route")
+    if route is not None and getattr(route, "path", None):
+        return route.path
+    # A matched Mount moves its prefix from "path" to the end of "root_path"
+    root_path = scope.get("root_path", "")
+    for prefix in mount_prefixes:
+        if root_path.endswith(prefix):
+            return prefix
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Record latency and status per route template
+    """
+
+    def __init__(self, app, mount_prefixes=()):
+        self.app = app
+        self.mount_prefixes = tuple(mount_prefixes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = route_label(scope, self.mount_prefixes)
+            method = scope.get("method", "")
+            REQUEST_LATENCY.observe(time.perf_counter() - started, method=method, route=route)
+            REQUESTS_TOTAL.inc(method=method, route=route, status=status_code)
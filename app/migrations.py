@@ -0,0 +1,413 @@
+"""
+Versioned schema migrations
+
+Migrations are functions taking a SQLAlchemy Connection, registered in order
+with ``@migration(version, description)``. Applied versions are recorded in
+the ``schema_migrations`` table; each migration runs in its own transaction
+together with its record.
+
+- An empty database is created straight from the models and stamped with
+  the latest version (nothing to migrate).
+- A database created before migrations existed (tables, but no
+  ``schema_migrations``) gets any missing version 1 tables
+  (``stored_objects``), is stamped as version 1 and upgraded from there.
+
+Write migrations so they can be re-run safely (``checkfirst=True``,
+``IF NOT EXISTS``): SQLite's driver commits DDL immediately, so a failure
+part-way leaves earlier statements applied without the version record.
+
+Run ``python migrate_db.py`` to upgrade or ``python migrate_db.py status``.
+"""
+
+import os
+import shutil
+from datetime import datetime, timezone
+from typing import Callable, NamedTuple
+
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Column,
+    DateTime,
+    Integer,
+    LargeBinary,
+    MetaData,
+    SmallInteger,
+    String,
+    Table,
+    func,
+    inspect,
+    select,
+    text,
+)
+from sqlalchemy.schema import CreateIndex
+
+from app.database import Base, engine
+from app.models import (
+    FILE_LEGACY,
+    PHOTO_SUFFIX,
+    SIGNATURE_SUFFIX,
+    StoredObject,
+    Student,
+    StudentChange,
+    file_fields,
+    parse_mac_address,
+)
+from app.partitions import (
+    STUDENTS_TABLE,
+    create_partitioned_indexes,
+    create_partitioned_students,
+    is_partitioned,
+)
+from app.search import create_search_index, drop_search_index
+from app.storage import LegacyStorage, resolve_upload_path
+
+schema_migrations = Table(
+    "schema_migrations",
+    Base.metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String(255), nullable=False),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+)
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    upgrade: Callable
+
+
+MIGRATIONS = []
+
+
+def migration(version: int, description: str):
+    """
+    Register a migration function; versions must be added in increasing order
+    """
+    def register(func):
+        if MIGRATIONS and version <= MIGRATIONS[-1].version:
+            raise ValueError(f"Migration {version} registered after {MIGRATIONS[-1].version}")
+        MIGRATIONS.append(Migration(version, description, func))
+        return func
+    return register
+
+
+# ---------------------------------------------------------------------------
+# Migrations
+# ---------------------------------------------------------------------------
+
+@migration(1, "Baseline: students and stored_objects tables")
+def _baseline(connection):
+    Base.metadata.create_all(
+        connection,
+        tables=[Student.__table__, StoredObject.__table__],
+    )
+
+
+@migration(2, "Indexes for year/section reports and created_at ordering")
+def _report_indexes(connection):
+    for index in Student.__table__.indexes:
+        if index.name in ("ix_students_year_section_created_at", "ix_students_created_at"):
+            index.create(connection, checkfirst=True)
+
+
+COMPACT_STAGING_TABLE = "students_compact"
+# Indexes of the version 3 students table
+COMPACT_INDEXES = (
+    "ix_students_id",
+    "ix_students_register_number",
+    "ix_students_year_section_created_at",
+    "ix_students_created_at",
+)
+
+
+def _compact_students_table(name: str) -> Table:
+    """
+    Version 3 students table, without indexes (created after the swap so
+    their names don't clash with the old table's)
+    """
+    return Table(
+        name,
+        MetaData(),
+        Column("id", Integer, primary_key=True),
+        Column("name", String(255), nullable=False),
+        Column("year", SmallInteger, nullable=False),
+        Column("section", String(1), nullable=False),
+        Column("register_number", String(50), nullable=False),
+        Column("photo_storage", SmallInteger, nullable=False),
+        Column("photo_digest", LargeBinary(32)),
+        Column("has_ipad", Boolean, nullable=False),
+        Column("ipad_mac", BigInteger),
+        Column("signature_storage", SmallInteger, nullable=False),
+        Column("signature_digest", LargeBinary(32)),
+        Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    )
+
+
+def _compact_file(field: str, key, row) -> dict:
+    """
+    Columns for a version 2 photo_path / signature_path value
+
+    A legacy path that is not where the layout puts it (written under another
+    UPLOAD_FOLDER, say) is copied there, so deriving it later finds the file.
+    """
+    values = file_fields(field, key)
+    if values[f"{field}_storage"] != FILE_LEGACY:
+        return values
+
+    suffix = PHOTO_SUFFIX if field == "photo" else SIGNATURE_SUFFIX
+    stored = resolve_upload_path(key)
+    derived = resolve_upload_path(LegacyStorage().key(row.year, row.section, f"{row.register_number}{suffix}"))
+    if stored != derived:
+        if os.path.exists(stored) and not os.path.exists(derived):
+            os.makedirs(os.path.dirname(derived), exist_ok=True)
+            shutil.copy2(stored, derived)
+        elif not os.path.exists(derived):
+            print(f"   ⚠️  {row.register_number}: {field} file not found at {stored}")
+    return values
+
+
+def _compact_row(row) -> dict:
+    mac = None
+    if row.ipad_mac_address:
+        try:
+            mac = parse_mac_address(row.ipad_mac_address)
+        except ValueError:
+            print(f"   ⚠️  {row.register_number}: dropping invalid iPad MAC address {row.ipad_mac_address!r}")
+    return {
+        "id": row.id,
+        "name": row.name,
+        "year": row.year,
+        "section": row.section,
+        "register_number": row.register_number,
+        **_compact_file("photo", row.photo_path, row),
+        "has_ipad": row.has_ipad == "Yes",
+        "ipad_mac": mac,
+        **_compact_file("signature", row.signature_path, row),
+        "created_at": row.created_at,
+    }
+
+
+def _swap_compact_table(connection) -> None:
+    connection.execute(text(f"ALTER TABLE {COMPACT_STAGING_TABLE} RENAME TO students"))
+    if connection.dialect.name == "postgresql":
+        # Keep the names a freshly created table would have
+        connection.execute(text(f"ALTER TABLE students RENAME CONSTRAINT {COMPACT_STAGING_TABLE}_pkey TO students_pkey"))
+        connection.execute(text(f"ALTER SEQUENCE {COMPACT_STAGING_TABLE}_id_seq RENAME TO students_id_seq"))
+
+
+@migration(3, "Compact students: boolean has_ipad, integer MAC, smallint year, derived file paths")
+def _compact_students(connection, batch_size: int = 5000):
+    inspector = inspect(connection)
+    tables = set(inspector.get_table_names())
+    staging = _compact_students_table(COMPACT_STAGING_TABLE)
+
+    # Re-run after an interruption: finish the swap, or start the copy over
+    if Student.__tablename__ not in tables and COMPACT_STAGING_TABLE in tables:
+        _swap_compact_table(connection)
+    elif "photo_storage" not in {column["name"] for column in inspector.get_columns(Student.__tablename__)}:
+        staging.drop(connection, checkfirst=True)
+        staging.create(connection)
+
+        old = Table(Student.__tablename__, MetaData(), autoload_with=connection)
+        last_id = 0
+        while True:
+            # Keyset batches keep memory flat on large tables
+            rows = connection.execute(
+                select(old).where(old.c.id > last_id).order_by(old.c.id).limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            connection.execute(staging.insert(), [_compact_row(row) for row in rows])
+            last_id = rows[-1].id
+
+        old.drop(connection)
+        _swap_compact_table(connection)
+
+    # Only the indexes of version 3: later migrations create their own
+    for index in Student.__table__.indexes:
+        if index.name in COMPACT_INDEXES:
+            index.create(connection, checkfirst=True)
+
+    if connection.dialect.name == "postgresql":
+        # Copied ids were explicit; move the sequence past them
+        connection.execute(text(
+            "SELECT setval(pg_get_serial_sequence('students', 'id'), COALESCE(MAX(id), 0) + 1, false) FROM students"
+        ))
+
+
+@migration(4, "Change feed outbox (student_changes) with backfill")
+def _change_feed(connection):
+    changes = StudentChange.__table__
+    changes.create(connection, checkfirst=True)
+
+    # Existing students enter the feed once, oldest first
+    if connection.execute(select(func.count()).select_from(changes)).scalar() == 0:
+        students = Student.__table__
+        connection.execute(changes.insert().from_select(
+            ["student_id", "register_number", "operation", "changed_at"],
+            select(
+                students.c.id,
+                students.c.register_number,
+                text("'created'"),
+                students.c.created_at,
+            ).order_by(students.c.created_at, students.c.id),
+        ))
+
+
+PARTITION_STAGING_TABLE = "students_partitioned"
+
+
+@migration(5, "Partition students by year (PostgreSQL; SQLite keeps a plain table)")
+def _partition_students(connection):
+    if connection.dialect.name != "postgresql" or is_partitioned(connection):
+        return
+
+    # PostgreSQL DDL is transactional: a failure leaves the old table untouched
+    years = connection.execute(text(f"SELECT DISTINCT year FROM {STUDENTS_TABLE}")).scalars().all()
+    create_partitioned_students(connection, PARTITION_STAGING_TABLE, years)
+    # Columns added by later migrations are not there yet
+    existing = {column["name"] for column in inspect(connection).get_columns(STUDENTS_TABLE)}
+    columns = ", ".join(column.name for column in Student.__table__.columns if column.name in existing)
+    connection.execute(text(
+        f"INSERT INTO {PARTITION_STAGING_TABLE} ({columns}) SELECT {columns} FROM {STUDENTS_TABLE}"
+    ))
+    connection.execute(text(f"DROP TABLE {STUDENTS_TABLE}"))
+
+    connection.execute(text(f"ALTER TABLE {PARTITION_STAGING_TABLE} RENAME TO {STUDENTS_TABLE}"))
+    for suffix in ("pkey", "register_number_year_key"):
+        connection.execute(text(
+            f"ALTER TABLE {STUDENTS_TABLE} RENAME CONSTRAINT {PARTITION_STAGING_TABLE}_{suffix} TO {STUDENTS_TABLE}_{suffix}"
+        ))
+    connection.execute(text(f"ALTER SEQUENCE {PARTITION_STAGING_TABLE}_id_seq RENAME TO {STUDENTS_TABLE}_id_seq"))
+    create_partitioned_indexes(connection)
+
+    # Copied ids were explicit; move the sequence past them
+    connection.execute(text(
+        "SELECT setval(pg_get_serial_sequence('students', 'id'), COALESCE(MAX(id), 0) + 1, false) FROM students"
+    ))
+
+
+@migration(6, "Student search: MAC index, pg_trgm indexes (PostgreSQL) or FTS5 table (SQLite)")
+def _student_search(connection):
+    for index in Student.__table__.indexes:
+        if index.name == "ix_students_ipad_mac":
+            index.create(connection, checkfirst=True)
+    create_search_index(connection)
+
+
+@migration(7, "Perceptual photo hash (students.photo_dhash)")
+def _photo_dhash(connection):
+    # Partitions and new archives get the column from the parent; existing
+    # photos are hashed by python photo_duplicates.py backfill
+    if "photo_dhash" not in {column["name"] for column in inspect(connection).get_columns(STUDENTS_TABLE)}:
+        connection.execute(text(f"ALTER TABLE {STUDENTS_TABLE} ADD COLUMN photo_dhash BIGINT"))
+
+
+@migration(8, "Student search: name prefix index (lower(name), register_number)")
+def _name_prefix_index(connection):
+    # SQLite cannot reflect expression indexes, so checkfirst would not see
+    # this one; let the database skip it instead
+    for index in Student.__table__.indexes:
+        if index.name == "ix_students_name_lower":
+            connection.execute(CreateIndex(index, if_not_exists=True))
+
+
+@migration(9, "Drop stored_objects.ref_count (reconciliation decides what is referenced)")
+def _drop_ref_count(connection):
+    if "ref_count" in {column["name"] for column in inspect(connection).get_columns(StoredObject.__tablename__)}:
+        # DROP COLUMN needs SQLite 3.35 or newer
+        connection.execute(text(f"ALTER TABLE {StoredObject.__tablename__} DROP COLUMN ref_count"))
+
+
+def create_schema(connection) -> None:
+    """
+    Create every table at the latest version (students partitioned on PostgreSQL)
+    """
+    if connection.dialect.name != "postgresql":
+        # A search table left behind by a dropped students table
+        drop_search_index(connection)
+        Base.metadata.create_all(connection)
+    else:
+        Base.metadata.create_all(
+            connection,
+            tables=[table for table in Base.metadata.sorted_tables if table is not Student.__table__],
+        )
+        create_partitioned_students(connection)
+        create_partitioned_indexes(connection)
+    create_search_index(connection)
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+def _record(connection, entry: Migration) -> None:
+    connection.execute(schema_migrations.insert().values(
+        version=entry.version,
+        description=entry.description,
+        applied_at=datetime.now(timezone.utc),
+    ))
+
+
+def applied_versions(connection) -> set:
+    """
+    Versions recorded in schema_migrations (empty if the table doesn't exist)
+    """
+    if not inspect(connection).has_table(schema_migrations.name):
+        return set()
+    return set(connection.execute(select(schema_migrations.c.version)).scalars())
+
+
+def pending_migrations(connection) -> list:
+    """
+    Registered migrations not yet applied, in order
+    """
+    applied = applied_versions(connection)
+    return [entry for entry in MIGRATIONS if entry.version not in applied]
+
+
+def latest_version() -> int:
+    return MIGRATIONS[-1].version
+
+
+def upgrade(bind=engine) -> list:
+    """
+    Bring the schema up to the latest version and return the migrations applied
+    """
+    with bind.begin() as connection:
+        tables = set(inspect(connection).get_table_names())
+
+        if schema_migrations.name not in tables:
+            if Student.__tablename__ not in tables:
+                # Empty database: create everything and mark it current
+                create_schema(connection)
+                for entry in MIGRATIONS:
+                    _record(connection, entry)
+                return []
+
+            # Created before migrations existed: that schema is the baseline,
+            # plus its tables the old create_all() didn't know about
+            schema_migrations.create(connection)
+            MIGRATIONS[0].upgrade(connection)
+            _record(connection, MIGRATIONS[0])
+
+    applied = []
+    with bind.connect() as connection:
+        pending = pending_migrations(connection)
+
+    for entry in pending:
+        with bind.begin() as connection:
+            entry.upgrade(connection)
+            _record(connection, entry)
+        applied.append(entry)
+    return applied
+
+
+def status(bind=engine) -> list:
+    """
+    (version, description, applied) for every registered migration
+    """
+    with bind.connect() as connection:
+        applied = applied_versions(connection)
+    return [(entry.version, entry.description, entry.version in applied) for entry in MIGRATIONS]
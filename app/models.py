@@ -2,44 +2,264 @@
 SQLAlchemy database models
 """
 
-from sqlalchemy import Column, Integer, String, DateTime
-from sqlalchemy.sql import func
+import re
+from typing import Optional
+
+from sqlalchemy import Column, Integer, BigInteger, SmallInteger, Boolean, LargeBinary, String, DateTime, Index
+from sqlalchemy.sql import func, text
 from app.database import Base
+from app.storage import CAS_PREFIX, LegacyStorage
+
+
+# How a student's photo or signature is stored (photo_storage / signature_storage)
+FILE_NONE = 0
+FILE_LEGACY = 1    # uploads/{year}/{section}/{register_number}{suffix}, derived
+FILE_CONTENT = 2   # content-addressed, photo_digest / signature_digest
+
+PHOTO_SUFFIX = ".jpg"
+SIGNATURE_SUFFIX = "_signature.jpg"
+
+
+def parse_mac_address(value: str) -> int:
+    """
+    48-bit integer from a MAC address in any common notation
+    (AA:BB:CC:DD:EE:FF, aa-bb-cc-dd-ee-ff, aabb.ccdd.eeff, ...)
+    Raises ValueError unless it has exactly 12 hex digits
+    """
+    digits = re.sub(r"[\s:.\-]", "", value or "")
+    if not re.fullmatch(r"[0-9A-Fa-f]{12}", digits):
+        raise ValueError(f"Invalid MAC address '{value}'")
+    return int(digits, 16)
+
+
+def format_mac_address(value: Optional[int]) -> Optional[str]:
+    """
+    AA:BB:CC:DD:EE:FF notation of a stored MAC address
+    """
+    if value is None:
+        return None
+    digits = f"{value:012X}"
+    return ":".join(digits[i:i + 2] for i in range(0, 12, 2))
+
+
+def file_fields(field: str, key: Optional[str]) -> dict:
+    """
+    Column values storing a storage key, e.g. file_fields("photo", key) ->
+    {"photo_storage": ..., "photo_digest": ...} (for bulk inserts)
+
+    Legacy keys are not stored: they are derived from year, section and
+    register number, which is where LegacyStorage saves them.
+    """
+    if not key:
+        return {f"{field}_storage": FILE_NONE, f"{field}_digest": None}
+    if key.startswith(CAS_PREFIX):
+        return {f"{field}_storage": FILE_CONTENT, f"{field}_digest": bytes.fromhex(key[len(CAS_PREFIX):])}
+    return {f"{field}_storage": FILE_LEGACY, f"{field}_digest": None}
+
+
+def file_key(storage: int, digest: Optional[bytes], year: int, section: str, register_number: str,
+             suffix: str) -> Optional[str]:
+    """
+    Storage key of a photo or signature from its stored columns
+    """
+    if storage == FILE_CONTENT:
+        return f"{CAS_PREFIX}{digest.hex()}"
+    if storage == FILE_LEGACY:
+        return LegacyStorage().key(year, section, f"{register_number}{suffix}")
+    return None
 
 
 class Student(Base):
     """
     Student model for storing registration data
+
+    Stored compactly: a boolean iPad flag, the MAC address as a 48-bit
+    integer and only the digest of content-addressed files. The original
+    string attributes (has_ipad 'Yes'/'No', ipad_mac_address, photo_path,
+    signature_path) remain available through to_dict() and the properties
+    below.
     """
     __tablename__ = "students"
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
-    year = Column(Integer, nullable=False)
+    year = Column(SmallInteger, nullable=False)
     section = Column(String(1), nullable=False)
     register_number = Column(String(50), unique=True, nullable=False, index=True)
-    photo_path = Column(String(500), nullable=False)
-    has_ipad = Column(String(3), nullable=True, default='No')  # 'Yes' or 'No'
-    ipad_mac_address = Column(String(100), nullable=True)
-    signature_path = Column(String(500), nullable=True)
+    photo_storage = Column(SmallInteger, nullable=False, default=FILE_NONE)
+    photo_digest = Column(LargeBinary(32), nullable=True)
+    # 64-bit perceptual hash of the photo, stored signed (see app.perceptual_hash)
+    photo_dhash = Column(BigInteger, nullable=True)
+    has_ipad = Column(Boolean, nullable=False, default=False)
+    ipad_mac = Column(BigInteger, nullable=True)
+    signature_storage = Column(SmallInteger, nullable=False, default=FILE_NONE)
+    signature_digest = Column(LargeBinary(32), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    __table_args__ = (
+        # Year and year+section reports, newest first
+        Index("ix_students_year_section_created_at", "year", "section", "created_at"),
+        # All-students listings newest first and date windows
+        Index("ix_students_created_at", "created_at"),
+        # Search by iPad MAC address
+        Index("ix_students_ipad_mac", "ipad_mac"),
+        # Search by name prefix, in result order
+        Index("ix_students_name_lower", func.lower(text("name")), "register_number"),
+    )
+
     def __repr__(self):
         return f"<Student {self.register_number} - {self.name}>"
 
+    @property
+    def photo_path(self) -> Optional[str]:
+        return file_key(self.photo_storage, self.photo_digest, self.year, self.section,
+                        self.register_number, PHOTO_SUFFIX)
+
+    @photo_path.setter
+    def photo_path(self, key: Optional[str]) -> None:
+        for column, value in file_fields("photo", key).items():
+            setattr(self, column, value)
+
+    @property
+    def signature_path(self) -> Optional[str]:
+        return file_key(self.signature_storage, self.signature_digest, self.year, self.section,
+                        self.register_number, SIGNATURE_SUFFIX)
+
+    @signature_path.setter
+    def signature_path(self, key: Optional[str]) -> None:
+        for column, value in file_fields("signature", key).items():
+            setattr(self, column, value)
+
+    @property
+    def ipad_mac_address(self) -> Optional[str]:
+        return format_mac_address(self.ipad_mac)
+
+    @ipad_mac_address.setter
+    def ipad_mac_address(self, value: Optional[str]) -> None:
+        self.ipad_mac = parse_mac_address(value) if value else None
+
     def to_dict(self):
         """
         Convert model to dictionary
         """
-        return {
-            "id": self.id,
-            "name": self.name,
-            "year": self.year,
-            "section": self.section,
-            "register_number": self.register_number,
-            "photo_path": self.photo_path,
-            "has_ipad": self.has_ipad,
-            "ipad_mac_address": self.ipad_mac_address,
-            "signature_path": self.signature_path,
-            "created_at": self.created_at.isoformat() if self.created_at else None
-        }
+        return row_to_dict(tuple(getattr(self, column) for column in STUDENT_COLUMNS))
+
+
+# Field order of to_dict() and the reports (the public shape of a student)
+STUDENT_FIELDS = (
+    "id",
+    "name",
+    "year",
+    "section",
+    "register_number",
+    "photo_path",
+    "has_ipad",
+    "ipad_mac_address",
+    "signature_path",
+    "created_at",
+)
+
+# Columns selected by row-tuple queries, converted to STUDENT_FIELDS by row_to_record()
+STUDENT_COLUMNS = (
+    "id",
+    "name",
+    "year",
+    "section",
+    "register_number",
+    "photo_storage",
+    "photo_digest",
+    "has_ipad",
+    "ipad_mac",
+    "signature_storage",
+    "signature_digest",
+    "created_at",
+)
+
+
+def student_columns() -> list:
+    """
+    Columns to select for row-tuple queries, in STUDENT_COLUMNS order
+    e.g. db.query(*student_columns()).filter(...)
+    """
+    return [getattr(Student, column) for column in STUDENT_COLUMNS]
+
+
+def row_to_record(row) -> dict:
+    """
+    STUDENT_FIELDS dict from a selected row tuple, created_at kept a datetime
+    """
+    (student_id, name, year, section, register_number, photo_storage, photo_digest,
+     has_ipad, ipad_mac, signature_storage, signature_digest, created_at) = row
+    return {
+        "id": student_id,
+        "name": name,
+        "year": year,
+        "section": section,
+        "register_number": register_number,
+        "photo_path": file_key(photo_storage, photo_digest, year, section, register_number, PHOTO_SUFFIX),
+        "has_ipad": "Yes" if has_ipad else "No",
+        "ipad_mac_address": format_mac_address(ipad_mac),
+        "signature_path": file_key(signature_storage, signature_digest, year, section, register_number,
+                                   SIGNATURE_SUFFIX),
+        "created_at": created_at,
+    }
+
+
+def row_to_dict(row) -> dict:
+    """
+    Build the to_dict() representation straight from a selected row tuple
+    """
+    data = row_to_record(row)
+    created_at = data["created_at"]
+    data["created_at"] = created_at.isoformat() if created_at else None
+    return data
+
+
+def rows_to_dicts(rows) -> list:
+    """
+    Serialize many selected rows without building ORM objects
+    """
+    return [row_to_dict(row) for row in rows]
+
+
+def rows_to_records(rows) -> list:
+    """
+    Like rows_to_dicts() but keeps created_at a datetime, for report
+    generation that formats dates itself
+    """
+    return [row_to_record(row) for row in rows]
+
+
+class StoredObject(Base):
+    """
+    Content-addressed uploads on disk (see app.storage); which are still
+    referenced is decided by upload reconciliation, not counted here
+    """
+    __tablename__ = "stored_objects"
+
+    digest = Column(String(64), primary_key=True)
+    size = Column(BigInteger, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<StoredObject {self.digest} size={self.size}>"
+
+
+class StudentChange(Base):
+    """
+    Change feed outbox: one row per student insert or update, written in the
+    same transaction (see app.changes)
+    """
+    __tablename__ = "student_changes"
+
+    seq = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    student_id = Column(Integer, nullable=False, index=True)
+    register_number = Column(String(50), nullable=False)
+    operation = Column(String(10), nullable=False)  # 'created' or 'updated'
+    changed_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # SQLite: never reuse a sequence number, even after the newest row is deleted
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    def __repr__(self):
+        return f"<StudentChange {self.seq} {self.operation} {self.register_number}>"
@@ -0,0 +1,213 @@
+"""
+Year partitioning of the students table
+
+Reports and listings filter on ``year`` first, so on PostgreSQL the students
+table is partitioned by LIST (year): one partition per year (``students_y1``,
+``students_y2``, ...) plus ``students_default`` for any other value. A year
+or year/section query only reads that year's partition and its indexes,
+however many cohorts the table holds.
+
+When a cohort graduates, ``archive_year()`` detaches its partition and
+renames it ``students_archive_<label>_y<year>``: a catalog change instead of
+a long DELETE, and the rows stay queryable in the archive table. An empty
+partition takes its place for the next intake.
+
+PostgreSQL requires the partition key in every unique constraint, so the
+primary key is (id, year) and register numbers are unique per year. The year
+fixes the register number prefix, which keeps them unique overall, and the
+ORM still identifies students by id alone.
+
+SQLite has no partitioning: students stays a plain table (the year/section
+index narrows those queries instead) and archive_year() copies the year's
+rows into the archive table, then deletes them.
+
+Run ``python archive_cohort.py`` to list partitions and archives or to
+archive a year.
+"""
+
+import re
+from typing import Iterable
+
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Column,
+    DateTime,
+    Integer,
+    LargeBinary,
+    MetaData,
+    PrimaryKeyConstraint,
+    SmallInteger,
+    String,
+    Table,
+    UniqueConstraint,
+    func,
+    inspect,
+    text,
+)
+
+from app.models import Student
+from app.utils import YEAR_SECTIONS
+
+STUDENTS_TABLE = Student.__tablename__
+DEFAULT_PARTITION = f"{STUDENTS_TABLE}_default"
+ARCHIVE_PREFIX = f"{STUDENTS_TABLE}_archive_"
+ARCHIVE_LABEL_PATTERN = re.compile(r"^[a-z0-9_]{1,30}$")
+
+# Model indexes created on the partitioned table (each partition gets its own copy)
+PARTITIONED_INDEXES = (
+    "ix_students_year_section_created_at",
+    "ix_students_created_at",
+    "ix_students_ipad_mac",
+    "ix_students_name_lower",
+)
+
+# DETACH waits for running queries on students; fail instead of queueing registrations behind it
+ARCHIVE_LOCK_TIMEOUT = "5s"
+
+
+def partition_name(year: int) -> str:
+    return f"{STUDENTS_TABLE}_y{int(year)}"
+
+
+def archive_name(year: int, label: str) -> str:
+    if not ARCHIVE_LABEL_PATTERN.match(label or ""):
+        raise ValueError("Archive label must be 1-30 lowercase letters, digits or underscores")
+    return f"{ARCHIVE_PREFIX}{label}_y{int(year)}"
+
+
+def partitioned_students_table(name: str = STUDENTS_TABLE) -> Table:
+    """
+    The students table as created on PostgreSQL, without partitions and indexes
+    """
+    return Table(
+        name,
+        MetaData(),
+        Column("id", Integer, autoincrement=True, nullable=False),
+        Column("name", String(255), nullable=False),
+        Column("year", SmallInteger, nullable=False),
+        Column("section", String(1), nullable=False),
+        Column("register_number", String(50), nullable=False),
+        Column("photo_storage", SmallInteger, nullable=False),
+        Column("photo_digest", LargeBinary(32)),
+        Column("photo_dhash", BigInteger),
+        Column("has_ipad", Boolean, nullable=False),
+        Column("ipad_mac", BigInteger),
+        Column("signature_storage", SmallInteger, nullable=False),
+        Column("signature_digest", LargeBinary(32)),
+        Column("created_at", DateTime(timezone=True), server_default=func.now()),
+        PrimaryKeyConstraint("id", "year", name=f"{name}_pkey"),
+        UniqueConstraint("register_number", "year", name=f"{name}_register_number_year_key"),
+        postgresql_partition_by="LIST (year)",
+    )
+
+
+def is_partitioned(connection) -> bool:
+    """
+    True if the students table is a partitioned table (PostgreSQL only)
+    """
+    if connection.dialect.name != "postgresql":
+        return False
+    return bool(connection.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = :table AND pg_table_is_visible(c.oid))"
+    ), {"table": STUDENTS_TABLE}).scalar())
+
+
+def ensure_year_partition(connection, year: int, parent: str = STUDENTS_TABLE) -> bool:
+    """
+    Create the partition for `year` if it is missing; rows of that year
+    already in the default partition are moved into it. Returns True if created.
+    """
+    name = partition_name(year)
+    tables = set(inspect(connection).get_table_names())
+    if name in tables:
+        return False
+
+    stranded = 0
+    if DEFAULT_PARTITION in tables:
+        stranded = connection.execute(
+            text(f"SELECT COUNT(*) FROM {DEFAULT_PARTITION} WHERE year = :year"), {"year": int(year)}
+        ).scalar()
+
+    if not stranded:
+        connection.execute(text(f"CREATE TABLE {name} PARTITION OF {parent} FOR VALUES IN ({int(year)})"))
+        return True
+
+    # A new bound may not match rows in the default partition: move them first
+    connection.execute(text(f"CREATE TABLE {name} (LIKE {parent} INCLUDING DEFAULTS)"))
+    connection.execute(text(f"INSERT INTO {name} SELECT * FROM {DEFAULT_PARTITION} WHERE year = :year"),
+                       {"year": int(year)})
+    connection.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE year = :year"), {"year": int(year)})
+    connection.execute(text(f"ALTER TABLE {parent} ATTACH PARTITION {name} FOR VALUES IN ({int(year)})"))
+    return True
+
+
+def create_partitioned_students(connection, name: str = STUDENTS_TABLE, years: Iterable[int] = ()) -> None:
+    """
+    Create the partitioned students table with a partition for every year in
+    YEAR_SECTIONS and `years`, plus the default partition
+    """
+    partitioned_students_table(name).create(connection)
+    connection.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {name} DEFAULT"))
+    for year in sorted(set(YEAR_SECTIONS) | set(years)):
+        ensure_year_partition(connection, year, name)
+
+
+def create_partitioned_indexes(connection) -> None:
+    for index in Student.__table__.indexes:
+        if index.name in PARTITIONED_INDEXES:
+            index.create(connection, checkfirst=True)
+
+
+def _count(connection, table: str) -> int:
+    return connection.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+
+
+def list_partitions(connection) -> list:
+    """
+    [{name, bound, rows}] for the partitions of students (empty on SQLite)
+    """
+    if not is_partitioned(connection):
+        return []
+    rows = connection.execute(text(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :table AND pg_table_is_visible(p.oid) ORDER BY c.relname"
+    ), {"table": STUDENTS_TABLE}).all()
+    return [{"name": name, "bound": bound, "rows": _count(connection, name)} for name, bound in rows]
+
+
+def list_archives(connection) -> list:
+    """
+    [{name, rows}] for the archived cohort tables
+    """
+    names = sorted(name for name in inspect(connection).get_table_names() if name.startswith(ARCHIVE_PREFIX))
+    return [{"name": name, "rows": _count(connection, name)} for name in names]
+
+
+def archive_year(connection, year: int, label: str) -> dict:
+    """
+    Move every student of `year` into students_archive_<label>_y<year>
+
+    On PostgreSQL the year's partition is detached and renamed, and an empty
+    one created in its place. Run inside a transaction (engine.begin()).
+    """
+    archive = archive_name(year, label)
+    tables = set(inspect(connection).get_table_names())
+    if archive in tables:
+        raise ValueError(f"{archive} already exists; choose another label")
+
+    if is_partitioned(connection):
+        partition = partition_name(year)
+        if partition not in tables:
+            raise ValueError(f"Year {year} has no partition (its rows are in {DEFAULT_PARTITION})")
+        connection.execute(text(f"SET LOCAL lock_timeout = '{ARCHIVE_LOCK_TIMEOUT}'"))
+        connection.execute(text(f"ALTER TABLE {STUDENTS_TABLE} DETACH PARTITION {partition}"))
+        connection.execute(text(f"ALTER TABLE {partition} RENAME TO {archive}"))
+        ensure_year_partition(connection, year)
+    else:
+        connection.execute(text(f"CREATE TABLE {archive} AS SELECT * FROM {STUDENTS_TABLE} WHERE year = {int(year)}"))
+        connection.execute(text(f"DELETE FROM {STUDENTS_TABLE} WHERE year = :year"), {"year": int(year)})
+
+    return {"year": int(year), "archive": archive, "rows": _count(connection, archive)}
@@ -0,0 +1,223 @@
+"""
+On-demand request profiling
+
+An admin can profile a single request by adding ``profile=1`` to the query
+string (or an ``X-Profile: 1`` header) together with the admin password
+(``password=`` query parameter or ``X-Admin-Password`` header). The request
+is wrapped in a sampling profiler that walks every thread's stack, so both
+async handlers on the event loop and sync code (report generation, threadpool
+work) show up. Output is written in collapsed-stack format, ready for
+flamegraph.pl or speedscope, to PROFILES_FOLDER.
+
+Captures are rate limited and only one runs at a time per worker. When no
+profile is requested the middleware only scans the query string and headers.
+"""
+
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter as StackCounter
+from datetime import datetime
+from urllib.parse import parse_qs
+
+from dotenv import load_dotenv
+
+from app.auth import is_admin
+
+# Load environment variables
+load_dotenv()
+
+PROFILES_FOLDER = os.getenv("PROFILES_FOLDER", "profiles")
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5")) / 1000
+PROFILE_MAX_PER_MINUTE = int(os.getenv("PROFILE_MAX_PER_MINUTE", "6"))
+PROFILE_EXTENSION = ".collapsed"
+
+# Profile names are generated by us; anything else is rejected on download
+PROFILE_NAME_PATTERN = re.compile(r"^[\w.\-]+\.collapsed$")
+
+
+def _frame_label(code) -> str:
+    """
+    Stable frame name: function plus defining file and line
+    """
+    filename = "/".join(code.co_filename.replace("\\", "/").split("/")[-2:])
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    Background thread sampling the stacks of all other threads
+    """
+
+    def __init__(self, interval: float = PROFILE_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = StackCounter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own_ident = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                frames = []
+                while frame is not None:
+                    frames.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                frames.append(names.get(ident, f"thread-{ident}"))
+                self.stacks[";".join(reversed(frames))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """
+        Collapsed-stack text: "root;caller;callee count" per line
+        """
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class _RateLimiter:
+    """
+    At most `per_minute` captures in any sliding minute, one at a time
+    """
+
+    def __init__(self, per_minute: int):
+        self.per_minute = per_minute
+        self._started = []
+        self._lock = threading.Lock()
+        self._active = False
+
+    def acquire(self) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            self._started = [t for t in self._started if now - t < 60]
+            if self._active or len(self._started) >= self.per_minute:
+                return False
+            self._started.append(now)
+            self._active = True
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            self._active = False
+
+
+_limiter = _RateLimiter(PROFILE_MAX_PER_MINUTE)
+
+
+def _profile_requested(scope):
+    """
+    Return the supplied admin password if the request asks to be profiled
+    None means "not requested"; an empty string means requested without password
+    """
+    query_string = scope.get("query_string", b"")
+    header_flag = password = None
+    for name, value in scope.get("headers", ()):
+        if name == b"x-profile":
+            header_flag = value
+        elif name == b"x-admin-password":
+            password = value.decode("latin-1")
+
+    params = None
+    if header_flag is None:
+        # Cheap substring test first so unprofiled requests never parse the query
+        if b"profile=" not in query_string:
+            return None
+        params = parse_qs(query_string.decode("latin-1"))
+        if params.get("profile", ["0"])[0] in ("", "0"):
+            return None
+    elif header_flag in (b"", b"0"):
+        return None
+
+    if password is None:
+        params = params if params is not None else parse_qs(query_string.decode("latin-1"))
+        password = params.get("password", [""])[0]
+    return password
+
+
+def _profile_filename(scope) -> str:
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    path = re.sub(r"[^\w\-]+", "_", scope.get("path", "").strip("/")) or "root"
+    return f"{timestamp}_{scope.get('method', 'GET')}_{path[:80]}{PROFILE_EXTENSION}"
+
+
+def list_profiles() -> list:
+    """
+    Captured profiles, newest first
+    """
+    if not os.path.isdir(PROFILES_FOLDER):
+        return []
+    profiles = []
+    with os.scandir(PROFILES_FOLDER) as entries:
+        for entry in entries:
+            if entry.is_file() and PROFILE_NAME_PATTERN.match(entry.name):
+                stat = entry.stat()
+                profiles.append({
+                    "name": entry.name,
+                    "size": stat.st_size,
+                    "created_at": datetime.fromtimestamp(stat.st_mtime).isoformat(),
+                })
+    profiles.sort(key=lambda p: p["name"], reverse=True)
+    return profiles
+
+
+def profile_path(name: str):
+    """
+    Filesystem path of a captured profile, or None for unknown/unsafe names
+    """
+    if not PROFILE_NAME_PATTERN.match(name):
+        return None
+    path = os.path.join(PROFILES_FOLDER, name)
+    return path if os.path.isfile(path) else None
+
+
+class ProfilingMiddleware:
+    """
+    Wrap admin-requested requests in a StackSampler
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        password = _profile_requested(scope)
+        if password is None or not is_admin(password) or not _limiter.acquire():
+            await self.app(scope, receive, send)
+            return
+
+        filename = _profile_filename(scope)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", filename.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        sampler = StackSampler()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop()
+            try:
+                os.makedirs(PROFILES_FOLDER, exist_ok=True)
+                with open(os.path.join(PROFILES_FOLDER, filename), "w", encoding="utf-8") as f:
+                    f.write(sampler.collapsed())
+            finally:
+                _limiter.release()
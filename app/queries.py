@@ -0,0 +1,116 @@
+"""
+Student queries shared by the routes and the query-plan check
+
+Listing queries return row tuples in STUDENT_COLUMNS order (see app.models);
+statistics are aggregated in SQL instead of loading every student.
+
+Date ranges are half-open [start, end) in UTC. ``parse_date_bound`` turns
+the ``from``/``to`` request parameters into those bounds: a plain date
+covers the whole day in the server's local timezone (so ``to=2024-06-30``
+includes the 30th), and datetimes without an offset are local time as well.
+"""
+
+from datetime import date, datetime, time, timedelta, timezone
+from typing import NamedTuple, Optional
+
+from sqlalchemy import func, literal_column
+
+from app.models import Student, student_columns
+
+
+class DateRange(NamedTuple):
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+
+
+def _to_utc(value: datetime) -> datetime:
+    # astimezone() on a naive datetime treats it as local time
+    return value.astimezone(timezone.utc)
+
+
+def parse_date_bound(value: str, end: bool = False) -> datetime:
+    """
+    Parse a from/to parameter (YYYY-MM-DD or ISO 8601 datetime) into a UTC bound
+    A date as the end bound means "through the end of that day"
+    Raises ValueError for anything else
+    """
+    value = value.strip()
+    if len(value) == 10:
+        day = date.fromisoformat(value)
+        if end:
+            day += timedelta(days=1)
+        return _to_utc(datetime.combine(day, time.min))
+    return _to_utc(datetime.fromisoformat(value.replace("Z", "+00:00")))
+
+
+def in_range(query, date_range: Optional[DateRange]):
+    """
+    Restrict a Student query to a date range
+    """
+    if date_range is None:
+        return query
+    if date_range.start is not None:
+        query = query.filter(Student.created_at >= date_range.start)
+    if date_range.end is not None:
+        query = query.filter(Student.created_at < date_range.end)
+    return query
+
+
+def student_rows(db, year: int = None, section: str = None, date_range: DateRange = None):
+    """
+    Students newest first, optionally for one year or year/section and a date range
+    Uses ix_students_created_at, or ix_students_year_section_created_at when filtered
+    """
+    query = db.query(*student_columns())
+    if year is not None:
+        query = query.filter(Student.year == year)
+    if section is not None:
+        query = query.filter(Student.section == section)
+    order = Student.created_at
+    if year is not None and section is None and db.get_bind().dialect.name == "sqlite":
+        # SQLite would rather walk ix_students_created_at through every year than sort
+        # one year's rows; unary + keeps ORDER BY off that index so year=? is searched
+        order = literal_column(f"+{Student.__tablename__}.created_at")
+    return in_range(query, date_range).order_by(order.desc())
+
+
+def year_count_query(db):
+    return db.query(Student.year, func.count()).group_by(Student.year)
+
+
+def section_count_query(db):
+    return db.query(Student.section, func.count()).group_by(Student.section).order_by(Student.section)
+
+
+def registered_since_query(db, since: datetime):
+    return in_range(db.query(func.count()).select_from(Student), DateRange(start=since))
+
+
+def weekly_cutoff() -> datetime:
+    """
+    Start of the 7-day window used by the dashboard and weekly report
+    """
+    return datetime.now(timezone.utc) - timedelta(days=7)
+
+
+def weekly_range() -> DateRange:
+    return DateRange(start=weekly_cutoff())
+
+
+def student_statistics(db) -> dict:
+    """
+    Totals for the admin dashboard and /api/stats
+    """
+    year_wise = {1: 0, 2: 0, 3: 0}
+    total_students = 0
+    for year, count in year_count_query(db):
+        total_students += count
+        if year in year_wise:
+            year_wise[year] = count
+
+    return {
+        "total_students": total_students,
+        "year_wise": year_wise,
+        "section_wise": {section: count for section, count in section_count_query(db) if section},
+        "weekly_count": registered_since_query(db, weekly_cutoff()).scalar(),
+    }
@@ -0,0 +1,470 @@
+"""
+Reconcile uploaded files with the database
+
+Images are written to UPLOAD_FOLDER before the student row commits, so a
+registration that fails afterwards (a duplicate register number race, a
+database error) leaves its files behind, and resetting the database leaves
+every image. The files cannot be removed on the spot: a content-addressed
+object may be shared with other students, and a legacy path belongs to the
+student who won the race. This module finds them afterwards:
+
+- orphans: files no student (or archived cohort) references, older than
+  ``min_age`` so registrations in flight are left alone; reported, or moved
+  to UPLOAD_QUARANTINE_FOLDER (outside the public /uploads mount)
+- dangling references: students whose photo or signature file is missing
+
+Memory stays bounded however many files there are:
+
+- content-addressed objects (uploads/objects/ab/cd/<sha256>.jpg) are walked
+  with os.scandir in digest order, one small shard directory at a time, and
+  merge-joined with the referenced digests streamed from the database in
+  the same order
+- legacy files (uploads/{year}/{section}/...) are compared one section
+  directory at a time with that section's expected file names
+
+Run ``python reconcile_uploads.py`` (add ``--quarantine`` to move orphans).
+The app also runs a report every UPLOAD_RECONCILE_INTERVAL seconds.
+"""
+
+import asyncio
+import json
+import os
+import re
+import shutil
+import time
+from datetime import datetime, timezone
+
+from dotenv import load_dotenv
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import column, delete, inspect, or_, select, table, union
+
+from app.database import engine
+from app.metrics import Counter, Gauge
+from app.models import FILE_CONTENT, FILE_LEGACY, PHOTO_SUFFIX, SIGNATURE_SUFFIX, StoredObject
+from app.partitions import ARCHIVE_PREFIX, STUDENTS_TABLE
+from app.resumable import STAGING_ROOT
+from app.storage import CAS_DIRECTORY, CAS_EXTENSION, CAS_PREFIX, UPLOAD_ROOT
+
+# Load environment variables
+load_dotenv()
+
+QUARANTINE_ROOT = os.getenv("UPLOAD_QUARANTINE_FOLDER", "quarantine")
+RECONCILE_INTERVAL_SECONDS = float(os.getenv("UPLOAD_RECONCILE_INTERVAL", str(24 * 60 * 60)))
+RECONCILE_ACTION = os.getenv("UPLOAD_RECONCILE_ACTION", "report")
+RECONCILE_MIN_AGE_SECONDS = float(os.getenv("UPLOAD_RECONCILE_MIN_AGE", "3600"))
+
+ACTIONS = ("report", "quarantine")
+
+# Rows fetched per round trip while streaming references, and dangling
+# digests or quarantined objects handled per query
+BATCH_SIZE = 1000
+
+# Entries kept in the summary; the log file lists everything
+SAMPLE_SIZE = 20
+
+CAS_NAME_PATTERN = re.compile(r"^([0-9a-f]{64})" + re.escape(CAS_EXTENSION) + "$")
+SHARD_PATTERN = re.compile(r"^[0-9a-f]{2}$")
+
+UPLOAD_ORPHANS = Gauge(
+    "upload_orphan_files",
+    "Unreferenced upload files found by the last reconciliation",
+)
+UPLOAD_DANGLING = Gauge(
+    "upload_dangling_references",
+    "Student photo/signature references without a file in the last reconciliation",
+)
+UPLOAD_QUARANTINED = Counter(
+    "upload_quarantined_files_total",
+    "Orphaned upload files moved to quarantine",
+)
+
+
+class Reconciliation:
+    """
+    Counts, samples and the optional JSON-lines log of one run
+    """
+
+    def __init__(self, action: str, min_age: float, log=None, now: float = None):
+        if action not in ACTIONS:
+            raise ValueError(f"Unknown action '{action}'. Valid options: {', '.join(ACTIONS)}")
+        self.action = action
+        self.min_age = min_age
+        self.log = log
+        self.now = now or time.time()
+        self.quarantine_dir = os.path.join(
+            QUARANTINE_ROOT, datetime.fromtimestamp(self.now, timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        )
+        self.counts = {
+            "files_scanned": 0,
+            "referenced": 0,
+            "orphans": 0,
+            "orphan_bytes": 0,
+            "quarantined": 0,
+            "too_recent": 0,
+            "dangling": 0,
+        }
+        self.samples = {"orphans": [], "dangling": []}
+        # Digests of quarantined objects whose stored_objects rows are dropped
+        self.released_digests = []
+
+    def _write(self, entry: dict, sample: str) -> None:
+        if len(self.samples[sample]) < SAMPLE_SIZE:
+            self.samples[sample].append(entry)
+        if self.log is not None:
+            self.log.write(json.dumps(entry) + "\n")
+
+    def file(self, entry: os.DirEntry, referenced: bool, digest: str = None) -> None:
+        """
+        Account for one file found on disk
+        """
+        self.counts["files_scanned"] += 1
+        if referenced:
+            self.counts["referenced"] += 1
+            return
+
+        try:
+            stat = entry.stat(follow_symlinks=False)
+        except FileNotFoundError:
+            return
+        if self.now - stat.st_mtime < self.min_age:
+            self.counts["too_recent"] += 1
+            return
+
+        self.counts["orphans"] += 1
+        self.counts["orphan_bytes"] += stat.st_size
+        moved = self.action == "quarantine" and self._quarantine(entry.path)
+        if moved:
+            self.counts["quarantined"] += 1
+            if digest:
+                self.released_digests.append(digest)
+                if len(self.released_digests) >= BATCH_SIZE:
+                    self.release_digests()
+        self._write({
+            "type": "orphan",
+            "path": entry.path,
+            "bytes": stat.st_size,
+            "modified": datetime.fromtimestamp(stat.st_mtime, timezone.utc).isoformat(),
+            "quarantined": bool(moved),
+        }, "orphans")
+
+    def _quarantine(self, path: str) -> bool:
+        """
+        Move a file under the quarantine directory, keeping its relative path
+        """
+        try:
+            # A registration may have reused the file since it was scanned
+            if self.now - os.stat(path).st_mtime < self.min_age:
+                return False
+            target = os.path.join(self.quarantine_dir, os.path.relpath(path, UPLOAD_ROOT))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.move(path, target)
+        except FileNotFoundError:
+            return False
+        UPLOAD_QUARANTINED.inc()
+        return True
+
+    def release_digests(self) -> None:
+        """
+        Drop the stale stored_objects rows of quarantined objects, in a
+        short transaction of its own (the scan keeps reading meanwhile)
+        """
+        if self.released_digests:
+            with engine.begin() as connection:
+                connection.execute(delete(StoredObject).where(StoredObject.digest.in_(self.released_digests)))
+            self.released_digests = []
+
+    def dangling(self, register_number: str, field: str, key: str) -> None:
+        self.counts["dangling"] += 1
+        self._write({"type": "dangling", "register_number": register_number, "field": field, "key": key}, "dangling")
+
+    def summary(self) -> dict:
+        return {
+            "action": self.action,
+            "upload_root": UPLOAD_ROOT,
+            "quarantine_dir": self.quarantine_dir if self.counts["quarantined"] else None,
+            "min_age_seconds": self.min_age,
+            **self.counts,
+            "samples": self.samples,
+        }
+
+
+# ---------------------------------------------------------------------------
+# Database side
+# ---------------------------------------------------------------------------
+
+def _student_tables(connection) -> list:
+    """
+    Lightweight table() constructs for students and every archived cohort
+    """
+    names = [STUDENTS_TABLE] + sorted(
+        name for name in inspect(connection).get_table_names() if name.startswith(ARCHIVE_PREFIX)
+    )
+    return [
+        table(
+            name,
+            column("year"),
+            column("section"),
+            column("register_number"),
+            column("photo_storage"),
+            column("photo_digest"),
+            column("signature_storage"),
+            column("signature_digest"),
+        )
+        for name in names
+    ]
+
+
+def _referenced_digests(connection, tables: list):
+    """
+    Hex digests of every referenced content-addressed file, ascending, streamed
+    """
+    selects = []
+    for students in tables:
+        for field in ("photo", "signature"):
+            digest = students.c[f"{field}_digest"]
+            selects.append(
+                select(digest.label("digest")).where(students.c[f"{field}_storage"] == FILE_CONTENT)
+            )
+    referenced = union(*selects).subquery()
+    result = connection.execution_options(yield_per=BATCH_SIZE).execute(
+        select(referenced.c.digest).order_by(referenced.c.digest)
+    )
+    for (digest,) in result:
+        yield bytes(digest).hex()
+
+
+def _report_dangling_digests(connection, tables: list, digests: list, run: Reconciliation) -> None:
+    """
+    Report the students pointing at missing content-addressed files
+    """
+    wanted = [bytes.fromhex(digest) for digest in digests]
+    for students in tables:
+        rows = connection.execute(select(
+            students.c.register_number,
+            students.c.photo_storage,
+            students.c.photo_digest,
+            students.c.signature_storage,
+            students.c.signature_digest,
+        ).where(or_(
+            (students.c.photo_storage == FILE_CONTENT) & students.c.photo_digest.in_(wanted),
+            (students.c.signature_storage == FILE_CONTENT) & students.c.signature_digest.in_(wanted),
+        )))
+        for register_number, photo_storage, photo_digest, signature_storage, signature_digest in rows:
+            for field, storage, digest in (("photo", photo_storage, photo_digest),
+                                           ("signature", signature_storage, signature_digest)):
+                if storage == FILE_CONTENT and bytes(digest) in wanted:
+                    run.dangling(register_number, field, f"{CAS_PREFIX}{bytes(digest).hex()}")
+
+
+def _legacy_sections(connection, tables: list) -> set:
+    """
+    (year, section) pairs with at least one legacy file reference
+    """
+    pairs = set()
+    for students in tables:
+        pairs.update(connection.execute(select(students.c.year, students.c.section).where(or_(
+            students.c.photo_storage == FILE_LEGACY,
+            students.c.signature_storage == FILE_LEGACY,
+        )).distinct()).all())
+    return {(int(year), section.upper()) for year, section in pairs}
+
+
+def _expected_legacy_files(connection, tables: list, year: int, section: str) -> dict:
+    """
+    {file name: (register_number, field)} expected in one section directory
+    """
+    expected = {}
+    for students in tables:
+        rows = connection.execute(select(
+            students.c.register_number, students.c.photo_storage, students.c.signature_storage,
+        ).where(
+            students.c.year == year,
+            students.c.section == section,
+        ))
+        for register_number, photo_storage, signature_storage in rows:
+            if photo_storage == FILE_LEGACY:
+                expected[f"{register_number}{PHOTO_SUFFIX}"] = (register_number, "photo")
+            if signature_storage == FILE_LEGACY:
+                expected[f"{register_number}{SIGNATURE_SUFFIX}"] = (register_number, "signature")
+    return expected
+
+
+# ---------------------------------------------------------------------------
+# Filesystem side
+# ---------------------------------------------------------------------------
+
+def _sorted_entries(directory: str) -> list:
+    try:
+        with os.scandir(directory) as entries:
+            return sorted(entries, key=lambda entry: entry.name)
+    except FileNotFoundError:
+        return []
+
+
+def _walk_stray(directory: str):
+    """
+    Every file below a directory that does not belong to the layout
+    """
+    stack = [directory]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                else:
+                    yield entry
+
+
+def _report_stray(entry: os.DirEntry, run: Reconciliation) -> None:
+    """
+    A file, or every file in a directory, found where the layout has none
+    """
+    strays = _walk_stray(entry.path) if entry.is_dir(follow_symlinks=False) else [entry]
+    for stray in strays:
+        run.file(stray, referenced=False)
+
+
+def _cas_files(run: Reconciliation):
+    """
+    (digest, entry) for content-addressed objects in ascending digest order
+
+    Files that do not fit the layout (temp files, wrong shard, other names)
+    are reported as orphans here instead of being yielded.
+    """
+    objects_dir = os.path.join(UPLOAD_ROOT, CAS_DIRECTORY)
+    for first in _sorted_entries(objects_dir):
+        if not (first.is_dir(follow_symlinks=False) and SHARD_PATTERN.match(first.name)):
+            _report_stray(first, run)
+            continue
+        for second in _sorted_entries(first.path):
+            if not (second.is_dir(follow_symlinks=False) and SHARD_PATTERN.match(second.name)):
+                _report_stray(second, run)
+                continue
+            prefix = first.name + second.name
+            for entry in _sorted_entries(second.path):
+                match = CAS_NAME_PATTERN.match(entry.name)
+                if match and match.group(1).startswith(prefix) and entry.is_file(follow_symlinks=False):
+                    yield match.group(1), entry
+                else:
+                    _report_stray(entry, run)
+
+
+def _reconcile_content(connection, tables: list, run: Reconciliation) -> None:
+    """
+    Merge-join the sorted object files with the sorted referenced digests
+    """
+    files = _cas_files(run)
+    referenced = _referenced_digests(connection, tables)
+    current_file = next(files, None)
+    current_digest = next(referenced, None)
+    missing = []
+
+    while current_file is not None or current_digest is not None:
+        if current_file is None or (current_digest is not None and current_digest < current_file[0]):
+            missing.append(current_digest)
+            current_digest = next(referenced, None)
+        elif current_digest is None or current_file[0] < current_digest:
+            run.file(current_file[1], referenced=False, digest=current_file[0])
+            current_file = next(files, None)
+        else:
+            run.file(current_file[1], referenced=True)
+            current_file = next(files, None)
+            current_digest = next(referenced, None)
+
+        if len(missing) >= BATCH_SIZE:
+            _report_dangling_digests(connection, tables, missing, run)
+            missing = []
+    if missing:
+        _report_dangling_digests(connection, tables, missing, run)
+
+
+def _reconcile_legacy(connection, tables: list, run: Reconciliation) -> None:
+    """
+    Compare uploads/{year}/{section}/ directories with the legacy references
+    """
+    skip = {CAS_DIRECTORY}
+    for other in (STAGING_ROOT, QUARANTINE_ROOT):
+        if os.path.dirname(os.path.abspath(other)) == os.path.abspath(UPLOAD_ROOT):
+            skip.add(os.path.basename(os.path.abspath(other)))
+
+    # Section directories on disk; top-level files and non-year directories are not ours
+    sections = {}
+    for year_entry in _sorted_entries(UPLOAD_ROOT):
+        if year_entry.name in skip or not year_entry.is_dir(follow_symlinks=False) or not year_entry.name.isdigit():
+            continue
+        for section_entry in _sorted_entries(year_entry.path):
+            if section_entry.is_dir(follow_symlinks=False):
+                sections[(int(year_entry.name), section_entry.name)] = section_entry.path
+            else:
+                _report_stray(section_entry, run)
+
+    for year, section in sorted(set(sections) | _legacy_sections(connection, tables)):
+        expected = _expected_legacy_files(connection, tables, year, section)
+        path = sections.get((year, section))
+        for entry in _sorted_entries(path) if path else []:
+            if entry.is_dir(follow_symlinks=False):
+                _report_stray(entry, run)
+                continue
+            run.file(entry, referenced=expected.pop(entry.name, None) is not None)
+        for name, (register_number, field) in expected.items():
+            run.dangling(register_number, field, os.path.join(UPLOAD_ROOT, str(year), section, name))
+
+
+def reconcile_uploads(action: str = "report", min_age: float = RECONCILE_MIN_AGE_SECONDS, log=None,
+                      now: float = None) -> dict:
+    """
+    Find (and with action="quarantine", move away) orphaned upload files and
+    report dangling references; returns the summary. `log` is an open text
+    file receiving one JSON line per orphan or dangling reference.
+    """
+    run = Reconciliation(action, min_age, log=log, now=now)
+    # Always the primary: a lagging replica would make new uploads look orphaned
+    with engine.connect() as connection:
+        tables = _student_tables(connection)
+        _reconcile_content(connection, tables, run)
+        _reconcile_legacy(connection, tables, run)
+
+    run.release_digests()
+
+    UPLOAD_ORPHANS.set(run.counts["orphans"] - run.counts["quarantined"])
+    UPLOAD_DANGLING.set(run.counts["dangling"])
+    return run.summary()
+
+
+def _acquire_lock(path: str, stale_after: float) -> bool:
+    """
+    Create a lock file so only one worker reconciles at a time
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    for _ in range(2):
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return True
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) < stale_after:
+                    return False
+                # From an earlier period, or a worker that died mid-run
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+    return False
+
+
+async def reconciler(interval: float = RECONCILE_INTERVAL_SECONDS, action: str = RECONCILE_ACTION):
+    """
+    Background task: reconcile_uploads() every `interval` seconds, in one
+    worker at a time
+    """
+    # The lock file is left in place: it marks this period as taken until it is `interval` old
+    lock_path = os.path.join(QUARANTINE_ROOT, ".reconcile.lock")
+    while True:
+        await asyncio.sleep(interval)
+        if not await run_in_threadpool(_acquire_lock, lock_path, interval):
+            continue
+        try:
+            summary = await run_in_threadpool(reconcile_uploads, action)
+            print(f"🧹 Upload reconciliation: {summary['orphans']} orphaned file(s) "
+                  f"({summary['quarantined']} quarantined), {summary['dangling']} dangling reference(s)")
+        except Exception as e:
+            print(f"⚠️  Upload reconciliation failed: {e}")
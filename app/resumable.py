@@ -0,0 +1,324 @@
+"""
+Resumable uploads for registration photos and signatures (tus-style)
+
+1. ``POST /api/uploads`` with ``Upload-Length`` (and optionally
+   ``Upload-Metadata: filename <base64>``) returns 201 and the upload id.
+2. ``PATCH /api/uploads/{id}`` sends the next chunk as
+   ``application/offset+octet-stream`` with ``Upload-Offset`` and, optionally,
+   ``Upload-Checksum: sha256 <base64 digest of the chunk>``. After a dropped
+   connection ``HEAD /api/uploads/{id}`` returns the offset to resume from.
+3. ``POST /api/uploads/{id}/finalize`` (optionally with an ``Upload-Checksum``
+   of the whole file) marks the upload complete. Its id can then be passed to
+   /api/register as ``photo_upload_id`` / ``signature_upload_id``, so a
+   failed registration is resent without the images.
+
+Chunks are written to ``{id}.part`` in UPLOAD_STAGING_FOLDER, next to a small
+``{id}.json`` holding the declared length, filename and, once finalized, the
+SHA-256 of the file. The offset is the size of the .part file, so uploads
+survive worker restarts and work with several workers. Uploads nobody touched
+for UPLOAD_STAGING_TTL seconds are deleted by ``collect_garbage()``, which
+the app runs every UPLOAD_GC_INTERVAL seconds.
+"""
+
+import asyncio
+import base64
+import binascii
+import hashlib
+import json
+import os
+import re
+import secrets
+import time
+import uuid
+from typing import Optional, Tuple
+
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+from app.metrics import Counter
+from app.utils import MAX_FILE_SIZE
+
+# Load environment variables
+load_dotenv()
+
+STAGING_ROOT = os.getenv("UPLOAD_STAGING_FOLDER", "staging")
+STAGING_TTL_SECONDS = float(os.getenv("UPLOAD_STAGING_TTL", str(24 * 60 * 60)))
+GC_INTERVAL_SECONDS = float(os.getenv("UPLOAD_GC_INTERVAL", "600"))
+
+# Checksum extension: the only supported algorithm
+CHECKSUM_ALGORITHM = "sha256"
+
+# tus "Checksum Mismatch"
+CHECKSUM_MISMATCH_STATUS = 460
+
+UPLOAD_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+RESUMABLE_UPLOADS = Counter(
+    "resumable_uploads_total",
+    "Resumable uploads by lifecycle event (created, finalized, consumed, expired)",
+    ("event",),
+)
+RESUMABLE_UPLOAD_BYTES = Counter(
+    "resumable_upload_bytes_total",
+    "Bytes accepted in resumable upload chunks",
+)
+
+
+def _paths(upload_id: str) -> Tuple[str, str]:
+    """
+    (.part, .json) paths of an upload; 404 for ids that cannot exist
+    """
+    if not UPLOAD_ID_PATTERN.match(upload_id or ""):
+        raise HTTPException(status_code=404, detail="Upload not found")
+    base = os.path.join(STAGING_ROOT, upload_id)
+    return f"{base}.part", f"{base}.json"
+
+
+def _read_metadata(upload_id: str) -> dict:
+    _, meta_path = _paths(upload_id)
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        raise HTTPException(status_code=404, detail="Upload not found or expired")
+
+
+def _write_metadata(upload_id: str, metadata: dict) -> None:
+    _, meta_path = _paths(upload_id)
+    # Unique per call: concurrent requests for one upload must not share a temp file
+    temp_path = f"{meta_path}.{uuid.uuid4().hex}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(metadata, f)
+    os.replace(temp_path, meta_path)
+
+
+def _current_offset(upload_id: str) -> int:
+    part_path, _ = _paths(upload_id)
+    try:
+        return os.path.getsize(part_path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Upload not found or expired")
+
+
+def parse_checksum(header: Optional[str]) -> Optional[bytes]:
+    """
+    Digest from an ``Upload-Checksum: sha256 <base64>`` header (None if absent)
+    """
+    if not header:
+        return None
+    algorithm, _, encoded = header.strip().partition(" ")
+    if algorithm.lower() != CHECKSUM_ALGORITHM:
+        raise HTTPException(status_code=400, detail=f"Unsupported checksum algorithm. Use {CHECKSUM_ALGORITHM}.")
+    try:
+        return base64.b64decode(encoded.strip(), validate=True)
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail="Malformed Upload-Checksum header")
+
+
+def parse_metadata(header: Optional[str]) -> dict:
+    """
+    ``Upload-Metadata`` ("key base64,key base64") as a dict of strings
+    """
+    metadata = {}
+    for pair in (header or "").split(","):
+        key, _, encoded = pair.strip().partition(" ")
+        if not key:
+            continue
+        try:
+            metadata[key] = base64.b64decode(encoded.strip(), validate=True).decode("utf-8") if encoded else ""
+        except (binascii.Error, ValueError):
+            raise HTTPException(status_code=400, detail="Malformed Upload-Metadata header")
+    return metadata
+
+
+async def read_chunk(request, limit: int) -> bytes:
+    """
+    Request body of a PATCH, refusing anything larger than `limit` bytes
+    """
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > limit:
+        raise HTTPException(status_code=413, detail="Chunk too large")
+
+    body = bytearray()
+    async for part in request.stream():
+        body.extend(part)
+        if len(body) > limit:
+            raise HTTPException(status_code=413, detail="Chunk too large")
+    return bytes(body)
+
+
+def create_upload(length: int, filename: Optional[str] = None) -> str:
+    """
+    Start a staged upload of `length` bytes and return its id
+    """
+    if length <= 0:
+        raise HTTPException(status_code=400, detail="Upload-Length must be a positive number of bytes")
+    if length > MAX_FILE_SIZE:
+        raise HTTPException(status_code=413, detail="File size exceeds 500KB limit. Please upload a smaller image.")
+
+    os.makedirs(STAGING_ROOT, exist_ok=True)
+    upload_id = secrets.token_hex(16)
+    part_path, _ = _paths(upload_id)
+    open(part_path, "wb").close()
+    _write_metadata(upload_id, {
+        "length": length,
+        "filename": os.path.basename(filename or "upload.jpg"),
+        "created": time.time(),
+        "sha256": None,
+    })
+    RESUMABLE_UPLOADS.inc(event="created")
+    return upload_id
+
+
+def upload_status(upload_id: str) -> dict:
+    """
+    {offset, length, finished} for HEAD requests and resuming clients
+    """
+    metadata = _read_metadata(upload_id)
+    return {
+        "upload_id": upload_id,
+        "offset": _current_offset(upload_id),
+        "length": metadata["length"],
+        "finished": metadata["sha256"] is not None,
+    }
+
+
+def append_chunk(upload_id: str, offset: int, data: bytes, checksum: Optional[bytes] = None) -> int:
+    """
+    Write one chunk at `offset` (which must be the current offset); returns the new offset
+    """
+    metadata = _read_metadata(upload_id)
+    if metadata["sha256"] is not None:
+        raise HTTPException(status_code=409, detail="Upload already finalized")
+
+    current = _current_offset(upload_id)
+    if offset != current:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Upload-Offset {offset} does not match the current offset {current}",
+            headers={"Upload-Offset": str(current)},
+        )
+    if current + len(data) > metadata["length"]:
+        raise HTTPException(status_code=413, detail="Chunk extends past Upload-Length")
+    if checksum is not None and hashlib.sha256(data).digest() != checksum:
+        raise HTTPException(status_code=CHECKSUM_MISMATCH_STATUS, detail="Chunk checksum mismatch")
+
+    # Positional write: a retried chunk racing its original writes the same bytes
+    part_path, _ = _paths(upload_id)
+    with open(part_path, "r+b") as f:
+        f.seek(offset)
+        f.write(data)
+    RESUMABLE_UPLOAD_BYTES.inc(len(data))
+    return offset + len(data)
+
+
+def finalize_upload(upload_id: str, checksum: Optional[bytes] = None) -> dict:
+    """
+    Verify a complete upload (length and optional whole-file checksum) and
+    record its SHA-256; idempotent
+    """
+    metadata = _read_metadata(upload_id)
+    offset = _current_offset(upload_id)
+    if offset != metadata["length"]:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Upload incomplete: {offset} of {metadata['length']} bytes received",
+            headers={"Upload-Offset": str(offset)},
+        )
+
+    part_path, _ = _paths(upload_id)
+    with open(part_path, "rb") as f:
+        digest = hashlib.sha256(f.read()).digest()
+    if checksum is not None and digest != checksum:
+        raise HTTPException(status_code=CHECKSUM_MISMATCH_STATUS, detail="File checksum mismatch")
+
+    if metadata["sha256"] is None:
+        metadata["sha256"] = digest.hex()
+        _write_metadata(upload_id, metadata)
+        RESUMABLE_UPLOADS.inc(event="finalized")
+
+    return {"upload_id": upload_id, "length": metadata["length"], "sha256": metadata["sha256"]}
+
+
+def read_finished_upload(upload_id: str) -> Tuple[bytes, str]:
+    """
+    (contents, filename) of a finalized upload, re-checked against its SHA-256
+    """
+    metadata = _read_metadata(upload_id)
+    if metadata["sha256"] is None:
+        raise HTTPException(status_code=409, detail="Upload not finalized")
+
+    part_path, _ = _paths(upload_id)
+    try:
+        with open(part_path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Upload not found or expired")
+    if hashlib.sha256(data).hexdigest() != metadata["sha256"]:
+        raise HTTPException(status_code=409, detail="Staged upload is corrupt. Please upload the image again.")
+    return data, metadata["filename"]
+
+
+def discard_upload(upload_id: str, event: str = "consumed") -> None:
+    """
+    Delete a staged upload (after registration, or when it expired)
+    """
+    removed = False
+    for path in _paths(upload_id):
+        try:
+            os.remove(path)
+            removed = True
+        except FileNotFoundError:
+            pass
+    if removed:
+        RESUMABLE_UPLOADS.inc(event=event)
+
+
+def collect_garbage(now: float = None) -> int:
+    """
+    Delete staged uploads untouched for STAGING_TTL_SECONDS; returns how many
+    """
+    now = now or time.time()
+    if not os.path.isdir(STAGING_ROOT):
+        return 0
+
+    # Last activity per upload: newest mtime of its .part, .json (and stray temp
+    # files), and every file it has, from one pass over the directory
+    last_touched, files = {}, {}
+    with os.scandir(STAGING_ROOT) as entries:
+        for entry in entries:
+            upload_id = entry.name.split(".", 1)[0]
+            if not UPLOAD_ID_PATTERN.match(upload_id):
+                continue
+            try:
+                mtime = entry.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            last_touched[upload_id] = max(mtime, last_touched.get(upload_id, 0))
+            files.setdefault(upload_id, []).append(entry.path)
+
+    expired = [upload_id for upload_id, mtime in last_touched.items() if now - mtime > STAGING_TTL_SECONDS]
+    for upload_id in expired:
+        discard_upload(upload_id, event="expired")
+        # Leftover temp files of an interrupted metadata write
+        for path in set(files[upload_id]) - set(_paths(upload_id)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+    return len(expired)
+
+
+async def garbage_collector(interval: float = GC_INTERVAL_SECONDS):
+    """
+    Background task: collect_garbage() every `interval` seconds
+    """
+    while True:
+        try:
+            removed = await run_in_threadpool(collect_garbage)
+            if removed:
+                print(f"🧹 Removed {removed} abandoned upload(s) from {STAGING_ROOT}/")
+        except Exception as e:
+            print(f"⚠️  Upload staging cleanup failed: {e}")
+        await asyncio.sleep(interval)
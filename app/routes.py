@@ -2,15 +2,45 @@
 API routes for the application
 """
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Request
-from fastapi.responses import HTMLResponse, FileResponse, JSONResponse
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Header, Query, Request
+from fastapi.responses import HTMLResponse, FileResponse, Response, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.templating import Jinja2Templates
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from typing import Optional
+import io
 import os
+import time
 
-from app.database import get_db
-from app.models import Student
+from app.admission import DB_LIMITER, IMAGE_LIMITER
+from app.auth import is_admin, require_admin
+from app.changes import CHANGES_MAX_PAGE_SIZE, CHANGES_MAX_WAIT_SECONDS, CHANGES_PAGE_SIZE, changes_since, notify_changes, record_change
+from app.database import SessionLocal, get_db, get_read_db, read_your_writes, write_lock
+from app.duplicates import PHOTO_DUPLICATE_ACTION, PHOTO_DUPLICATE_DISTANCE, PHOTO_DUPLICATES, PHOTO_MAX_DISTANCE, duplicate_clusters, find_similar_photos
+from app.events import event_stream, publish
+from app.id_cards import TEMPLATES as ID_CARD_TEMPLATES, card_students, id_card_sheets, page_count
+from app.metrics import REGISTRATION_STAGE_SECONDS, REPORT_STAGE_SECONDS, UPLOAD_BYTES, timed
+from app.models import Student, parse_mac_address, rows_to_dicts, rows_to_records
+from app.perceptual_hash import to_signed
+from app.profiling import list_profiles, profile_path
+from app.queries import DateRange, parse_date_bound, student_rows, student_statistics
+from app.responses import FastJSONResponse
+from app.search import SEARCH_MAX_PAGE_SIZE, SEARCH_PAGE_SIZE, search_students
+from app.resumable import (
+    append_chunk,
+    create_upload,
+    discard_upload,
+    finalize_upload,
+    parse_checksum,
+    parse_metadata,
+    read_chunk,
+    read_finished_upload,
+    upload_status,
+)
+from app.static_files import static_url
+from app.timeseries import registration_timeseries
+from app.storage import backend_for_key
 from app.utils import (
     validate_year_section,
     validate_last_digits,
@@ -19,20 +49,50 @@ from app.utils import (
     validate_file_size,
     process_and_save_image,
     get_file_size,
-    generate_csv_report,
     generate_excel_report_with_photos,
     get_weekly_registrations,
-    get_year_wise_count,
-    get_section_wise_count,
     get_registration_prefix,
+    MAX_FILE_SIZE,
     YEAR_SECTIONS
 )
 
 # Create router
-router = APIRouter()
+router = APIRouter(default_response_class=FastJSONResponse)
 
 # Setup templates
 templates = Jinja2Templates(directory="app/templates")
+templates.env.globals["static_url"] = static_url
+
+
+def date_range_params(
+    from_: Optional[str] = Query(None, alias="from", description="Start date (YYYY-MM-DD) or ISO 8601 datetime"),
+    to: Optional[str] = Query(None, description="End date (inclusive) or ISO 8601 datetime (exclusive)"),
+) -> Optional[DateRange]:
+    """
+    Optional ?from=&to= registration date filter for report and list endpoints
+    """
+    if not from_ and not to:
+        return None
+    try:
+        date_range = DateRange(
+            start=parse_date_bound(from_) if from_ else None,
+            end=parse_date_bound(to, end=True) if to else None,
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid date. Use YYYY-MM-DD or an ISO 8601 datetime"
+        )
+    if date_range.start and date_range.end and date_range.start >= date_range.end:
+        raise HTTPException(
+            status_code=400,
+            detail="'from' must be before 'to'"
+        )
+    return date_range
+
+
+def range_note(date_range: Optional[DateRange]) -> str:
+    return " in the selected date range" if date_range else ""
 
 
 @router.get("/", response_class=HTMLResponse)
@@ -55,15 +115,12 @@ async def success_page(request: Request, register_number: str = ""):
 
 
 @router.get("/admin", response_class=HTMLResponse)
-async def admin_dashboard(request: Request, db: Session = Depends(get_db), password: str = None):
+async def admin_dashboard(request: Request, db: Session = Depends(get_read_db), password: str = None):
     """
     Render admin dashboard with analytics (password protected)
     """
-    # Simple password protection
-    ADMIN_PASSWORD = "admin123"  # Change this to your desired password
-    
     # Check if password is provided and correct
-    if password != ADMIN_PASSWORD:
+    if not is_admin(password):
         # Return password prompt page
         return HTMLResponse(content="""
         <!DOCTYPE html>
@@ -118,41 +175,158 @@ async def admin_dashboard(request: Request, db: Session = Depends(get_db), passw
         """)
     
     # Password is correct, show dashboard
-    # Get all students
-    students = db.query(Student).all()
-    students_data = [student.to_dict() for student in students]
-    
-    # Calculate statistics
-    total_students = len(students_data)
-    year_wise = get_year_wise_count(students_data)
-    section_wise = get_section_wise_count(students_data)
-    weekly_students = get_weekly_registrations(students_data)
-    weekly_count = len(weekly_students)
+    # Calculate statistics (aggregated in the database)
+    statistics = student_statistics(db)
     
     return templates.TemplateResponse("admin.html", {
         "request": request,
-        "total_students": total_students,
-        "year_wise": year_wise,
-        "section_wise": section_wise,
-        "weekly_count": weekly_count
+        **statistics
     })
 
 
+@router.post("/api/uploads", status_code=201)
+async def create_resumable_upload(
+    upload_length: int = Header(..., alias="Upload-Length"),
+    upload_metadata: Optional[str] = Header(None, alias="Upload-Metadata")
+):
+    """
+    Start a resumable photo/signature upload (see app.resumable)
+    """
+    metadata = parse_metadata(upload_metadata)
+    upload_id = await run_in_threadpool(create_upload, upload_length, metadata.get("filename"))
+    location = f"/api/uploads/{upload_id}"
+    return FastJSONResponse(
+        status_code=201,
+        content={"upload_id": upload_id, "offset": 0, "length": upload_length, "location": location},
+        headers={"Location": location, "Upload-Offset": "0"}
+    )
+
+
+@router.head("/api/uploads/{upload_id}")
+async def resumable_upload_offset(upload_id: str):
+    """
+    Offset to resume a resumable upload from
+    """
+    status = await run_in_threadpool(upload_status, upload_id)
+    return Response(
+        status_code=200,
+        headers={
+            "Upload-Offset": str(status["offset"]),
+            "Upload-Length": str(status["length"]),
+            "Cache-Control": "no-store",
+        }
+    )
+
+
+@router.patch("/api/uploads/{upload_id}")
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset"),
+    upload_checksum: Optional[str] = Header(None, alias="Upload-Checksum")
+):
+    """
+    Append the next chunk of a resumable upload at Upload-Offset
+    """
+    if request.headers.get("content-type") != "application/offset+octet-stream":
+        raise HTTPException(status_code=415, detail="Chunks must be sent as application/offset+octet-stream")
+    
+    checksum = parse_checksum(upload_checksum)
+    data = await read_chunk(request, MAX_FILE_SIZE)
+    offset = await run_in_threadpool(append_chunk, upload_id, upload_offset, data, checksum)
+    return Response(status_code=204, headers={"Upload-Offset": str(offset)})
+
+
+@router.post("/api/uploads/{upload_id}/finalize")
+async def finalize_resumable_upload(
+    upload_id: str,
+    upload_checksum: Optional[str] = Header(None, alias="Upload-Checksum")
+):
+    """
+    Verify a complete resumable upload so /api/register can reference it
+    """
+    return await run_in_threadpool(finalize_upload, upload_id, parse_checksum(upload_checksum))
+
+
+async def registration_image(upload: Optional[UploadFile], upload_id: Optional[str], label: str) -> tuple:
+    """
+    (file, size) of a registration image sent with the form or as a finished
+    resumable upload; raises 400 if it is missing or invalid
+    """
+    if upload_id:
+        data, filename = await run_in_threadpool(read_finished_upload, upload_id)
+        file = io.BytesIO(data)
+    elif upload is not None:
+        file, filename = upload.file, upload.filename
+    else:
+        raise HTTPException(
+            status_code=400,
+            detail=f"{label} is required"
+        )
+    
+    if not validate_file_extension(filename):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid {label.lower()} format. Only JPG and PNG files are allowed."
+        )
+    
+    size = get_file_size(file)
+    if not validate_file_size(size):
+        raise HTTPException(
+            status_code=400,
+            detail=f"{label} size exceeds 500KB limit. Please upload a smaller image."
+        )
+    return file, size
+
+
+def save_registration(db: Session, new_student: Student) -> None:
+    """
+    Stored objects and the student row in one short write transaction,
+    so image processing never holds the write lock
+    """
+    with write_lock():
+        try:
+            backend_for_key(new_student.photo_path).record_object(new_student.photo_path, db)
+            backend_for_key(new_student.signature_path).record_object(new_student.signature_path, db)
+            db.add(new_student)
+            # The id is needed for the change feed row, committed together
+            db.flush()
+            record_change(db, new_student, "created")
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            registered = db.query(Student.id).filter(
+                Student.register_number == new_student.register_number
+            ).first()
+            if not registered:
+                raise
+            # Another registration took this number after the duplicate check
+            raise HTTPException(
+                status_code=400,
+                detail=f"Registration number {new_student.register_number} already exists. Please use different last 3 digits."
+            )
+        db.refresh(new_student)
+
+
 @router.post("/api/register")
 async def register_student(
     name: str = Form(...),
     year: int = Form(...),
     section: str = Form(...),
     last_digits: str = Form(...),
-    photo: UploadFile = File(...),
-    signature: UploadFile = File(...),
+    photo: Optional[UploadFile] = File(None),
+    signature: Optional[UploadFile] = File(None),
     has_ipad: str = Form(...),
     ipad_mac_address: Optional[str] = Form(None),
+    photo_upload_id: Optional[str] = Form(None),
+    signature_upload_id: Optional[str] = Form(None),
     db: Session = Depends(get_db)
 ):
     """
     Register a new student with photo, signature, and iPad information
+    Images are sent as files or as ids of finished resumable uploads
     """
+    validation_started = time.perf_counter()
     try:
         # Validate year and section
         if not validate_year_section(year, section):
@@ -187,33 +361,9 @@ async def register_student(
                 detail=f"Registration number {register_number} already exists. Please use different last 3 digits."
             )
         
-        # Validate photo file
-        if not validate_file_extension(photo.filename):
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid photo format. Only JPG and PNG files are allowed."
-            )
-        
-        photo_size = get_file_size(photo.file)
-        if not validate_file_size(photo_size):
-            raise HTTPException(
-                status_code=400,
-                detail="Photo size exceeds 500KB limit. Please upload a smaller image."
-            )
-        
-        # Validate signature file
-        if not validate_file_extension(signature.filename):
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid signature format. Only JPG and PNG files are allowed."
-            )
-        
-        signature_size = get_file_size(signature.file)
-        if not validate_file_size(signature_size):
-            raise HTTPException(
-                status_code=400,
-                detail="Signature size exceeds 500KB limit. Please upload a smaller image."
-            )
+        # Validate photo and signature files
+        photo_file, photo_size = await registration_image(photo, photo_upload_id, "Photo")
+        signature_file, signature_size = await registration_image(signature, signature_upload_id, "Signature")
         
         # Validate iPad MAC address if iPad is selected
         if has_ipad == 'Yes' and not ipad_mac_address:
@@ -222,24 +372,56 @@ async def register_student(
                 detail="iPad MAC address is required when iPad is selected"
             )
         
-        # Process and save photo
-        try:
-            photo_path = process_and_save_image(photo.file, year, section, register_number)
-        except Exception as e:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Error processing photo: {str(e)}"
-            )
+        if ipad_mac_address:
+            try:
+                parse_mac_address(ipad_mac_address)
+            except ValueError:
+                raise HTTPException(
+                    status_code=400,
+                    detail="Invalid iPad MAC address. Use the format AA:BB:CC:DD:EE:FF"
+                )
         
-        # Process and save signature
-        try:
-            from app.utils import process_and_save_signature
-            signature_path = process_and_save_signature(signature.file, year, section, register_number)
-        except Exception as e:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Error processing signature: {str(e)}"
-            )
+        REGISTRATION_STAGE_SECONDS.observe(time.perf_counter() - validation_started, stage="validation")
+        UPLOAD_BYTES.inc(photo_size, kind="photo")
+        UPLOAD_BYTES.inc(signature_size, kind="signature")
+        
+        # Process and save photo and signature in worker threads, a bounded
+        # number at a time (files first; database writes happen together below)
+        async with IMAGE_LIMITER.slot():
+            with timed(REGISTRATION_STAGE_SECONDS, stage="photo_processing"):
+                try:
+                    photo_path, photo_hash = await run_in_threadpool(
+                        process_and_save_image, photo_file, year, section, register_number
+                    )
+                except Exception as e:
+                    raise HTTPException(
+                        status_code=500,
+                        detail=f"Error processing photo: {str(e)}"
+                    )
+            
+            # Process and save signature
+            with timed(REGISTRATION_STAGE_SECONDS, stage="signature_processing"):
+                try:
+                    from app.utils import process_and_save_signature
+                    signature_path = await run_in_threadpool(
+                        process_and_save_signature, signature_file, year, section, register_number
+                    )
+                except Exception as e:
+                    raise HTTPException(
+                        status_code=500,
+                        detail=f"Error processing signature: {str(e)}"
+                    )
+        
+        # Near-duplicate photos of students already registered
+        with timed(REGISTRATION_STAGE_SECONDS, stage="duplicate_check"):
+            photo_duplicates = await run_in_threadpool(find_similar_photos, db, photo_hash)
+        if photo_duplicates:
+            PHOTO_DUPLICATES.inc(action=PHOTO_DUPLICATE_ACTION)
+            if PHOTO_DUPLICATE_ACTION == "reject":
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"This photo matches the photo of {photo_duplicates[0]['register_number']}. Please upload your own photo."
+                )
         
         # Create new student record
         new_student = Student(
@@ -249,24 +431,48 @@ async def register_student(
             register_number=register_number,
             photo_path=photo_path,
             signature_path=signature_path,
-            has_ipad=has_ipad,
-            ipad_mac_address=ipad_mac_address.upper() if ipad_mac_address else None
+            has_ipad=has_ipad == 'Yes',
+            ipad_mac_address=ipad_mac_address or None,
+            photo_dhash=to_signed(photo_hash)
         )
         
         # Save to database
-        db.add(new_student)
-        db.commit()
-        db.refresh(new_student)
+        async with DB_LIMITER.slot():
+            with timed(REGISTRATION_STAGE_SECONDS, stage="db_insert"):
+                await run_in_threadpool(save_registration, db, new_student)
         
-        return JSONResponse(
+        # Staged uploads are kept until the registration succeeds, so a failed
+        # attempt can be resent with the same upload ids
+        for upload_id in (photo_upload_id, signature_upload_id):
+            if upload_id:
+                await run_in_threadpool(discard_upload, upload_id)
+        
+        # Wake long-polling change feed clients
+        notify_changes()
+        
+        # Live dashboards patch their counters, charts and table from this
+        publish("registration", {
+            "register_number": new_student.register_number,
+            "name": new_student.name,
+            "year": new_student.year,
+            "section": new_student.section,
+            "created_at": new_student.created_at.isoformat() if new_student.created_at else None,
+        })
+        
+        response = FastJSONResponse(
             status_code=200,
             content={
                 "success": True,
                 "message": "Student registered successfully!",
                 "register_number": register_number,
-                "student": new_student.to_dict()
+                "student": new_student.to_dict(),
+                # Register numbers with a near-identical photo, for review
+                "photo_duplicates": [match["register_number"] for match in photo_duplicates]
             }
         )
+        # With a read replica, this client's next reads see the new row
+        read_your_writes(response)
+        return response
     
     except HTTPException:
         raise
@@ -278,6 +484,21 @@ async def register_student(
         )
 
 
+@router.get("/api/changes")
+async def get_changes(
+    since: int = Query(0, ge=0),
+    limit: int = Query(CHANGES_PAGE_SIZE, ge=1, le=CHANGES_MAX_PAGE_SIZE),
+    wait: float = Query(0, ge=0, le=CHANGES_MAX_WAIT_SECONDS)
+):
+    """
+    Students created or updated after the cursor `since`, oldest first
+    Pass the returned next_cursor as the next `since`; repeat while has_more.
+    With `wait`, waits up to that many seconds for a change when there are none.
+    Always reads the primary: a lagging replica could skip cursor positions.
+    """
+    return FastJSONResponse(content=await changes_since(since, limit, wait))
+
+
 @router.get("/api/check-register-number/{register_number}")
 async def check_register_number(register_number: str, db: Session = Depends(get_db)):
     """
@@ -310,30 +531,52 @@ async def get_prefix(year: int):
 
 
 @router.get("/api/students")
-async def get_all_students(db: Session = Depends(get_db)):
+async def get_all_students(
+    date_range: Optional[DateRange] = Depends(date_range_params),
+    db: Session = Depends(get_read_db)
+):
     """
-    Get all registered students
+    Get all registered students, optionally within ?from=&to=
     """
-    students = db.query(Student).order_by(Student.created_at.desc()).all()
-    return {
-        "total": len(students),
-        "students": [student.to_dict() for student in students]
-    }
+    students_data = rows_to_dicts(student_rows(db, date_range=date_range).all())
+    # Returned as a response directly so FastAPI skips jsonable_encoder
+    return FastJSONResponse({
+        "total": len(students_data),
+        "students": students_data
+    })
+
+
+@router.get("/api/students/search")
+async def search_students_route(
+    q: str = Query(..., min_length=1, max_length=100),
+    year: Optional[int] = Query(None),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(SEARCH_PAGE_SIZE, ge=1, le=SEARCH_MAX_PAGE_SIZE),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Search students by name, register number or iPad MAC address
+    Best matches first; pass the next `page` while has_more is true.
+    """
+    return FastJSONResponse(search_students(db, q, year=year, page=page, page_size=page_size))
 
 
 @router.get("/api/download-report")
-async def download_report(db: Session = Depends(get_db)):
+async def download_report(
+    date_range: Optional[DateRange] = Depends(date_range_params),
+    db: Session = Depends(get_read_db)
+):
     """
-    Download Excel report of all students with photos
+    Download Excel report of all students with photos, optionally within ?from=&to=
     """
     # Get all students
-    students = db.query(Student).order_by(Student.created_at.desc()).all()
-    students_data = [student.to_dict() for student in students]
+    with timed(REPORT_STAGE_SECONDS, stage="query"):
+        students_data = rows_to_records(student_rows(db, date_range=date_range).all())
     
     if not students_data:
         raise HTTPException(
             status_code=404,
-            detail="No student data available to generate report"
+            detail=f"No student data available to generate report{range_note(date_range)}"
         )
     
     # Generate Excel report with photos
@@ -353,16 +596,13 @@ async def download_report(db: Session = Depends(get_db)):
 
 
 @router.get("/api/download-weekly-report")
-async def download_weekly_report(db: Session = Depends(get_db)):
+async def download_weekly_report(db: Session = Depends(get_read_db)):
     """
     Download Excel report of students registered in the last 7 days with photos
     """
-    # Get all students
-    students = db.query(Student).order_by(Student.created_at.desc()).all()
-    students_data = [student.to_dict() for student in students]
-    
-    # Filter weekly registrations
-    weekly_students = get_weekly_registrations(students_data)
+    # Get students from the last 7 days
+    with timed(REPORT_STAGE_SECONDS, stage="query"):
+        weekly_students = get_weekly_registrations(db)
     
     if not weekly_students:
         raise HTTPException(
@@ -390,9 +630,13 @@ async def download_weekly_report(db: Session = Depends(get_db)):
 
 
 @router.get("/api/download-year-report/{year}")
-async def download_year_report(year: int, db: Session = Depends(get_db)):
+async def download_year_report(
+    year: int,
+    date_range: Optional[DateRange] = Depends(date_range_params),
+    db: Session = Depends(get_read_db)
+):
     """
-    Download Excel report of students from a specific year with photos
+    Download Excel report of students from a specific year with photos, optionally within ?from=&to=
     """
     # Validate year
     if year not in [1, 2, 3]:
@@ -402,13 +646,13 @@ async def download_year_report(year: int, db: Session = Depends(get_db)):
         )
     
     # Get students from specific year
-    students = db.query(Student).filter(Student.year == year).order_by(Student.created_at.desc()).all()
-    students_data = [student.to_dict() for student in students]
+    with timed(REPORT_STAGE_SECONDS, stage="query"):
+        students_data = rows_to_records(student_rows(db, year=year, date_range=date_range).all())
     
     if not students_data:
         raise HTTPException(
             status_code=404,
-            detail=f"No students found for Year {year}"
+            detail=f"No students found for Year {year}{range_note(date_range)}"
         )
     
     # Generate Excel report with photos
@@ -431,9 +675,14 @@ async def download_year_report(year: int, db: Session = Depends(get_db)):
 
 
 @router.get("/api/download-section-report/{year}/{section}")
-async def download_section_report(year: int, section: str, db: Session = Depends(get_db)):
+async def download_section_report(
+    year: int,
+    section: str,
+    date_range: Optional[DateRange] = Depends(date_range_params),
+    db: Session = Depends(get_read_db)
+):
     """
-    Download Excel report of students from a specific year and section with photos
+    Download Excel report of students from a specific year and section with photos, optionally within ?from=&to=
     """
     # Validate year
     if year not in [1, 2, 3]:
@@ -451,16 +700,15 @@ async def download_section_report(year: int, section: str, db: Session = Depends
         )
     
     # Get students from specific year and section
-    students = db.query(Student).filter(
-        Student.year == year,
-        Student.section == section
-    ).order_by(Student.created_at.desc()).all()
-    students_data = [student.to_dict() for student in students]
+    with timed(REPORT_STAGE_SECONDS, stage="query"):
+        students_data = rows_to_records(
+            student_rows(db, year=year, section=section, date_range=date_range).all()
+        )
     
     if not students_data:
         raise HTTPException(
             status_code=404,
-            detail=f"No students found for Year {year} Section {section}"
+            detail=f"No students found for Year {year} Section {section}{range_note(date_range)}"
         )
     
     # Generate Excel report with photos
@@ -482,17 +730,163 @@ async def download_section_report(year: int, section: str, db: Session = Depends
         )
 
 
+@router.get("/api/id-cards/{year}/{section}")
+async def download_id_cards(
+    year: int,
+    section: str,
+    format: str = Query("pdf", pattern="^(pdf|png)$"),
+    template: str = Query("a4"),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Print-ready ID card sheets for a year and section (`all` for the whole year)
+    A PDF, or a ZIP of PNG sheets with ?format=png; streamed page by page.
+    """
+    # Validate year
+    if year not in YEAR_SECTIONS:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid year. Must be 1, 2, or 3"
+        )
+    
+    # Validate section
+    section = section.upper()
+    if section != "ALL" and not validate_year_section(year, section):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid section '{section}' for Year {year}"
+        )
+    
+    if template not in ID_CARD_TEMPLATES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown template '{template}'. Valid options: {', '.join(ID_CARD_TEMPLATES)}"
+        )
+    
+    # Sheets in register number order, the order cards are handed out in
+    with timed(REPORT_STAGE_SECONDS, stage="query"):
+        query = student_rows(db, year=year, section=None if section == "ALL" else section)
+        students = card_students(rows_to_records(query.order_by(None).order_by(Student.register_number).all()))
+    
+    if not students:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No students found for Year {year}" + ("" if section == "ALL" else f" Section {section}")
+        )
+    
+    name = f"id_cards_year_{year}" + ("" if section == "ALL" else f"_section_{section}")
+    filename = f"{name}.pdf" if format == "pdf" else f"{name}.zip"
+    return StreamingResponse(
+        id_card_sheets(students, template, format, name),
+        media_type="application/pdf" if format == "pdf" else "application/zip",
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Total-Pages": str(page_count(students, template)),
+        }
+    )
+
+
 @router.get("/api/stats")
-async def get_statistics(db: Session = Depends(get_db)):
+async def get_statistics(db: Session = Depends(get_read_db)):
     """
     Get statistics for admin dashboard
     """
-    students = db.query(Student).all()
-    students_data = [student.to_dict() for student in students]
+    return student_statistics(db)
+
+
+@router.get("/api/stats/timeseries")
+async def get_statistics_timeseries(
+    bucket: str = "hour",
+    year: Optional[int] = None,
+    section: Optional[str] = None,
+    date_range: Optional[DateRange] = Depends(date_range_params),
+    db: Session = Depends(get_db)
+):
+    """
+    Registrations per hour or day (UTC buckets), optionally for one year/section
+    Defaults to the last 48 hours (hour) or 30 days (day) when ?from= is omitted
+    """
+    if year is not None and year not in YEAR_SECTIONS:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid year. Must be 1, 2, or 3"
+        )
+    if section is not None:
+        section = section.upper()
+        if year is not None and not validate_year_section(year, section):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid section '{section}' for Year {year}"
+            )
     
+    try:
+        return registration_timeseries(db, bucket, date_range, year=year, section=section)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/api/events")
+async def dashboard_events(request: Request, password: str = None):
+    """
+    Live dashboard updates as Server-Sent Events (admin only)
+    Starts with a "counters" snapshot, then "registration" deltas
+    """
+    require_admin(password)
+    
+    # Snapshot for this connection; no database connection is held while streaming
+    db = SessionLocal()
+    try:
+        counters = student_statistics(db)
+    finally:
+        db.close()
+    
+    return StreamingResponse(
+        event_stream(request, [("counters", counters)]),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/api/photo-duplicates")
+async def get_photo_duplicates(
+    password: str = None,
+    distance: int = Query(PHOTO_DUPLICATE_DISTANCE, ge=0, le=PHOTO_MAX_DISTANCE),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Groups of students with near-identical photos (admin only)
+    `distance` is the most perceptual hash bits (of 64) two photos may differ in.
+    """
+    require_admin(password)
+    clusters = await run_in_threadpool(duplicate_clusters, db, distance)
+    return FastJSONResponse({
+        "distance": distance,
+        "total": len(clusters),
+        "clusters": clusters
+    })
+
+
+@router.get("/api/profiles")
+async def get_profiles(password: str = None):
+    """
+    List captured request profiles (admin only)
+    """
+    require_admin(password)
+    profiles = list_profiles()
     return {
-        "total_students": len(students_data),
-        "year_wise": get_year_wise_count(students_data),
-        "section_wise": get_section_wise_count(students_data),
-        "weekly_count": len(get_weekly_registrations(students_data))
+        "total": len(profiles),
+        "profiles": profiles
     }
+
+
+@router.get("/api/profiles/{name}")
+async def download_profile(name: str, password: str = None):
+    """
+    Download a captured profile in collapsed-stack format (admin only)
+    """
+    require_admin(password)
+    filepath = profile_path(name)
+    if not filepath:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    
+    return FileResponse(path=filepath, filename=name, media_type="text/plain")
@@ -0,0 +1,388 @@
+"""
+Indexed student search for /api/students/search
+
+One query string is matched several ways, best matches first:
+
+1. exact register number, or the iPad MAC address in any notation
+   (``aa-bb-cc-dd-ee-ff``, ``AABB.CCDD.EEFF``, ...), both on b-tree indexes;
+   an exact match is the only result
+2. register number prefix (``RA2511``) or suffix (``042``; for one or two
+   digits only the current YEAR_PREFIXES are expanded)
+3. name, for queries without digits: starts with the query (a range on
+   ix_students_name_lower), then a word starting with it, then containing
+   it, each tier with its own LIMIT
+4. fuzzy name matches (typos), when the above leave room on the page and
+   no register number matched
+
+Name and register substring matching is indexed per backend:
+
+- PostgreSQL: pg_trgm GIN indexes on lower(name) and register_number; fuzzy
+  matches use word similarity (``<%``)
+- SQLite: an FTS5 table with the trigram tokenizer (``students_search``,
+  external content kept in sync by triggers); fuzzy candidates share
+  adjacent trigrams with the query and are scored like pg_trgm in Python
+
+Without pg_trgm (no permission to create the extension) or FTS5 trigram
+support (SQLite older than 3.34) search still works, by scanning the table.
+
+Results are paginated with ``page``/``page_size`` and ``has_more``; no total
+is counted, so a page only costs the rows up to its end.
+"""
+
+import re
+from functools import lru_cache
+
+from sqlalchemy import Integer, String, column, func, inspect, literal, text
+
+from app.models import Student, parse_mac_address, row_to_dict, student_columns
+from app.utils import YEAR_PREFIXES
+
+SEARCH_TABLE = "students_search"
+TRIGRAM_INDEXES = {
+    "ix_students_name_trgm": "lower(name)",
+    "ix_students_register_number_trgm": "register_number",
+}
+
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 100
+# Deepest result a client can page to
+SEARCH_MAX_RESULTS = 1000
+
+# Fuzzy matching: minimum pg_trgm-style similarity and SQLite candidates scored
+FUZZY_THRESHOLD = 0.3
+FUZZY_CANDIDATES = 500
+
+_backend = None
+
+
+# ---------------------------------------------------------------------------
+# Index management (called by migrations)
+# ---------------------------------------------------------------------------
+
+def drop_search_index(connection) -> None:
+    """
+    Remove the SQLite search table and its triggers (they outlive a dropped students table)
+    """
+    if connection.dialect.name != "sqlite":
+        return
+    for operation in ("insert", "delete", "update"):
+        connection.execute(text(f"DROP TRIGGER IF EXISTS {SEARCH_TABLE}_{operation}"))
+    connection.execute(text(f"DROP TABLE IF EXISTS {SEARCH_TABLE}"))
+
+
+def create_search_index(connection) -> bool:
+    """
+    Create the name/register number search index; False (with a warning) if
+    this database cannot have one, in which case search scans the table
+    """
+    global _backend
+    _backend = None
+    try:
+        # A savepoint, so a refusal does not abort the surrounding migration
+        with connection.begin_nested():
+            if connection.dialect.name == "postgresql":
+                _create_trigram_indexes(connection)
+            elif connection.dialect.name == "sqlite":
+                _create_fts_table(connection)
+            else:
+                return False
+    except Exception as e:
+        print(f"⚠️  Student search index not created, search will scan the table: {e}")
+        return False
+    return True
+
+
+def _create_trigram_indexes(connection) -> None:
+    connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    for name, expression in TRIGRAM_INDEXES.items():
+        connection.execute(text(
+            f"CREATE INDEX IF NOT EXISTS {name} ON students USING gin ({expression} gin_trgm_ops)"
+        ))
+
+
+def _create_fts_table(connection) -> None:
+    drop_search_index(connection)
+    connection.execute(text(
+        f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5(name, register_number, "
+        f"content='students', content_rowid='id', tokenize='trigram')"
+    ))
+    insert = f"INSERT INTO {SEARCH_TABLE}(rowid, name, register_number) VALUES (new.id, new.name, new.register_number);"
+    delete = (f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, name, register_number) "
+              f"VALUES ('delete', old.id, old.name, old.register_number);")
+    connection.execute(text(f"CREATE TRIGGER {SEARCH_TABLE}_insert AFTER INSERT ON students BEGIN {insert} END"))
+    connection.execute(text(f"CREATE TRIGGER {SEARCH_TABLE}_delete AFTER DELETE ON students BEGIN {delete} END"))
+    connection.execute(text(
+        f"CREATE TRIGGER {SEARCH_TABLE}_update AFTER UPDATE OF name, register_number ON students "
+        f"BEGIN {delete} {insert} END"
+    ))
+    connection.execute(text(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')"))
+
+
+def search_backend(db) -> str:
+    """
+    "trigram" (PostgreSQL), "fts5" (SQLite) or "scan", looked up once per process
+    """
+    global _backend
+    if _backend is None:
+        connection = db.connection()
+        inspector = inspect(connection)
+        if connection.dialect.name == "postgresql":
+            indexes = {index["name"] for index in inspector.get_indexes("students")}
+            _backend = "trigram" if set(TRIGRAM_INDEXES) <= indexes else "scan"
+        else:
+            _backend = "fts5" if inspector.has_table(SEARCH_TABLE) else "scan"
+    return _backend
+
+
+# ---------------------------------------------------------------------------
+# Matching
+# ---------------------------------------------------------------------------
+
+def normalize_query(q: str) -> str:
+    """
+    Collapse whitespace and drop LIKE wildcards and quotes
+    """
+    return " ".join(re.sub(r"[%_\\\"]", " ", q or "").split())
+
+
+@lru_cache(maxsize=4096)
+def _word_trigrams(word: str) -> frozenset:
+    padded = f"  {word} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def trigrams(value: str) -> frozenset:
+    """
+    pg_trgm-style trigrams: per lowercase word, padded with two spaces in front and one behind
+    """
+    return frozenset().union(*[_word_trigrams(word) for word in re.findall(r"\w+", value.lower())])
+
+
+def similarity(query: str, name: str, query_grams: frozenset = None) -> float:
+    """
+    Best trigram similarity of the query with the whole name or any word of it
+
+    Pass `query_grams` (trigrams(query)) when scoring many names against one query.
+    """
+    if query_grams is None:
+        query_grams = trigrams(query)
+    if not query_grams:
+        return 0.0
+    words = [_word_trigrams(word) for word in re.findall(r"\w+", name.lower())]
+    best = 0.0
+    for grams in [frozenset().union(*words)] + words:
+        shared = len(query_grams & grams)
+        # shared / len(query_grams | grams), without building the union
+        score = shared / (len(query_grams) + len(grams) - shared)
+        if score > best:
+            best = score
+    return best
+
+
+def register_suffix_candidates(digits: str) -> list:
+    """
+    Current register numbers ending in one or two digits
+    """
+    width = 3 - len(digits)
+    return [
+        f"{prefix}{lead:0{width}d}{digits}" if width else f"{prefix}{digits}"
+        for prefix in YEAR_PREFIXES.values()
+        for lead in range(10 ** width)
+    ]
+
+
+def _fts_match_expression(value: str) -> str:
+    """
+    FTS5 query for names sharing two adjacent trigrams with `value`
+    """
+    lowered = value.lower()
+    grams = [lowered[i:i + 3] for i in range(len(lowered) - 2)]
+    if len(grams) == 1:
+        return f'name : "{grams[0]}"'
+    return " OR ".join(f'(name : "{a}" AND name : "{b}")' for a, b in zip(grams, grams[1:]))
+
+
+class _Results:
+    """
+    Ordered, de-duplicated results up to `wanted`
+    """
+
+    def __init__(self, wanted: int):
+        self.wanted = wanted
+        self.rows = {}
+
+    @property
+    def full(self) -> bool:
+        return len(self.rows) >= self.wanted
+
+    def add(self, rows, match: str) -> None:
+        for row in rows:
+            if self.full:
+                return
+            student_id = row[0]
+            if student_id not in self.rows:
+                self.rows[student_id] = (row, match)
+
+
+def _students(db, year):
+    query = db.query(*student_columns())
+    if year is not None:
+        query = query.filter(Student.year == year)
+    return query
+
+
+def _fts_rowids(condition: str, **params):
+    """
+    SELECT rowid FROM the FTS5 table, for use in Student.id.in_()
+    """
+    return text(f"SELECT rowid FROM {SEARCH_TABLE} WHERE {condition}").bindparams(**params).columns(
+        column("rowid", Integer)
+    )
+
+
+def _search_exact(db, query: str, year, results: _Results) -> None:
+    upper = query.upper().replace(" ", "")
+    if upper.isalnum():
+        results.add(_students(db, year).filter(Student.register_number == upper).all(), "register_number")
+    try:
+        mac = parse_mac_address(query)
+    except ValueError:
+        return
+    results.add(_students(db, year).filter(Student.ipad_mac == mac).all(), "ipad_mac_address")
+
+
+def _search_register_affixes(db, query: str, year, results: _Results) -> None:
+    upper = query.upper().replace(" ", "")
+    if results.full or not upper.isalnum():
+        return
+
+    # Prefix: a range on the unique index
+    results.add(_students(db, year).filter(
+        Student.register_number > upper,
+        Student.register_number < upper + "\uffff",
+    ).order_by(Student.register_number).limit(results.wanted).all(), "register_prefix")
+
+    if results.full:
+        return
+    if upper.isdigit() and len(upper) < 3:
+        suffix = _students(db, year).filter(Student.register_number.in_(register_suffix_candidates(upper)))
+    elif len(upper) >= 3:
+        # Served by ix_students_register_number_trgm on PostgreSQL
+        suffix = _students(db, year).filter(Student.register_number.like(f"%{upper}"))
+        if search_backend(db) == "fts5":
+            suffix = suffix.filter(Student.id.in_(_fts_rowids("register_number LIKE :suffix", suffix=f"%{upper}")))
+    else:
+        return
+    results.add(suffix.order_by(Student.register_number).limit(results.wanted).all(), "register_suffix")
+
+
+def _search_names(db, query: str, year, results: _Results) -> None:
+    lowered = query.lower()
+    name = func.lower(Student.name)
+    if results.full:
+        return
+
+    # Prefix: a range on ix_students_name_lower, read in result order
+    results.add(_students(db, year).filter(
+        name >= lowered,
+        name < lowered + "\uffff",
+        name.like(f"{lowered}%"),
+    ).order_by(name, Student.register_number).limit(results.wanted).all(), "name_prefix")
+
+    # Then a word starting with the query, then anywhere in the name; each
+    # tier is limited on its own and runs only while the page is short
+    earlier = [f"{lowered}%"]
+    for label, pattern in (("name_word", f"% {lowered}%"), ("name", f"%{lowered}%")):
+        if results.full:
+            return
+        # Served by ix_students_name_trgm on PostgreSQL
+        candidates = _students(db, year).filter(name.like(pattern), *[~name.like(p) for p in earlier])
+        if search_backend(db) == "fts5":
+            candidates = candidates.filter(Student.id.in_(_fts_name_rowids(lowered, pattern)))
+        results.add(candidates.order_by(name, Student.register_number).limit(results.wanted).all(), label)
+        earlier.append(pattern)
+
+
+def _fts_name_rowids(lowered: str, pattern: str):
+    """
+    FTS5 rows whose name contains `lowered`
+
+    A phrase MATCH is checked on the index alone; LIKE re-reads every
+    candidate's name from students, which costs more for a common surname.
+    The trigram index only matches phrases of three characters or more.
+    """
+    if len(lowered) >= 3:
+        return _fts_rowids(f"{SEARCH_TABLE} MATCH :match", match=f'name : "{lowered}"')
+    return _fts_rowids("name LIKE :pattern", pattern=pattern)
+
+
+def _search_fuzzy(db, query: str, year, results: _Results) -> None:
+    backend = search_backend(db)
+    if results.full or len(query) < 3 or backend == "scan":
+        return
+
+    if backend == "trigram":
+        lowered, name = literal(query.lower(), String), func.lower(Student.name)
+        # Served by ix_students_name_trgm; the threshold is pg_trgm.word_similarity_threshold
+        rows = _students(db, year).filter(lowered.op("<%")(name)).order_by(
+            func.word_similarity(lowered, name).desc(), Student.name
+        ).limit(results.wanted).all()
+        results.add(rows, "fuzzy")
+        return
+
+    # Score (id, name) candidates, then load only the students that make the page
+    candidates = db.query(Student.id, Student.name).filter(Student.id.in_(_fts_rowids(
+        f"{SEARCH_TABLE} MATCH :match LIMIT :limit", match=_fts_match_expression(query), limit=FUZZY_CANDIDATES
+    )))
+    if year is not None:
+        candidates = candidates.filter(Student.year == year)
+    query_grams = trigrams(query)
+    # Common names come up many times among the candidates; score each once
+    scores = {}
+    scored = []
+    for student_id, name in candidates.all():
+        if student_id in results.rows:
+            continue
+        if name not in scores:
+            scores[name] = similarity(query, name, query_grams)
+        scored.append((scores[name], name, student_id))
+    scored = [entry for entry in scored if entry[0] >= FUZZY_THRESHOLD]
+    scored.sort(key=lambda entry: (-entry[0], entry[1]))
+    ids = [student_id for _, _, student_id in scored[:results.wanted - len(results.rows)]]
+    if not ids:
+        return
+    rows = {row[0]: row for row in _students(db, year).filter(Student.id.in_(ids)).all()}
+    results.add([rows[student_id] for student_id in ids if student_id in rows], "fuzzy")
+
+
+def search_students(db, q: str, year: int = None, page: int = 1, page_size: int = SEARCH_PAGE_SIZE) -> dict:
+    """
+    Ranked, paginated students matching `q` (see the module docstring)
+    """
+    query = normalize_query(q)
+    offset = (page - 1) * page_size
+    # One more than the page, to know whether another page follows
+    wanted = min(offset + page_size + 1, SEARCH_MAX_RESULTS + 1)
+    results = _Results(wanted)
+
+    if query and offset < SEARCH_MAX_RESULTS:
+        _search_exact(db, query, year, results)
+        # An exact register number or MAC address is the student looked for
+        if not results.rows:
+            _search_register_affixes(db, query, year, results)
+            # Names have no digits, and register numbers no typos to guess
+            if not any(char.isdigit() for char in query):
+                register_match = bool(results.rows)
+                _search_names(db, query, year, results)
+                if not register_match:
+                    _search_fuzzy(db, query, year, results)
+
+    ordered = list(results.rows.values())
+    page_rows = ordered[offset:offset + page_size]
+    return {
+        "query": query,
+        "page": page,
+        "page_size": page_size,
+        "has_more": len(ordered) > offset + page_size and offset + page_size < SEARCH_MAX_RESULTS,
+        "results": [{**row_to_dict(row), "match": match} for row, match in page_rows],
+    }
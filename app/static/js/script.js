@@ -732,8 +732,6 @@ registrationForm.addEventListener('submit', async (e) => {
     formData.append('year', yearSelect.value);
     formData.append('section', sectionSelect.value);
     formData.append('last_digits', regNumberInput.value);
-    formData.append('photo', selectedFile);
-    formData.append('signature', selectedSignature);
     formData.append('has_ipad', hasIpad);
     if (hasIpad === 'Yes') {
         formData.append('ipad_mac_address', ipadMacAddress.value);
@@ -747,16 +745,23 @@ registrationForm.addEventListener('submit', async (e) => {
     submitBtn.disabled = true;
     
     try {
-        const response = await fetch('/api/register', {
-            method: 'POST',
-            body: formData
-        });
+        // Images go up first in resumable chunks; the form only references them
+        await attachImage(formData, 'photo', selectedFile, PHOTO_SIZE);
+        await attachImage(formData, 'signature', selectedSignature, SIGNATURE_SIZE);
+        
+        const response = await submitRegistration(formData);
         
         const data = await response.json();
         
         // Hide loading modal
         loadingModal.hide();
         
+        if (response.status === 404 || response.status === 409) {
+            // A staged upload expired or was damaged: upload again next time
+            finishedUploads.delete(selectedFile);
+            finishedUploads.delete(selectedSignature);
+        }
+        
         if (response.ok && data.success) {
             // Success - redirect to success page
             showToast('success', 'Registration successful!');
@@ -776,6 +781,273 @@ registrationForm.addEventListener('submit', async (e) => {
     }
 });
 
+// ===================================
+// Downscale Images Before Upload
+// ===================================
+// Same targets as the server (app/utils.py); uploads that already match
+// are stored without being decoded and re-encoded again
+const PHOTO_SIZE = { width: 300, height: 300 };
+const SIGNATURE_SIZE = { width: 200, height: 100 };
+const UPLOAD_JPEG_QUALITY = 0.7;
+
+function createCanvas(width, height) {
+    if (typeof OffscreenCanvas !== 'undefined') {
+        return new OffscreenCanvas(width, height);
+    }
+    const canvas = document.createElement('canvas');
+    canvas.width = width;
+    canvas.height = height;
+    return canvas;
+}
+
+function canvasToJpeg(canvas) {
+    if (canvas.convertToBlob) {
+        return canvas.convertToBlob({ type: 'image/jpeg', quality: UPLOAD_JPEG_QUALITY });
+    }
+    return new Promise((resolve, reject) => {
+        canvas.toBlob(
+            blob => (blob ? resolve(blob) : reject(new Error('Canvas encoding failed'))),
+            'image/jpeg',
+            UPLOAD_JPEG_QUALITY
+        );
+    });
+}
+
+async function loadBitmap(file) {
+    if (typeof createImageBitmap !== 'undefined') {
+        return createImageBitmap(file);
+    }
+    const url = URL.createObjectURL(file);
+    try {
+        const img = new Image();
+        img.src = url;
+        await img.decode();
+        return img;
+    } finally {
+        URL.revokeObjectURL(url);
+    }
+}
+
+async function downscaleToJpeg(file, size) {
+    let source = await loadBitmap(file);
+    let width = source.width;
+    let height = source.height;
+    
+    // Halve in steps first: one large drawImage() step aliases badly
+    while (width / 2 >= size.width && height / 2 >= size.height) {
+        width = Math.round(width / 2);
+        height = Math.round(height / 2);
+        const step = createCanvas(width, height);
+        const stepContext = step.getContext('2d');
+        stepContext.imageSmoothingQuality = 'high';
+        stepContext.drawImage(source, 0, 0, width, height);
+        source = step;
+    }
+    
+    // Final resize to the exact target (stretched, like the server),
+    // on white so transparent PNGs match the server's flattening
+    const canvas = createCanvas(size.width, size.height);
+    const context = canvas.getContext('2d');
+    context.fillStyle = '#FFFFFF';
+    context.fillRect(0, 0, size.width, size.height);
+    context.imageSmoothingQuality = 'high';
+    context.drawImage(source, 0, 0, size.width, size.height);
+    return canvasToJpeg(canvas);
+}
+
+async function normalizeForUpload(file, size) {
+    try {
+        const blob = await downscaleToJpeg(file, size);
+        const name = file.name.replace(/\.[^.]*$/, '') + '.jpg';
+        return new File([blob], name, { type: 'image/jpeg' });
+    } catch (error) {
+        // Old browsers: upload the original, the server resizes it
+        console.warn('Client-side resize failed, uploading original:', error);
+        return file;
+    }
+}
+
+// ===================================
+// Resumable Uploads
+// ===================================
+// Chunks are sent with their offset; after a dropped connection the upload
+// resumes from the offset the server reports instead of starting over
+const UPLOAD_CHUNK_SIZE = 64 * 1024;
+const UPLOAD_MAX_RETRIES = 8;
+
+// Upload ids of finished uploads per selected file, so a registration that
+// fails is resent without uploading the images again
+const finishedUploads = new WeakMap();
+
+function sleep(ms) {
+    return new Promise(resolve => setTimeout(resolve, ms));
+}
+
+function encodeMetadata(value) {
+    return btoa(unescape(encodeURIComponent(value)));
+}
+
+async function checksumHeader(blob) {
+    // crypto.subtle only exists on https:// and localhost
+    if (!window.crypto || !window.crypto.subtle) {
+        return null;
+    }
+    const digest = await window.crypto.subtle.digest('SHA-256', await blob.arrayBuffer());
+    let binary = '';
+    new Uint8Array(digest).forEach(byte => {
+        binary += String.fromCharCode(byte);
+    });
+    return `sha256 ${btoa(binary)}`;
+}
+
+async function uploadError(response) {
+    let detail = 'Upload failed';
+    try {
+        detail = (await response.json()).detail || detail;
+    } catch (error) {
+        // Not JSON (e.g. a proxy error page)
+    }
+    const error = new Error(detail);
+    // Client errors other than offset/checksum conflicts will not go away by retrying
+    error.fatal = response.status >= 400 && response.status < 500 && ![409, 460].includes(response.status);
+    return error;
+}
+
+async function serverOffset(uploadId, fallback) {
+    try {
+        const response = await fetch(`/api/uploads/${uploadId}`, { method: 'HEAD', cache: 'no-store' });
+        if (response.ok) {
+            return parseInt(response.headers.get('Upload-Offset'), 10);
+        }
+    } catch (error) {
+        // Still offline: retry from where we were
+    }
+    return fallback;
+}
+
+async function sendChunks(uploadId, file) {
+    let offset = 0;
+    let failures = 0;
+    
+    while (offset < file.size) {
+        const chunk = file.slice(offset, offset + UPLOAD_CHUNK_SIZE);
+        try {
+            const headers = {
+                'Content-Type': 'application/offset+octet-stream',
+                'Upload-Offset': String(offset)
+            };
+            const checksum = await checksumHeader(chunk);
+            if (checksum) {
+                headers['Upload-Checksum'] = checksum;
+            }
+            
+            const response = await fetch(`/api/uploads/${uploadId}`, {
+                method: 'PATCH',
+                headers: headers,
+                body: chunk
+            });
+            if (response.status !== 204) {
+                throw await uploadError(response);
+            }
+            offset = parseInt(response.headers.get('Upload-Offset'), 10);
+            failures = 0;
+        } catch (error) {
+            if (error.fatal || ++failures > UPLOAD_MAX_RETRIES) {
+                throw error;
+            }
+            await sleep(Math.min(1000 * Math.pow(2, failures - 1), 15000) * (0.5 + Math.random()));
+            offset = await serverOffset(uploadId, offset);
+        }
+    }
+}
+
+async function uploadResumable(file) {
+    const created = await fetch('/api/uploads', {
+        method: 'POST',
+        headers: {
+            'Upload-Length': String(file.size),
+            'Upload-Metadata': `filename ${encodeMetadata(file.name)}`
+        }
+    });
+    if (!created.ok) {
+        throw await uploadError(created);
+    }
+    const uploadId = (await created.json()).upload_id;
+    
+    await sendChunks(uploadId, file);
+    
+    const headers = {};
+    const checksum = await checksumHeader(file);
+    if (checksum) {
+        headers['Upload-Checksum'] = checksum;
+    }
+    const finalized = await fetch(`/api/uploads/${uploadId}/finalize`, { method: 'POST', headers: headers });
+    if (!finalized.ok) {
+        throw await uploadError(finalized);
+    }
+    return uploadId;
+}
+
+async function attachImage(formData, field, file, size) {
+    let uploadId = finishedUploads.get(file);
+    if (!uploadId) {
+        const upload = await normalizeForUpload(file, size);
+        try {
+            uploadId = await uploadResumable(upload);
+            finishedUploads.set(file, uploadId);
+        } catch (error) {
+            // Fall back to sending the image inside the form
+            console.warn(`Resumable ${field} upload failed, sending it with the form:`, error);
+            formData.append(field, upload);
+            return;
+        }
+    }
+    formData.append(`${field}_upload_id`, uploadId);
+}
+
+// ===================================
+// Retry When the Server Is Busy
+// ===================================
+const REGISTER_MAX_ATTEMPTS = 5;
+const REGISTER_BASE_DELAY_MS = 1000;
+const REGISTER_MAX_DELAY_MS = 30000;
+
+function retryDelay(response, attempt) {
+    // Honour Retry-After (seconds), but never retry sooner than the backoff
+    const retryAfter = parseInt(response.headers.get('Retry-After'), 10);
+    const backoff = REGISTER_BASE_DELAY_MS * Math.pow(2, attempt - 1);
+    const delay = Math.min(
+        Math.max(Number.isNaN(retryAfter) ? 0 : retryAfter * 1000, backoff),
+        REGISTER_MAX_DELAY_MS
+    );
+    // Jitter (50-150%) so students turned away together don't all retry together
+    return delay * (0.5 + Math.random());
+}
+
+async function submitRegistration(formData) {
+    const loadingMessage = document.getElementById('loadingMessage');
+    
+    for (let attempt = 1; ; attempt++) {
+        const response = await fetch('/api/register', {
+            method: 'POST',
+            body: formData
+        });
+        
+        if (response.status !== 503 || attempt >= REGISTER_MAX_ATTEMPTS) {
+            if (loadingMessage) {
+                loadingMessage.textContent = 'Please wait while we save your details';
+            }
+            return response;
+        }
+        
+        const delay = retryDelay(response, attempt);
+        if (loadingMessage) {
+            loadingMessage.textContent = `Many students are registering right now. Retrying in ${Math.ceil(delay / 1000)}s...`;
+        }
+        await new Promise(resolve => setTimeout(resolve, delay));
+    }
+}
+
 // ===================================
 // Reset Form
 // ===================================
@@ -0,0 +1,174 @@
+"""
+Static file serving with strong ETags, per-mount Cache-Control policies
+and precompressed (.br / .gz) variants
+"""
+
+import hashlib
+import json
+import mimetypes
+import os
+from functools import lru_cache
+from typing import Callable
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+from app.storage import CAS_DIRECTORY
+
+STATIC_DIRECTORY = "app/static"
+ASSET_MANIFEST = os.path.join(STATIC_DIRECTORY, "manifest.json")
+
+# Fingerprinted assets never change under the same URL
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+# Everything else may be cached but must be revalidated with the ETag
+REVALIDATE_CACHE = "no-cache"
+# Student photos are personal data: browser cache only
+PRIVATE_REVALIDATE_CACHE = "private, no-cache"
+PRIVATE_IMMUTABLE_CACHE = "private, max-age=31536000, immutable"
+
+# Preferred order when the client accepts several encodings
+PRECOMPRESSED_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+@lru_cache(maxsize=4096)
+def _content_digest(path: str, mtime_ns: int, size: int) -> str:
+    """
+    SHA-256 of a file, cached per (path, mtime, size) so each version is hashed once
+    """
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def strong_etag(path: str, stat_result: os.stat_result, suffix: str = "") -> str:
+    """
+    Strong ETag derived from the file contents
+    """
+    digest = _content_digest(path, stat_result.st_mtime_ns, stat_result.st_size)
+    return f'"{digest[:32]}{suffix}"'
+
+
+def accepted_encodings(request_headers: Headers) -> set:
+    """
+    Parse Accept-Encoding, ignoring codings explicitly refused with q=0
+    """
+    accepted = set()
+    for item in request_headers.get("accept-encoding", "").split(","):
+        coding, _, params = item.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        if coding:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Weak comparison of If-None-Match against an ETag (RFC 9110 13.1.2)
+    """
+    if if_none_match.strip() == "*":
+        return True
+    target = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == target for tag in if_none_match.split(","))
+
+
+class CachedStaticFiles(StaticFiles):
+    """
+    StaticFiles with a Cache-Control policy, content-hash ETags and
+    precompressed sibling files
+
+    ``cache_policy`` maps the request path to a Cache-Control value.
+    """
+
+    def __init__(self, *args, cache_policy: Callable[[str], str], precompressed: bool = False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache_policy = cache_policy
+        self.precompressed = precompressed
+
+    def file_response(self, full_path, stat_result, scope, status_code=200) -> Response:
+        request_headers = Headers(scope=scope)
+        served_path, served_stat, encoding = full_path, stat_result, None
+
+        if self.precompressed:
+            accepted = accepted_encodings(request_headers)
+            for coding, extension in PRECOMPRESSED_ENCODINGS:
+                if coding in accepted and os.path.isfile(full_path + extension):
+                    served_path = full_path + extension
+                    served_stat = os.stat(served_path)
+                    encoding = coding
+                    break
+
+        response = FileResponse(
+            served_path,
+            status_code=status_code,
+            stat_result=served_stat,
+            method=scope["method"],
+            # Media type comes from the original name, not the .br/.gz sibling
+            media_type=_guess_media_type(full_path),
+        )
+        response.headers["etag"] = strong_etag(served_path, served_stat, f"-{encoding}" if encoding else "")
+        response.headers["cache-control"] = self.cache_policy(scope.get("path", ""))
+        if self.precompressed:
+            response.headers["vary"] = "Accept-Encoding"
+        if encoding:
+            response.headers["content-encoding"] = encoding
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+    def is_not_modified(self, response_headers, request_headers) -> bool:
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            # If-None-Match takes precedence over If-Modified-Since
+            return _etag_matches(if_none_match, response_headers["etag"])
+        return super().is_not_modified(response_headers, request_headers)
+
+
+def _guess_media_type(path: str) -> str:
+    """
+    Guess a media type from a file name
+    """
+    media_type, _ = mimetypes.guess_type(path)
+    return media_type or "application/octet-stream"
+
+
+def static_cache_policy(path: str) -> str:
+    """
+    Cache policy for /static: fingerprinted assets under dist/ are immutable
+    """
+    if "/dist/" in path:
+        return IMMUTABLE_CACHE
+    return REVALIDATE_CACHE
+
+
+def uploads_cache_policy(path: str) -> str:
+    """
+    Cache policy for /uploads: content-addressed objects never change
+    """
+    if f"/{CAS_DIRECTORY}/" in path:
+        return PRIVATE_IMMUTABLE_CACHE
+    return PRIVATE_REVALIDATE_CACHE
+
+
+@lru_cache(maxsize=1)
+def load_asset_manifest() -> dict:
+    """
+    Load the fingerprinted asset manifest written by build_assets.py
+    """
+    try:
+        with open(ASSET_MANIFEST, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def static_url(asset: str) -> str:
+    """
+    URL for a static asset, using its fingerprinted name when one was built
+    Used from templates as {{ static_url('css/style.css') }}
+    """
+    return f"/static/{load_asset_manifest().get(asset, asset)}"
@@ -0,0 +1,254 @@
+"""
+Upload storage backends
+
+Two layouts are supported:
+
+- ``legacy``:  uploads/{year}/{section}/{register_number}.jpg (the original layout)
+- ``content``: uploads/objects/ab/cd/abcd....jpg, named by the SHA-256 of the
+  file contents, so identical uploads are stored once and every directory stays
+  small no matter how many students register.
+
+``Student.photo_path`` and ``signature_path`` return a storage key. Legacy keys
+are plain relative paths, derived from the student's year, section and
+register number; content-addressed keys look like ``cas:<sha256>`` (only the
+32-byte digest is stored). Use ``resolve_upload_path`` to turn a key into
+a file path instead of assuming a directory layout.
+
+Stored objects are not reference counted: a content-addressed file may be
+shared by any number of students (and archived cohorts), and whether it is
+still referenced is decided by upload reconciliation (app/reconcile.py).
+"""
+
+import hashlib
+import os
+import uuid
+from typing import Iterator, Optional
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+UPLOAD_ROOT = os.getenv("UPLOAD_FOLDER", "uploads")
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "content")
+
+CAS_PREFIX = "cas:"
+CAS_DIRECTORY = "objects"
+CAS_EXTENSION = ".jpg"
+
+
+def _atomic_write(filepath: str, data: bytes) -> None:
+    """
+    Write bytes to a file without ever exposing a partially written file
+
+    The temp name is unique per call: threads of one worker may store the
+    same contents (the same content-addressed path) at the same time.
+    """
+    temp_path = f"{filepath}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, filepath)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class StorageBackend:
+    """
+    Base class for upload storage backends
+    """
+    name = "base"
+
+    def __init__(self, root: str = UPLOAD_ROOT):
+        self.root = root
+
+    def save(self, data: bytes, year: int, section: str, filename: str, db=None) -> str:
+        """
+        Store file contents and return the storage key
+        """
+        raise NotImplementedError
+
+    def record_object(self, key: str, db) -> None:
+        """
+        Record a file saved without a session in the stored_objects table
+        Backends without that table ignore this
+        """
+
+    def iter_files(self) -> Iterator[os.DirEntry]:
+        """
+        Yield every file owned by this backend
+        """
+        raise NotImplementedError
+
+
+class LegacyStorage(StorageBackend):
+    """
+    Original layout: one directory per year and section, named by register number
+    """
+    name = "legacy"
+
+    def directory(self, year: int, section: str) -> str:
+        """
+        Create and return the directory for a year/section pair
+        """
+        upload_dir = os.path.join(self.root, str(year), section.upper())
+        os.makedirs(upload_dir, exist_ok=True)
+        return upload_dir
+
+    def key(self, year: int, section: str, filename: str) -> str:
+        """
+        Storage key (relative path) of a file in this layout, without touching disk
+        """
+        return os.path.join(self.root, str(year), section.upper(), filename)
+
+    def save(self, data: bytes, year: int, section: str, filename: str, db=None) -> str:
+        self.directory(year, section)
+        filepath = self.key(year, section, filename)
+        _atomic_write(filepath, data)
+        return filepath
+
+    def iter_files(self) -> Iterator[os.DirEntry]:
+        if not os.path.isdir(self.root):
+            return
+        with os.scandir(self.root) as years:
+            for year_entry in years:
+                if not year_entry.is_dir() or year_entry.name == CAS_DIRECTORY:
+                    continue
+                yield from _walk_files(year_entry.path)
+
+
+class ContentAddressedStorage(StorageBackend):
+    """
+    Content-addressed layout sharded two levels deep by digest prefix
+
+    Each object has a ``stored_objects`` row (digest and size), written in the
+    caller's session so it commits or rolls back together with the student
+    row that points at the file.
+    """
+    name = "content"
+
+    def object_path(self, digest: str) -> str:
+        """
+        Filesystem path for a digest
+        """
+        return os.path.join(self.root, CAS_DIRECTORY, digest[:2], digest[2:4], f"{digest}{CAS_EXTENSION}")
+
+    def save(self, data: bytes, year: int, section: str, filename: str, db=None) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        filepath = self.object_path(digest)
+
+        # Identical contents are already on disk
+        if not os.path.exists(filepath):
+            os.makedirs(os.path.dirname(filepath), exist_ok=True)
+            _atomic_write(filepath, data)
+        else:
+            try:
+                # Fresh mtime: reconciliation leaves recently used objects alone
+                os.utime(filepath)
+            except FileNotFoundError:
+                _atomic_write(filepath, data)
+
+        if db is not None:
+            _record_object(db, digest, len(data))
+
+        return f"{CAS_PREFIX}{digest}"
+
+    def record_object(self, key: str, db) -> None:
+        if not key or not key.startswith(CAS_PREFIX):
+            return
+        digest = key[len(CAS_PREFIX):]
+        _record_object(db, digest, os.path.getsize(self.object_path(digest)))
+
+    def iter_files(self) -> Iterator[os.DirEntry]:
+        objects_dir = os.path.join(self.root, CAS_DIRECTORY)
+        if os.path.isdir(objects_dir):
+            yield from _walk_files(objects_dir)
+
+
+def _walk_files(directory: str) -> Iterator[os.DirEntry]:
+    """
+    Depth-first walk with os.scandir, yielding file entries only
+    """
+    stack = [directory]
+    while stack:
+        current = stack.pop()
+        with os.scandir(current) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False) and not entry.name.endswith(".tmp"):
+                    yield entry
+
+
+def _record_object(db, digest: str, size: int) -> None:
+    """
+    Create the stored_objects row for an object unless it exists
+
+    PostgreSQL and SQLite use a single INSERT ... ON CONFLICT DO NOTHING, so
+    two workers storing identical contents at the same time cannot both try
+    to insert the row.
+    """
+    from app.models import StoredObject
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        insert = None
+
+    if insert is not None:
+        statement = insert(StoredObject).values(digest=digest, size=size)
+        db.execute(statement.on_conflict_do_nothing(index_elements=[StoredObject.digest]))
+        return
+
+    if db.get(StoredObject, digest) is None:
+        db.add(StoredObject(digest=digest, size=size))
+        # Flush so a second save of the same contents in this session finds the row
+        db.flush()
+
+
+BACKENDS = {
+    LegacyStorage.name: LegacyStorage,
+    ContentAddressedStorage.name: ContentAddressedStorage,
+}
+
+_storage: Optional[StorageBackend] = None
+
+
+def get_storage() -> StorageBackend:
+    """
+    Return the configured storage backend for new uploads
+    """
+    global _storage
+    if _storage is None:
+        backend_class = BACKENDS.get(STORAGE_BACKEND)
+        if backend_class is None:
+            raise ValueError(f"Unknown STORAGE_BACKEND '{STORAGE_BACKEND}'. Valid options: {', '.join(BACKENDS)}")
+        _storage = backend_class()
+    return _storage
+
+
+def backend_for_key(key: str) -> StorageBackend:
+    """
+    Return the backend that owns an existing storage key
+    """
+    if key and key.startswith(CAS_PREFIX):
+        return ContentAddressedStorage()
+    return LegacyStorage()
+
+
+def resolve_upload_path(key: Optional[str]) -> Optional[str]:
+    """
+    Convert a storage key into a filesystem path
+    """
+    if not key:
+        return None
+    if key.startswith(CAS_PREFIX):
+        return ContentAddressedStorage().object_path(key[len(CAS_PREFIX):])
+    # Legacy keys are stored paths, possibly written with Windows separators
+    return os.path.normpath(key.replace("\\", "/"))
+
@@ -0,0 +1,208 @@
+"""
+Registration counts per hour or day for the dashboard charts
+
+Buckets are computed in SQL (``date_trunc`` on PostgreSQL, ``strftime`` on
+SQLite) and are aligned to UTC. A bucket whose end lies in the past can no
+longer change, since registrations are stamped with the database clock at
+insert time. Those closed buckets are cached in memory per filter (bucket
+size, year, section), and each cache grows to cover every range asked for.
+A request only queries the database for the still-open buckets and for any
+part of its range not covered yet, so a dashboard polling the last two days
+never rescans history.
+
+The cache is per worker process and assumes rows are not back-dated or
+deleted while the app runs; restart (or call ``clear_cache``) after bulk
+imports or resets.
+"""
+
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import func, literal_column
+
+from app.models import Student
+from app.queries import DateRange, in_range
+
+BUCKETS = {
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+}
+
+# Default window when the request has no ?from=
+DEFAULT_WINDOWS = {
+    "hour": timedelta(hours=48),
+    "day": timedelta(days=30),
+}
+
+# Upper bound on points per response (a year of hours is ~8,800)
+MAX_POINTS = 10000
+
+# A bucket is treated as closed this long after it ends, allowing for
+# clock differences between the app and database servers
+CLOSE_GRACE = timedelta(minutes=2)
+
+SQLITE_FORMATS = {
+    "hour": "%Y-%m-%d %H:00:00",
+    "day": "%Y-%m-%d 00:00:00",
+}
+
+
+def floor_bucket(value: datetime, bucket: str) -> datetime:
+    """
+    Start of the UTC bucket containing value
+    """
+    value = value.astimezone(timezone.utc)
+    if bucket == "hour":
+        return value.replace(minute=0, second=0, microsecond=0)
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def ceil_bucket(value: datetime, bucket: str) -> datetime:
+    """
+    Start of the first UTC bucket at or after value
+    """
+    start = floor_bucket(value, bucket)
+    return start if start == value else start + BUCKETS[bucket]
+
+
+def bucket_expression(dialect: str, bucket: str):
+    """
+    SQL expression truncating created_at to the start of its UTC bucket
+    """
+    # Literals rather than bound parameters: the expression is repeated in
+    # GROUP BY, and PostgreSQL only matches it if the two are identical
+    if dialect == "sqlite":
+        # SQLite stores created_at as UTC text
+        return func.strftime(literal_column(f"'{SQLITE_FORMATS[bucket]}'"), Student.created_at)
+    return func.date_trunc(literal_column(f"'{bucket}'"), func.timezone(literal_column("'UTC'"), Student.created_at))
+
+
+def _as_utc(value) -> datetime:
+    # SQLite returns text, PostgreSQL a naive timestamp (already UTC)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.replace(tzinfo=timezone.utc)
+
+
+def query_buckets(db, bucket: str, start: datetime, end: datetime, year: int = None, section: str = None) -> dict:
+    """
+    {bucket start: count} for non-empty buckets in [start, end)
+    """
+    if start >= end:
+        return {}
+    expression = bucket_expression(db.get_bind().dialect.name, bucket)
+    query = db.query(expression, func.count()).select_from(Student)
+    if year is not None:
+        query = query.filter(Student.year == year)
+    if section is not None:
+        query = query.filter(Student.section == section)
+    query = in_range(query, DateRange(start, end)).group_by(expression)
+    return {_as_utc(bucket_start): count for bucket_start, count in query}
+
+
+class _ClosedBuckets:
+    """
+    Counts for one filter over a contiguous span [start, end) of closed buckets
+    Buckets missing from `counts` inside the span had no registrations
+    """
+
+    def __init__(self):
+        self.start = None
+        self.end = None
+        self.counts = {}
+
+
+class TimeseriesCache:
+    """
+    In-memory cache of closed buckets, keyed by (bucket, year, section)
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def counts(self, db, bucket: str, start: datetime, end: datetime, year: int = None,
+               section: str = None, now: datetime = None) -> dict:
+        """
+        {bucket start: count} for [start, end); both bounds bucket-aligned
+        """
+        now = now or datetime.now(timezone.utc)
+        closed_end = max(start, min(end, floor_bucket(now - CLOSE_GRACE, bucket)))
+
+        with self._lock:
+            entry = self._entries.setdefault((bucket, year, section), _ClosedBuckets())
+
+            # Extend the cached span to cover [start, closed_end), querying only what is new
+            if start < closed_end:
+                if entry.start is None:
+                    entry.counts.update(query_buckets(db, bucket, start, closed_end, year, section))
+                    entry.start, entry.end = start, closed_end
+                else:
+                    if start < entry.start:
+                        entry.counts.update(query_buckets(db, bucket, start, entry.start, year, section))
+                        entry.start = start
+                    if closed_end > entry.end:
+                        entry.counts.update(query_buckets(db, bucket, entry.end, closed_end, year, section))
+                        entry.end = closed_end
+
+            counts = {
+                bucket_start: count
+                for bucket_start, count in entry.counts.items()
+                if start <= bucket_start < closed_end
+            }
+
+        # Open buckets are always recomputed
+        counts.update(query_buckets(db, bucket, closed_end, end, year, section))
+        return counts
+
+
+_cache = TimeseriesCache()
+
+
+def clear_cache() -> None:
+    _cache.clear()
+
+
+def registration_timeseries(db, bucket: str, date_range: Optional[DateRange] = None,
+                            year: int = None, section: str = None) -> dict:
+    """
+    Zero-filled registration counts per bucket for the dashboard
+    Raises ValueError for an unknown bucket or a range with too many points
+    """
+    if bucket not in BUCKETS:
+        raise ValueError(f"Unknown bucket '{bucket}'. Valid options: {', '.join(BUCKETS)}")
+
+    now = datetime.now(timezone.utc)
+    requested_end = date_range.end if date_range and date_range.end else now
+    end = ceil_bucket(requested_end, bucket)
+    if date_range and date_range.start:
+        start = floor_bucket(date_range.start, bucket)
+    else:
+        start = floor_bucket(requested_end - DEFAULT_WINDOWS[bucket], bucket)
+
+    step = BUCKETS[bucket]
+    if (end - start) / step > MAX_POINTS:
+        raise ValueError(f"Range too large: at most {MAX_POINTS} {bucket} buckets per request")
+
+    counts = _cache.counts(db, bucket, start, end, year, section, now=now)
+
+    points = []
+    bucket_start = start
+    while bucket_start < end:
+        points.append({"start": bucket_start.isoformat(), "count": counts.get(bucket_start, 0)})
+        bucket_start += step
+
+    return {
+        "bucket": bucket,
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "year": year,
+        "section": section,
+        "total": sum(point["count"] for point in points),
+        "points": points,
+    }
@@ -1,14 +1,20 @@
 """
 Utility functions for image processing, validation, and reporting
+
+Pillow, pandas and openpyxl are imported inside the functions that use them,
+so importing this module (and starting a worker) does not pay for them.
 """
 
+import io
 import os
 import re
-from PIL import Image
-from datetime import datetime, timedelta
-import pandas as pd
+import time
+from datetime import datetime
 from typing import Optional, Tuple
 
+from app.metrics import IMAGES_STORED, REPORT_STAGE_SECONDS, timed
+from app.storage import LegacyStorage, get_storage, resolve_upload_path
+
 
 # Registration number prefixes based on year
 YEAR_PREFIXES = {
@@ -26,10 +32,25 @@ YEAR_SECTIONS = {
 
 # Image settings
 IMAGE_SIZE = (300, 300)
+SIGNATURE_SIZE = (200, 100)
 IMAGE_QUALITY = 70
+# Client-encoded uploads within this estimated quality range are stored as-is
+FAST_PATH_QUALITY = (IMAGE_QUALITY - 20, IMAGE_QUALITY + 10)
 MAX_FILE_SIZE = 500 * 1024  # 500KB in bytes
 ALLOWED_EXTENSIONS = {'.jpg', '.jpeg', '.png'}
 
+# JPEG luminance quantization table at quality 50 (ITU T.81, Annex K)
+STANDARD_LUMINANCE_TABLE = (
+    16, 11, 10, 16, 24, 40, 51, 61,
+    12, 12, 14, 19, 26, 58, 60, 55,
+    14, 13, 16, 24, 40, 57, 69, 56,
+    14, 17, 22, 29, 51, 87, 80, 62,
+    18, 22, 37, 56, 68, 109, 103, 77,
+    24, 35, 55, 64, 81, 104, 113, 92,
+    49, 64, 78, 87, 103, 121, 120, 101,
+    72, 92, 95, 98, 112, 100, 103, 99,
+)
+
 
 def get_registration_prefix(year: int) -> Optional[str]:
     """
@@ -80,76 +101,163 @@ def validate_file_size(file_size: int) -> bool:
 
 def create_upload_directory(year: int, section: str) -> str:
     """
-    Create and return upload directory path
+    Create and return upload directory path (legacy storage layout)
     """
-    upload_dir = os.path.join("uploads", str(year), section.upper())
-    os.makedirs(upload_dir, exist_ok=True)
-    return upload_dir
+    return LegacyStorage().directory(year, section)
 
 
-def process_and_save_image(image_file, year: int, section: str, register_number: str) -> str:
+def encode_jpeg(img) -> bytes:
     """
-    Process image: resize, compress, and save
-    Returns the saved file path
+    Encode a PIL image as compressed JPEG bytes
     """
-    # Create directory
-    upload_dir = create_upload_directory(year, section)
-    
-    # Generate filename
-    filename = f"{register_number}.jpg"
-    filepath = os.path.join(upload_dir, filename)
-    
+    buffer = io.BytesIO()
+    img.save(buffer, 'JPEG', quality=IMAGE_QUALITY, optimize=True)
+    return buffer.getvalue()
+
+
+def estimate_jpeg_quality(img) -> Optional[int]:
+    """
+    Approximate libjpeg quality (1-100) of an opened JPEG, from its luminance
+    quantization table; None if the image has no usable table
+    """
+    tables = getattr(img, 'quantization', None)
+    if not tables or 0 not in tables:
+        return None
+    # Order-independent: Pillow versions differ on zigzag vs natural order
+    scale = 100 * sum(tables[0]) / sum(STANDARD_LUMINANCE_TABLE)
+    if scale <= 0:
+        return None
+    quality = 5000 / scale if scale > 100 else (200 - scale) / 2
+    return max(1, min(100, round(quality)))
+
+
+def is_normalized_jpeg(img, size: Tuple[int, int]) -> bool:
+    """
+    True if an upload already is what the server would produce: a baseline RGB
+    JPEG of exactly `size`, inside the quality envelope, with no segment but
+    the JFIF header (EXIF, XMP, ICC profiles and comments are never stored,
+    so camera metadata such as GPS cannot be; normalize_image() also checks
+    that nothing follows the image)
+    """
+    if img.format != 'JPEG' or img.mode != 'RGB' or img.size != size:
+        return False
+    if img.info.get('progressive') or img.info.get('progression'):
+        return False
+    # Every APPn and COM segment, in file order
+    for marker, data in getattr(img, 'applist', []):
+        if marker != 'APP0' or not data.startswith(b'JFIF\x00'):
+            return False
+    quality = estimate_jpeg_quality(img)
+    low, high = FAST_PATH_QUALITY
+    return quality is not None and low <= quality <= high
+
+
+def jpeg_end_offset(data: bytes) -> Optional[int]:
+    """
+    Offset just past the EOI marker that ends a baseline JPEG's scan, or None
+    if the markers cannot be followed
+
+    Marker segments are skipped by their lengths up to SOS. In the
+    entropy-coded data that follows, 0xFF is always followed by 0x00 or a
+    restart marker, so the first FF D9 is the end of the image.
+    """
+    if not data.startswith(b'\xff\xd8'):
+        return None
+    offset = 2
+    while offset + 4 <= len(data):
+        if data[offset] != 0xFF:
+            return None
+        marker = data[offset + 1]
+        if marker == 0xFF:
+            # Fill byte before a marker
+            offset += 1
+            continue
+        length = int.from_bytes(data[offset + 2:offset + 4], 'big')
+        if marker == 0xDA:
+            end = data.find(b'\xff\xd9', offset + 2 + length)
+            return None if end < 0 else end + 2
+        offset += 2 + length
+    return None
+
+
+def normalize_image(image_file, size: Tuple[int, int], kind: str) -> bytes:
+    """
+    JPEG bytes of the upload at `size`, flattened onto white
+
+    Uploads the registration form already downscaled and encoded in the
+    browser are stored as-is once they decode cleanly and end at their EOI
+    marker; anything else is resized and re-encoded here.
+    """
+    from PIL import Image
+
     # Open and process image
     img = Image.open(image_file)
-    
+
+    if is_normalized_jpeg(img, size):
+        try:
+            # Full decode, so truncated or corrupt files are never stored
+            img.load()
+        except (OSError, SyntaxError):
+            pass
+        else:
+            image_file.seek(0)
+            data = image_file.read()
+            # Nothing may follow the image (data appended after EOI is never stored)
+            if jpeg_end_offset(data) == len(data):
+                IMAGES_STORED.inc(kind=kind, path='as_is')
+                return data
+        image_file.seek(0)
+        img = Image.open(image_file)
+
     # Convert to RGB if necessary (for PNG with transparency)
     if img.mode in ('RGBA', 'LA', 'P'):
         background = Image.new('RGB', img.size, (255, 255, 255))
         if img.mode == 'P':
             img = img.convert('RGBA')
-        background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
+        background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
         img = background
+    elif img.mode != 'RGB':
+        img = img.convert('RGB')
+
+    img = img.resize(size, Image.Resampling.LANCZOS)
+    IMAGES_STORED.inc(kind=kind, path='reencoded')
+    return encode_jpeg(img)
+
+
+def process_and_save_image(image_file, year: int, section: str, register_number: str,
+                           db=None) -> Tuple[str, int]:
+    """
+    Process image: resize, compress, and save
+    Returns the storage key of the saved file and its perceptual hash
+    """
+    from app.perceptual_hash import dhash
+
+    # Generate filename
+    filename = f"{register_number}.jpg"
     
-    # Resize image to 300x300
-    img = img.resize(IMAGE_SIZE, Image.Resampling.LANCZOS)
+    # Resize image to 300x300 (skipped if the browser already did)
+    data = normalize_image(image_file, IMAGE_SIZE, 'photo')
     
-    # Save with compression
-    img.save(filepath, 'JPEG', quality=IMAGE_QUALITY, optimize=True)
+    # Hash the stored 300x300 version, so every photo is hashed the same way
+    photo_hash = dhash(data)
     
-    return filepath
+    # Save with compression
+    return get_storage().save(data, year, section, filename, db=db), photo_hash
 
 
-def process_and_save_signature(signature_file, year: int, section: str, register_number: str) -> str:
+def process_and_save_signature(signature_file, year: int, section: str, register_number: str, db=None) -> str:
     """
     Process signature image: resize, compress, and save
-    Returns the saved file path
+    Returns the storage key of the saved file
     """
-    # Create directory
-    upload_dir = create_upload_directory(year, section)
-    
     # Generate filename
     filename = f"{register_number}_signature.jpg"
-    filepath = os.path.join(upload_dir, filename)
     
-    # Open and process image
-    img = Image.open(signature_file)
-    
-    # Convert to RGB if necessary (for PNG with transparency)
-    if img.mode in ('RGBA', 'LA', 'P'):
-        background = Image.new('RGB', img.size, (255, 255, 255))
-        if img.mode == 'P':
-            img = img.convert('RGBA')
-        background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-        img = background
-    
-    # Resize signature to 200x100 (signature size)
-    signature_size = (200, 100)
-    img = img.resize(signature_size, Image.Resampling.LANCZOS)
+    # Resize signature to 200x100 (skipped if the browser already did)
+    data = normalize_image(signature_file, SIGNATURE_SIZE, 'signature')
     
     # Save with compression
-    img.save(filepath, 'JPEG', quality=IMAGE_QUALITY, optimize=True)
-    
-    return filepath
+    return get_storage().save(data, year, section, filename, db=db)
 
 
 def get_file_size(file) -> int:
@@ -177,6 +285,8 @@ def generate_csv_report(students_data: list, filename: str = None) -> str:
     
     filepath = os.path.join(reports_dir, filename)
     
+    import pandas as pd
+
     # Create DataFrame
     df = pd.DataFrame(students_data)
     
@@ -193,24 +303,15 @@ def generate_csv_report(students_data: list, filename: str = None) -> str:
     return filepath
 
 
-def get_weekly_registrations(students_data: list) -> list:
+def get_weekly_registrations(db) -> list:
     """
-    Filter students registered in the last 7 days
+    Students registered in the last 7 days, newest first, as report records
+    Thin wrapper over the date-range query in app.queries
     """
-    week_ago = datetime.now() - timedelta(days=7)
-    
-    weekly_students = []
-    for student in students_data:
-        created_at = student.get('created_at')
-        if created_at:
-            # Parse datetime string
-            if isinstance(created_at, str):
-                created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-            
-            if created_at.replace(tzinfo=None) >= week_ago:
-                weekly_students.append(student)
-    
-    return weekly_students
+    from app.models import rows_to_records
+    from app.queries import student_rows, weekly_range
+
+    return rows_to_records(student_rows(db, date_range=weekly_range()).all())
 
 
 def get_year_wise_count(students_data: list) -> dict:
@@ -245,6 +346,8 @@ def generate_excel_report_with_photos(students_data: list, filename: str = None)
     """
     Generate Excel report with embedded student photos
     """
+    from PIL import Image
+
     try:
         from openpyxl import Workbook
         from openpyxl.drawing.image import Image as XLImage
@@ -313,12 +416,14 @@ def generate_excel_report_with_photos(students_data: list, filename: str = None)
     ws.row_dimensions[1].height = 25
     
     # Add student data
+    embedding_seconds = 0.0
     for idx, student in enumerate(students_data, start=2):
         # Set row height for photo (80 pixels = approximately 60 points)
         ws.row_dimensions[idx].height = 80
         
         # Add photo if exists
-        photo_path = student.get('photo_path', '')
+        embedding_started = time.perf_counter()
+        photo_path = resolve_upload_path(student.get('photo_path'))
         if photo_path and os.path.exists(photo_path):
             try:
                 # Open and resize image directly for Excel
@@ -356,6 +461,7 @@ def generate_excel_report_with_photos(students_data: list, filename: str = None)
             cell = ws.cell(row=idx, column=1)
             cell.value = "No Photo"
             cell.alignment = Alignment(horizontal="center", vertical="center")
+        embedding_seconds += time.perf_counter() - embedding_started
         
         # Add other student data
         # Name
@@ -395,7 +501,8 @@ def generate_excel_report_with_photos(students_data: list, filename: str = None)
         cell.border = thin_border
         
         # Add signature if exists
-        signature_path = student.get('signature_path', '')
+        embedding_started = time.perf_counter()
+        signature_path = resolve_upload_path(student.get('signature_path'))
         if signature_path and os.path.exists(signature_path):
             try:
                 # Open and resize signature for Excel
@@ -427,6 +534,7 @@ def generate_excel_report_with_photos(students_data: list, filename: str = None)
             cell = ws.cell(row=idx, column=8)
             cell.value = "No Signature"
             cell.alignment = Alignment(horizontal="center", vertical="center")
+        embedding_seconds += time.perf_counter() - embedding_started
         
         # Registration Date
         cell = ws.cell(row=idx, column=9)
@@ -443,8 +551,11 @@ def generate_excel_report_with_photos(students_data: list, filename: str = None)
         cell.alignment = Alignment(vertical="center")
         cell.border = thin_border
     
+    REPORT_STAGE_SECONDS.observe(embedding_seconds, stage="image_embedding")
+    
     # Save workbook
-    wb.save(filepath)
+    with timed(REPORT_STAGE_SECONDS, stage="workbook_save"):
+        wb.save(filepath)
     
     # Clean up all temporary images after saving Excel
     try:
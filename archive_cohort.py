@@ -0,0 +1,69 @@
+"""
+Archive a graduated cohort's students (see app/partitions.py)
+
+Usage:
+    python archive_cohort.py                              # list year partitions and archives
+    python archive_cohort.py archive 3 [--label 2023]     # move year 3 into students_archive_2023_y3
+"""
+
+import argparse
+from datetime import date
+
+from app.database import database_label, engine
+from app.migrations import upgrade
+from app.partitions import archive_year, list_archives, list_partitions
+
+
+def show_tables():
+    print(f"🗄️  Database: {database_label()}")
+    with engine.connect() as connection:
+        partitions = list_partitions(connection)
+        archives = list_archives(connection)
+
+    if partitions:
+        print("📂 Year partitions:")
+        for partition in partitions:
+            print(f"   {partition['name']:<24} {partition['bound']:<24} {partition['rows']:>8} students")
+    else:
+        print("📂 students is a plain table (partitioning needs PostgreSQL)")
+
+    if archives:
+        print("📦 Archived cohorts:")
+        for archive in archives:
+            print(f"   {archive['name']:<40} {archive['rows']:>8} students")
+    else:
+        print("📦 No archived cohorts")
+
+
+def run_archive(year: int, label: str, confirmed: bool):
+    print(f"🗄️  Database: {database_label()}")
+    print(f"⚠️  Every year {year} student will move out of the students table into an archive table.")
+    if not confirmed and input("Type 'YES' to confirm: ") != "YES":
+        print("❌ Operation cancelled")
+        return
+
+    upgrade()
+    try:
+        with engine.begin() as connection:
+            result = archive_year(connection, year, label)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
+    print(f"✅ Archived {result['rows']} year {year} students into {result['archive']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", nargs="?", choices=("list", "archive"), default="list")
+    parser.add_argument("year", nargs="?", type=int, help="Year to archive")
+    parser.add_argument("--label", default=date.today().strftime("%Y%m%d"),
+                        help="Archive table label (default: today's date)")
+    parser.add_argument("--yes", action="store_true", help="Skip the confirmation prompt")
+    args = parser.parse_args()
+
+    if args.command == "archive":
+        if args.year is None:
+            parser.error("archive needs the year to archive")
+        run_archive(args.year, args.label, args.yes)
+    else:
+        show_tables()
@@ -0,0 +1,3 @@
+"""
+Performance benchmarks (run as modules from the repository root)
+"""
@@ -0,0 +1,160 @@
+"""
+Single-node registration throughput: SQLite (WAL and rollback journal) vs PostgreSQL
+
+Each configuration runs in a fresh interpreter (the engine is bound to
+DATABASE_URL at import time). It seeds the schema, then several worker
+processes, each with its own copy of the app, submit /api/register
+concurrently through an in-process ASGI client. That is the write contention
+a multi-worker deployment (serve.py) puts on one database.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_backends [--processes 4] [--registrations 1200]
+                                        [--postgres-url postgresql://...]
+
+SQLite runs use throwaway files. A Postgres URL must point at a dedicated
+benchmark database: its tables are dropped.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.common import (
+    REPO_ROOT,
+    configure_database,
+    enter_workdir,
+    reset_schema,
+    seed_students,
+    summarize,
+    write_results,
+)
+
+SQLITE_JOURNAL_MODES = ("WAL", "DELETE")
+
+
+def register_worker(indices: list, concurrency: int) -> tuple:
+    """
+    One worker process: import the app and submit its share of registrations
+    """
+    import httpx
+
+    from benchmarks.run_suite import submit_registrations
+
+    os.chdir(REPO_ROOT)
+    from app.main import app
+    enter_workdir()
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            return await submit_registrations(client, indices, concurrency)
+
+    return asyncio.run(run())
+
+
+def run_one(args) -> dict:
+    """
+    Benchmark the database in DATABASE_URL (runs in its own interpreter)
+    """
+    reset_schema()
+    seed_students(args.students, with_files=False)
+
+    shares = [list(range(k, args.registrations, args.processes)) for k in range(args.processes)]
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(args.processes) as pool:
+        started = time.perf_counter()
+        outcomes = pool.starmap(register_worker, [(share, args.concurrency) for share in shares])
+        elapsed = time.perf_counter() - started
+
+    timings = [t for worker_timings, _ in outcomes for t in worker_timings]
+    return {
+        **summarize(timings),
+        "registrations": args.registrations,
+        "processes": args.processes,
+        "concurrency_per_process": args.concurrency,
+        "failures": sum(failures for _, failures in outcomes),
+        "registrations_per_second": round(args.registrations / elapsed, 1),
+    }
+
+
+def run_configuration(name: str, database_url: str, journal_mode: str, args) -> dict:
+    """
+    Run one configuration in a fresh interpreter and return its results
+    """
+    env = dict(os.environ)
+    env["DATABASE_URL"] = database_url
+    if journal_mode:
+        env["SQLITE_JOURNAL_MODE"] = journal_mode
+
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as output:
+        output_path = output.name
+    try:
+        subprocess.run(
+            [
+                sys.executable, "-m", "benchmarks.bench_backends", "--run-one",
+                "--students", str(args.students),
+                "--registrations", str(args.registrations),
+                "--processes", str(args.processes),
+                "--concurrency", str(args.concurrency),
+                "--output", output_path,
+            ],
+            cwd=REPO_ROOT,
+            env=env,
+            check=True,
+        )
+        with open(output_path, encoding="utf-8") as f:
+            return {"configuration": name, **json.load(f)}
+    finally:
+        os.remove(output_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=10000, help="Students seeded before the run")
+    parser.add_argument("--registrations", type=int, default=1200, help="Registrations in total (max 2700)")
+    parser.add_argument("--processes", type=int, default=4, help="Worker processes writing concurrently")
+    parser.add_argument("--concurrency", type=int, default=8, help="Registrations in flight per process")
+    parser.add_argument("--postgres-url", help="Also benchmark this PostgreSQL database")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--run-one", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.registrations > 2700:
+        parser.error("--registrations is limited by free register numbers (3 years x 900)")
+
+    if args.run_one:
+        write_results(run_one(args), args.output)
+        return
+
+    configurations = [
+        (f"sqlite-{mode.lower()}", configure_database(prefix="bench_backends_"), mode)
+        for mode in SQLITE_JOURNAL_MODES
+    ]
+    if args.postgres_url:
+        configurations.append(("postgresql", args.postgres_url, None))
+
+    results = {"benchmark": "backends", "configurations": []}
+    for name, database_url, journal_mode in configurations:
+        print(f"⏱️  {name}...", file=sys.stderr)
+        results["configurations"].append(run_configuration(name, database_url, journal_mode, args))
+
+    print(json.dumps(results, indent=2))
+    for row in results["configurations"]:
+        print(
+            f"{row['configuration']:<16} {row['registrations_per_second']:>8} reg/s  "
+            f"p95 {row['p95_ms']:>8} ms  failures {row['failures']}",
+            file=sys.stderr,
+        )
+
+    if args.output:
+        write_results(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+ID card sheet rendering time and memory for a full year
+
+Seeds --students students (a third of them in year 1) with stored photos
+and signatures, then renders year 1's cards through id_card_sheets(), as
+/api/id-cards/1/all streams them, once as PDF and once as a ZIP of PNGs.
+Memory is traced in the server process while streaming: pages are
+composited in the worker pool and only about one encoded page per worker
+should be held at a time, whatever the number of pages.
+
+Checks (exit code 1 if one fails):
+- the PDF is complete (starts with %PDF-, ends with %%EOF)
+- each format renders within --budget-seconds
+- peak traced memory while streaming stays under --max-memory-mb
+
+Usage (from the repository root):
+    python -m benchmarks.bench_id_cards [--students 900] [--workers 4] [--template a4]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+from benchmarks.common import configure_database, enter_workdir, reset_schema, seed_students, write_results
+
+
+async def stream(students: list, template: str, fmt: str, pool, workers: int) -> dict:
+    from app.id_cards import id_card_sheets
+
+    size, head, tail = 0, b"", b""
+    tracemalloc.start()
+    started = time.perf_counter()
+    async for chunk in id_card_sheets(students, template, fmt, "bench", pool=pool, window=workers):
+        size += len(chunk)
+        head = head or chunk[:8]
+        tail = (tail + chunk)[-16:]
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "seconds": round(elapsed, 2),
+        "bytes": size,
+        "peak_traced_mb": round(peak / 1024 / 1024, 1),
+        "head": head,
+        "tail": tail,
+    }
+
+
+def run(count: int, workers: int, template: str) -> dict:
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    from app.database import SessionLocal
+    from app.id_cards import card_layout, card_students, page_count
+    from app.models import rows_to_records
+    from app.queries import student_rows
+
+    reset_schema()
+    seed_students(count, with_files=True)
+
+    db = SessionLocal()
+    try:
+        students = card_students(rows_to_records(student_rows(db, year=1).all()))
+    finally:
+        db.close()
+
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        # Start the workers (spawn, imports) before timing
+        list(pool.map(card_layout, [template] * workers))
+        results = {}
+        for fmt in ("pdf", "png"):
+            results[fmt] = asyncio.run(stream(students, template, fmt, pool, workers))
+    finally:
+        pool.shutdown()
+
+    pdf = results["pdf"]
+    return {
+        "benchmark": "id_cards",
+        "students": len(students),
+        "template": template,
+        "cards_per_page": card_layout(template).cards_per_page,
+        "pages": page_count(students, template),
+        "workers": workers,
+        "pdf_valid": pdf["head"].startswith(b"%PDF-") and pdf["tail"].rstrip().endswith(b"%%EOF"),
+        "formats": {
+            fmt: {key: value for key, value in result.items() if key not in ("head", "tail")}
+            for fmt, result in results.items()
+        },
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=900, help="Students to seed (a third are year 1)")
+    parser.add_argument("--workers", type=int, default=4, help="Rendering processes")
+    parser.add_argument("--template", default="a4", help="Sheet template (a4 or letter)")
+    parser.add_argument("--budget-seconds", type=float, default=10.0, help="Fail if a format takes longer")
+    parser.add_argument("--max-memory-mb", type=float, default=64.0,
+                        help="Fail if the server process traces more memory while streaming")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output) if args.output else None
+    configure_database(prefix="bench_id_cards_")
+    enter_workdir(prefix="bench_id_cards_work_")
+    results = run(args.students, args.workers, args.template)
+    print(json.dumps(results, indent=2))
+
+    if output:
+        write_results(results, output)
+
+    passed = results["pdf_valid"]
+    if not passed:
+        print("❌ The PDF is incomplete")
+    for fmt, result in results["formats"].items():
+        print(f"⏱️  {fmt}: {results['pages']} page(s) in {result['seconds']} s, "
+              f"{result['bytes']:,} bytes, peak {result['peak_traced_mb']} MB traced")
+        if result["seconds"] > args.budget_seconds:
+            print(f"❌ {fmt} took longer than {args.budget_seconds} s")
+            passed = False
+        if result["peak_traced_mb"] > args.max_memory_mb:
+            print(f"❌ {fmt} held more than {args.max_memory_mb} MB while streaming")
+            passed = False
+
+    if not passed:
+        sys.exit(1)
+    print(f"✅ {results['students']} cards rendered within budget")
@@ -0,0 +1,118 @@
+"""
+CPU cost of registration image processing: raw uploads vs browser-normalized
+
+The registration form now downscales the photo and signature in the browser
+to the exact targets (300x300 / 200x100 JPEG, quality 0.7) before upload, and
+app.utils.normalize_image stores such uploads without re-encoding them. This
+measures the server CPU time per registration (photo + signature) for:
+
+- raw: camera-sized JPEGs as uploaded before (decoded, resized, re-encoded)
+- normalized: what the browser now sends (verified and stored as-is)
+
+and checks that normalized uploads really take the fast path. Exits with
+code 1 if they do not.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_image_fast_path [--repeat 50] [--output results.json]
+"""
+
+import argparse
+import io
+import json
+import sys
+import time
+
+from benchmarks.common import configure_database, summarize, write_results
+
+# app.utils imports the storage layer, which reads DATABASE_URL at import time
+configure_database(prefix="bench_image_fast_path_")
+
+from app.utils import IMAGE_SIZE, SIGNATURE_SIZE, normalize_image  # noqa: E402
+
+# Typical phone camera frame and the quality script.js used to capture it
+RAW_SIZE = (1280, 960)
+RAW_QUALITY = 90
+
+
+def camera_like_jpeg(size: tuple, quality: int, seed: int) -> bytes:
+    """
+    A JPEG with gradient, tint and sensor-like noise (compresses like a photo)
+    """
+    from PIL import Image
+
+    width, height = size
+    img = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+    tint = Image.new("RGB", (width, height), ((seed * 37) % 256, (seed * 91) % 256, (seed * 53) % 256))
+    noise = Image.effect_noise((width, height), 40).convert("RGB")
+    img = Image.blend(Image.blend(img, tint, 0.4), noise, 0.15)
+    buffer = io.BytesIO()
+    img.save(buffer, "JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def browser_normalized(data: bytes, size: tuple) -> bytes:
+    """
+    Stand-in for the browser: resize and encode at quality 70, no EXIF
+    """
+    from PIL import Image
+
+    img = Image.open(io.BytesIO(data)).convert("RGB").resize(size, Image.Resampling.BILINEAR)
+    buffer = io.BytesIO()
+    img.save(buffer, "JPEG", quality=70)
+    return buffer.getvalue()
+
+
+def cpu_per_registration(photo: bytes, signature: bytes, repeat: int) -> tuple:
+    """
+    Process CPU milliseconds to normalize one photo and one signature;
+    returns (summary, stored as-is?)
+    """
+    timings, as_is = [], True
+    for _ in range(repeat):
+        started = time.process_time()
+        stored_photo = normalize_image(io.BytesIO(photo), IMAGE_SIZE, "photo")
+        stored_signature = normalize_image(io.BytesIO(signature), SIGNATURE_SIZE, "signature")
+        timings.append((time.process_time() - started) * 1000)
+        as_is = as_is and stored_photo == photo and stored_signature == signature
+    return summarize(timings), as_is
+
+
+def run(repeat: int) -> dict:
+    raw_photo = camera_like_jpeg(RAW_SIZE, RAW_QUALITY, seed=1)
+    raw_signature = camera_like_jpeg(RAW_SIZE, RAW_QUALITY, seed=2)
+    photo = browser_normalized(raw_photo, IMAGE_SIZE)
+    signature = browser_normalized(raw_signature, SIGNATURE_SIZE)
+
+    raw, _ = cpu_per_registration(raw_photo, raw_signature, repeat)
+    normalized, fast_path = cpu_per_registration(photo, signature, repeat)
+
+    return {
+        "benchmark": "image_fast_path",
+        "repeat": repeat,
+        "upload_bytes": {
+            "raw": len(raw_photo) + len(raw_signature),
+            "normalized": len(photo) + len(signature),
+        },
+        "cpu_ms_per_registration": {"raw": raw, "normalized": normalized},
+        "cpu_ms_saved_per_registration": round(raw["median_ms"] - normalized["median_ms"], 2),
+        "fast_path": fast_path,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=50, help="Registrations to time per variant")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+    print(json.dumps(results, indent=2))
+
+    if args.output:
+        write_results(results, args.output)
+
+    if results["fast_path"]:
+        print(f"✅ Normalized uploads stored as-is, {results['cpu_ms_saved_per_registration']} ms CPU saved per registration")
+    else:
+        print("❌ Normalized uploads were re-encoded (fast path not taken)")
+        sys.exit(1)
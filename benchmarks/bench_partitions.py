@@ -0,0 +1,157 @@
+"""
+Per-year report time as the number of cohorts in the students table grows
+
+For each cohort count N (default 1, 2, 4, 8) the schema is recreated and
+filled with N cohorts (years 1..N) of the same size, then the year report
+and section report queries for year 1 are timed. On PostgreSQL the students
+table is partitioned by year, so these should only read year 1's partition
+and stay flat as N grows; on SQLite the year/section index does the same job.
+
+Checks (exit code 1 if one fails):
+- PostgreSQL: the year 1 plans mention no other year's partition
+- the median year report time at the largest N is at most --max-growth
+  times the one at the smallest N
+
+Usage (from the repository root):
+    python -m benchmarks.bench_partitions [--per-cohort 20000] [--cohorts 1 2 4 8] [--database-url postgresql://...]
+
+Without --database-url a throwaway SQLite file is used. A Postgres URL must
+point at a dedicated benchmark database: its tables are dropped.
+"""
+
+import argparse
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.common import configure_database, reset_schema, time_calls, write_results
+
+
+def populate(engine, cohorts: int, per_cohort: int, batch_size: int = 5000) -> None:
+    """
+    `per_cohort` students in each of years 1..cohorts
+    """
+    from app.models import Student
+    from app.partitions import ensure_year_partition, is_partitioned
+
+    now = datetime.now(timezone.utc)
+    with engine.begin() as connection:
+        if is_partitioned(connection):
+            for year in range(1, cohorts + 1):
+                ensure_year_partition(connection, year)
+
+        rows = []
+        for year in range(1, cohorts + 1):
+            for i in range(per_cohort):
+                rows.append({
+                    "name": f"Student {year}-{i:06d}",
+                    "year": year,
+                    "section": "ABCD"[i % 4],
+                    "register_number": f"SEED{year:02d}{i:08d}",
+                    "photo_storage": 0,
+                    "has_ipad": bool(i % 2),
+                    "ipad_mac": 0xAABBCC000000 + i if i % 2 else None,
+                    "signature_storage": 0,
+                    "created_at": now - timedelta(minutes=(i * 7919) % (30 * 24 * 60)),
+                })
+                if len(rows) >= batch_size:
+                    connection.execute(Student.__table__.insert(), rows)
+                    rows.clear()
+        if rows:
+            connection.execute(Student.__table__.insert(), rows)
+
+
+def other_partitions_in_plan(connection, statement, cohorts: int) -> list:
+    """
+    Partitions other than year 1's named in the PostgreSQL plan of a query
+    """
+    from app.partitions import DEFAULT_PARTITION, partition_name
+
+    compiled = statement.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True})
+    plan = "\n".join(row[0] for row in connection.exec_driver_sql(f"EXPLAIN {compiled}"))
+    others = [partition_name(year) for year in range(2, cohorts + 1)] + [DEFAULT_PARTITION]
+    return [name for name in others if f" {name} " in f" {plan} ".replace("\n", " ")]
+
+
+def run(per_cohort: int, cohort_counts: list, repeat: int) -> dict:
+    from sqlalchemy import text
+
+    from app.database import SessionLocal, engine
+    from app.partitions import is_partitioned
+    from app.queries import student_rows
+
+    runs = []
+    for cohorts in cohort_counts:
+        reset_schema()
+        populate(engine, cohorts, per_cohort)
+
+        db = SessionLocal()
+        try:
+            db.execute(text("ANALYZE"))
+            db.commit()
+            year_report, _ = time_calls(lambda: student_rows(db, year=1).all(), repeat)
+            section_report, _ = time_calls(lambda: student_rows(db, year=1, section="A").all(), repeat)
+
+            connection = db.connection()
+            partitioned = is_partitioned(connection)
+            unpruned = []
+            if partitioned:
+                for query in (student_rows(db, year=1), student_rows(db, year=1, section="A")):
+                    unpruned += other_partitions_in_plan(connection, query.statement, cohorts)
+        finally:
+            db.close()
+
+        runs.append({
+            "cohorts": cohorts,
+            "total_students": cohorts * per_cohort,
+            "partitioned": partitioned,
+            "unpruned_partitions": sorted(set(unpruned)),
+            "year_report": year_report,
+            "section_report": section_report,
+        })
+
+    return {
+        "benchmark": "partitions",
+        "backend": engine.dialect.name,
+        "per_cohort": per_cohort,
+        "repeat": repeat,
+        "runs": runs,
+        "year_report_growth": round(runs[-1]["year_report"]["median_ms"] / max(runs[0]["year_report"]["median_ms"], 0.01), 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--per-cohort", type=int, default=20000, help="Students per cohort (year)")
+    parser.add_argument("--cohorts", type=int, nargs="+", default=[1, 2, 4, 8], help="Cohort counts to measure")
+    parser.add_argument("--repeat", type=int, default=10, help="Timed runs per query")
+    parser.add_argument("--max-growth", type=float, default=2.0,
+                        help="Fail if the year report slows down more than this factor")
+    parser.add_argument("--database-url", help="Measure this database instead of a temporary SQLite file")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    configure_database(args.database_url, prefix="bench_partitions_")
+    results = run(args.per_cohort, sorted(args.cohorts), args.repeat)
+    print(json.dumps(results, indent=2))
+
+    if args.output:
+        write_results(results, args.output)
+
+    passed = True
+    for entry in results["runs"]:
+        print(f"⏱️  {entry['cohorts']} cohort(s), {entry['total_students']:,} students: "
+              f"year report {entry['year_report']['median_ms']} ms, "
+              f"section report {entry['section_report']['median_ms']} ms")
+        if entry["unpruned_partitions"]:
+            print(f"❌ Year 1 queries also read {', '.join(entry['unpruned_partitions'])}")
+            passed = False
+
+    if results["year_report_growth"] > args.max_growth:
+        print(f"❌ Year report slowed down {results['year_report_growth']}x (limit {args.max_growth}x)")
+        passed = False
+    else:
+        print(f"✅ Year report time grew {results['year_report_growth']}x across cohort counts")
+
+    if not passed:
+        sys.exit(1)
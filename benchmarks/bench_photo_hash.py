@@ -0,0 +1,147 @@
+"""
+Perceptual photo hash: cost, robustness and duplicate lookup time
+
+- hashing: time of dhash() on a stored 300x300 photo (added to every registration)
+- robustness: each photo re-encoded at another quality, resized and
+  brightened must stay within PHOTO_DUPLICATE_DISTANCE bits of the
+  original, and unrelated photos must not
+- lookup: HashIndex search time with --students stored hashes, as
+  find_similar_photos() runs it at registration
+
+Checks (exit code 1 if one fails):
+- every edited photo is matched and no unrelated pair is
+- lookup p95 is at most --budget-ms
+
+Usage (from the repository root):
+    python -m benchmarks.bench_photo_hash [--students 100000] [--budget-ms 1] [--output results.json]
+"""
+
+import argparse
+import io
+import json
+import random
+import sys
+import time
+
+from benchmarks.common import configure_database, summarize, write_results
+
+# app.duplicates reads the environment through app.database at import time
+configure_database(prefix="bench_photo_hash_")
+
+from app.duplicates import PHOTO_DUPLICATE_DISTANCE  # noqa: E402
+from app.perceptual_hash import HashIndex, dhash, hamming  # noqa: E402
+from app.utils import IMAGE_SIZE, encode_jpeg  # noqa: E402
+
+
+def synthetic_photo(seed: int):
+    """
+    A smooth random 300x300 image (distinct seeds look unrelated)
+    """
+    from PIL import Image
+
+    rng = random.Random(seed)
+    cells = bytes(rng.randrange(256) for _ in range(3 * 12 * 12))
+    return Image.frombytes("RGB", (12, 12), cells).resize(IMAGE_SIZE, Image.Resampling.BICUBIC)
+
+
+def edited_versions(img) -> dict:
+    """
+    {edit: JPEG bytes} of the kinds of copies a reused photo arrives as
+    """
+    from PIL import Image, ImageEnhance
+
+    def jpeg(image, quality):
+        buffer = io.BytesIO()
+        image.save(buffer, "JPEG", quality=quality)
+        return buffer.getvalue()
+
+    width, height = IMAGE_SIZE
+    return {
+        "requality": jpeg(img, 35),
+        "resized": jpeg(img.resize((width // 2, height // 2)).resize(IMAGE_SIZE, Image.Resampling.LANCZOS), 70),
+        "brighter": jpeg(ImageEnhance.Brightness(img).enhance(1.2), 70),
+        "cropped": jpeg(img.crop((6, 6, width - 6, height - 6)).resize(IMAGE_SIZE, Image.Resampling.LANCZOS), 70),
+    }
+
+
+def run(photos: int, students: int, lookups: int) -> dict:
+    images = [synthetic_photo(seed) for seed in range(photos)]
+    stored = [encode_jpeg(img) for img in images]
+
+    timings = []
+    hashes = []
+    for data in stored:
+        started = time.perf_counter()
+        hashes.append(dhash(data))
+        timings.append((time.perf_counter() - started) * 1000)
+
+    edits, missed = {}, []
+    for i, img in enumerate(images):
+        for edit, data in edited_versions(img).items():
+            distance = hamming(hashes[i], dhash(data))
+            edits.setdefault(edit, []).append(distance)
+            if distance > PHOTO_DUPLICATE_DISTANCE:
+                missed.append({"photo": i, "edit": edit, "distance": distance})
+
+    unrelated = [hamming(hashes[i], hashes[j]) for i in range(photos) for j in range(i + 1, photos)]
+
+    # Index of random hashes plus the photos; queries are edited photos
+    rng = random.Random(1)
+    index = HashIndex()
+    for i in range(students):
+        index.add(rng.getrandbits(64), i)
+    for i, value in enumerate(hashes):
+        index.add(value, f"photo-{i}")
+    queries = [value ^ (1 << rng.randrange(64)) ^ (1 << rng.randrange(64)) for value in hashes]
+    lookup_timings = []
+    for n in range(lookups):
+        query = queries[n % len(queries)]
+        started = time.perf_counter()
+        index.search(query, PHOTO_DUPLICATE_DISTANCE)
+        lookup_timings.append((time.perf_counter() - started) * 1000)
+
+    return {
+        "benchmark": "photo_hash",
+        "distance": PHOTO_DUPLICATE_DISTANCE,
+        "photos": photos,
+        "indexed_hashes": len(index),
+        "hashing": summarize(timings),
+        "edit_max_distance": {edit: max(distances) for edit, distances in edits.items()},
+        "missed_edits": missed,
+        "unrelated_min_distance": min(unrelated) if unrelated else None,
+        "unrelated_matches": sum(1 for distance in unrelated if distance <= PHOTO_DUPLICATE_DISTANCE),
+        "lookup": summarize(lookup_timings),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--photos", type=int, default=40, help="Synthetic photos hashed and edited")
+    parser.add_argument("--students", type=int, default=100000, help="Hashes in the lookup index")
+    parser.add_argument("--lookups", type=int, default=2000, help="Timed index lookups")
+    parser.add_argument("--budget-ms", type=float, default=1.0, help="Fail if the lookup p95 exceeds this")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    results = run(args.photos, args.students, args.lookups)
+    print(json.dumps(results, indent=2))
+
+    if args.output:
+        write_results(results, args.output)
+
+    passed = True
+    print(f"⏱️  dhash: median {results['hashing']['median_ms']} ms; "
+          f"lookup in {results['indexed_hashes']:,} hashes: p95 {results['lookup']['p95_ms']} ms")
+    if results["missed_edits"]:
+        print(f"❌ {len(results['missed_edits'])} edited photo(s) were more than {results['distance']} bits away")
+        passed = False
+    if results["unrelated_matches"]:
+        print(f"❌ {results['unrelated_matches']} pair(s) of unrelated photos matched")
+        passed = False
+    if results["lookup"]["p95_ms"] > args.budget_ms:
+        print(f"❌ Lookup p95 {results['lookup']['p95_ms']} ms is over the {args.budget_ms} ms budget")
+        passed = False
+    if passed:
+        print("✅ Edited copies matched, unrelated photos kept apart, lookups within budget")
+    else:
+        sys.exit(1)
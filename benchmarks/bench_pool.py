@@ -0,0 +1,116 @@
+"""
+Connection pool saturation test
+
+Configures a deliberately small pool, then has more threads than connections
+each hold a connection for a while. The run shows queueing in the
+checkout wait-time histogram and, with a short timeout, checkout timeouts,
+which is what registration spikes look like from inside a worker.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_pool [--threads 32] [--pool-size 4] [--max-overflow 2]
+                                    [--hold-ms 50] [--pool-timeout 2]
+
+Uses a throwaway SQLite file unless --database-url points at a real server.
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+from benchmarks.common import configure_database, write_results
+
+
+def configure(args) -> None:
+    """
+    Pool settings must be in the environment before app.database is imported
+    """
+    configure_database(args.database_url, prefix="bench_pool_")
+    os.environ["DB_POOL_SIZE"] = str(args.pool_size)
+    os.environ["DB_MAX_OVERFLOW"] = str(args.max_overflow)
+    os.environ["DB_POOL_TIMEOUT"] = str(args.pool_timeout)
+
+
+def run(args) -> dict:
+    configure(args)
+
+    from sqlalchemy import text
+    from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+    from app.database import (
+        POOL_CHECKOUT_WAIT, POOL_CHECKOUT_TIMEOUTS, SessionLocal, pool_status
+    )
+
+    peak = {"checked_out": 0, "overflow_in_use": 0}
+    stop = threading.Event()
+
+    def sample_pool():
+        while not stop.is_set():
+            status = pool_status()
+            peak["checked_out"] = max(peak["checked_out"], status["checked_out"])
+            peak["overflow_in_use"] = max(peak["overflow_in_use"], status["overflow_in_use"])
+            time.sleep(0.005)
+
+    def worker():
+        for _ in range(args.iterations):
+            db = SessionLocal()
+            try:
+                db.execute(text("SELECT 1"))
+                time.sleep(args.hold_ms / 1000)
+            except PoolTimeoutError:
+                pass
+            finally:
+                db.close()
+
+    sampler = threading.Thread(target=sample_pool, daemon=True)
+    sampler.start()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    sampler.join()
+
+    wait = POOL_CHECKOUT_WAIT.snapshot()
+    return {
+        "benchmark": "pool",
+        "threads": args.threads,
+        "pool_size": args.pool_size,
+        "max_overflow": args.max_overflow,
+        "hold_ms": args.hold_ms,
+        "elapsed_s": round(elapsed, 2),
+        "checkouts": wait["count"],
+        "mean_checkout_wait_ms": round(wait["sum"] / wait["count"] * 1000, 2) if wait["count"] else 0,
+        "checkout_timeouts": POOL_CHECKOUT_TIMEOUTS.value(),
+        "peak_checked_out": peak["checked_out"],
+        "peak_overflow_in_use": peak["overflow_in_use"],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=32, help="Concurrent sessions competing for connections")
+    parser.add_argument("--iterations", type=int, default=10, help="Checkouts per thread")
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--max-overflow", type=int, default=2)
+    parser.add_argument("--pool-timeout", type=float, default=2.0)
+    parser.add_argument("--hold-ms", type=float, default=50.0, help="How long each session holds its connection")
+    parser.add_argument("--database-url", help="Run against this database instead of a temporary SQLite file")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    results = run(args)
+    print(json.dumps(results, indent=2))
+
+    if args.output:
+        write_results(results, args.output)
+
+    if results["peak_checked_out"] < args.pool_size:
+        print("⚠️  Pool was never saturated; increase --threads or --hold-ms", file=sys.stderr)
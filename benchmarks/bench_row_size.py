@@ -0,0 +1,224 @@
+"""
+Row size, index size and scan speed of the compact students table
+
+Builds the version 2 layout (has_ipad 'Yes'/'No', MAC as text, Integer
+year, full storage keys in String(500) columns) next to the current one
+(migration 3) with the same synthetic students, then reports:
+
+- table and index bytes (dbstat on SQLite, pg_relation_size on PostgreSQL)
+- average bytes per row
+- full scans: fetching every row, counting iPad owners, looking up a MAC
+
+Both tables use content-addressed keys, the default storage backend.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_row_size [--students 100000] [--repeat 5] [--database-url postgresql://...]
+
+Without --database-url a throwaway SQLite file is used. A Postgres URL must
+point at a dedicated benchmark database: its tables are dropped.
+"""
+
+import argparse
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.common import configure_database, reset_schema, time_calls, write_results
+
+LEGACY_TABLE = "students_v2"
+
+
+def legacy_table(metadata):
+    """
+    The students table as it was before migration 3, with the same indexes
+    """
+    from sqlalchemy import Column, DateTime, Index, Integer, String, Table
+
+    table = Table(
+        LEGACY_TABLE,
+        metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("name", String(255), nullable=False),
+        Column("year", Integer, nullable=False),
+        Column("section", String(1), nullable=False),
+        Column("register_number", String(50), unique=True, nullable=False, index=True),
+        Column("photo_path", String(500), nullable=False),
+        Column("has_ipad", String(3), nullable=True),
+        Column("ipad_mac_address", String(100), nullable=True),
+        Column("signature_path", String(500), nullable=True),
+        Column("created_at", DateTime(timezone=True)),
+    )
+    Index(f"ix_{LEGACY_TABLE}_year_section_created_at", table.c.year, table.c.section, table.c.created_at)
+    Index(f"ix_{LEGACY_TABLE}_created_at", table.c.created_at)
+    return table
+
+
+def synthetic_students(count: int):
+    """
+    Yield (id, name, year, section, register_number, photo digest,
+    signature digest, mac or None, created_at)
+    """
+    now = datetime.now(timezone.utc)
+    for i in range(count):
+        mac = 0xAABBCC000000 + (i & 0xFFFFFF) if i % 2 else None
+        yield (
+            i + 1,
+            f"Student {i:06d}",
+            i % 3 + 1,
+            "ABCD"[i % 4],
+            f"SEED{i:08d}",
+            hashlib.sha256(f"photo-{i}".encode()).digest(),
+            hashlib.sha256(f"signature-{i}".encode()).digest(),
+            mac,
+            now - timedelta(minutes=(i * 7919) % (30 * 24 * 60)),
+        )
+
+
+def populate(engine, legacy, count: int, batch_size: int = 5000) -> None:
+    from app.models import Student, format_mac_address, file_fields
+    from app.storage import CAS_PREFIX
+
+    compact_rows, legacy_rows = [], []
+
+    def flush(connection):
+        connection.execute(Student.__table__.insert(), compact_rows)
+        connection.execute(legacy.insert(), legacy_rows)
+        compact_rows.clear()
+        legacy_rows.clear()
+
+    with engine.begin() as connection:
+        for student_id, name, year, section, register_number, photo, signature, mac, created_at in synthetic_students(count):
+            photo_key = f"{CAS_PREFIX}{photo.hex()}"
+            signature_key = f"{CAS_PREFIX}{signature.hex()}"
+            compact_rows.append({
+                "id": student_id, "name": name, "year": year, "section": section,
+                "register_number": register_number,
+                **file_fields("photo", photo_key),
+                "has_ipad": mac is not None,
+                "ipad_mac": mac,
+                **file_fields("signature", signature_key),
+                "created_at": created_at,
+            })
+            legacy_rows.append({
+                "id": student_id, "name": name, "year": year, "section": section,
+                "register_number": register_number,
+                "photo_path": photo_key,
+                "has_ipad": "Yes" if mac is not None else "No",
+                "ipad_mac_address": format_mac_address(mac),
+                "signature_path": signature_key,
+                "created_at": created_at,
+            })
+            if len(compact_rows) >= batch_size:
+                flush(connection)
+        if compact_rows:
+            flush(connection)
+
+
+def table_sizes(connection, table: str) -> dict:
+    """
+    {table_bytes, index_bytes} of a table, or None values if unavailable
+    """
+    from sqlalchemy import text
+    from sqlalchemy.exc import DBAPIError
+
+    if connection.dialect.name == "postgresql":
+        # A partitioned table has no storage of its own: sum its partitions
+        row = connection.execute(text(
+            "SELECT COALESCE(SUM(pg_relation_size(relid)), 0), COALESCE(SUM(pg_indexes_size(relid)), 0) "
+            "FROM pg_partition_tree(CAST(:t AS regclass))"
+        ), {"t": table}).one()
+        return {"table_bytes": row[0], "index_bytes": row[1]}
+
+    try:
+        rows = connection.execute(text(
+            "SELECT d.name, m.type, SUM(d.pgsize) FROM dbstat d "
+            "JOIN sqlite_master m ON m.name = d.name "
+            "WHERE m.tbl_name = :t GROUP BY d.name, m.type"
+        ), {"t": table}).all()
+    except DBAPIError:
+        # SQLite built without SQLITE_ENABLE_DBSTAT_VTAB
+        return {"table_bytes": None, "index_bytes": None}
+    return {
+        "table_bytes": sum(size for _, kind, size in rows if kind == "table"),
+        "index_bytes": sum(size for _, kind, size in rows if kind == "index"),
+    }
+
+
+def run(students: int, repeat: int) -> dict:
+    from sqlalchemy import MetaData, func, select, text
+
+    from app.database import engine
+    from app.models import Student, parse_mac_address
+
+    reset_schema()
+    metadata = MetaData()
+    legacy = legacy_table(metadata)
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    populate(engine, legacy, students)
+
+    compact = Student.__table__
+    probe_mac = "AA:BB:CC:00:00:63"
+
+    with engine.connect() as connection:
+        if connection.dialect.name == "sqlite":
+            connection.execute(text("VACUUM"))
+        connection.execute(text("ANALYZE"))
+        connection.commit()
+
+        def scans(table, has_ipad_filter, mac_filter):
+            return {
+                "fetch_all": time_calls(lambda: connection.execute(select(table)).all(), repeat)[0],
+                "count_ipad_owners": time_calls(
+                    lambda: connection.execute(select(func.count()).select_from(table).where(has_ipad_filter)).scalar(),
+                    repeat,
+                )[0],
+                "mac_lookup": time_calls(
+                    lambda: connection.execute(select(table.c.id).where(mac_filter)).all(), repeat
+                )[0],
+            }
+
+        results = {}
+        for label, table, has_ipad_filter, mac_filter in (
+            ("v2", legacy, legacy.c.has_ipad == "Yes", legacy.c.ipad_mac_address == probe_mac),
+            ("compact", compact, compact.c.has_ipad.is_(True), compact.c.ipad_mac == parse_mac_address(probe_mac)),
+        ):
+            sizes = table_sizes(connection, table.name)
+            results[label] = {
+                **sizes,
+                "bytes_per_row": round(sizes["table_bytes"] / students, 1) if sizes["table_bytes"] else None,
+                "scans": scans(table, has_ipad_filter, mac_filter),
+            }
+
+    metadata.drop_all(engine)
+    return {
+        "benchmark": "row_size",
+        "backend": engine.dialect.name,
+        "students": students,
+        "repeat": repeat,
+        **results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=100000, help="Number of synthetic students")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per scan")
+    parser.add_argument("--database-url", help="Measure this database instead of a temporary SQLite file")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    configure_database(args.database_url, prefix="bench_row_size_")
+    results = run(args.students, args.repeat)
+    print(json.dumps(results, indent=2))
+
+    if args.output:
+        write_results(results, args.output)
+
+    before, after = results["v2"], results["compact"]
+    if before["table_bytes"] and after["table_bytes"]:
+        saved = 1 - after["table_bytes"] / before["table_bytes"]
+        print(f"📦 Table: {before['table_bytes']:,} -> {after['table_bytes']:,} bytes ({saved:.0%} smaller)")
+        print(f"📦 Indexes: {before['index_bytes']:,} -> {after['index_bytes']:,} bytes")
+    print(f"⏱️  Full fetch median: {before['scans']['fetch_all']['median_ms']} -> "
+          f"{after['scans']['fetch_all']['median_ms']} ms")
@@ -0,0 +1,186 @@
+"""
+Student search latency at 100k students
+
+The schema is recreated at the latest migration (so the pg_trgm indexes or
+the SQLite FTS5 table exist) and filled with synthetic students: names from
+common first and last names, 15-character register numbers in the real
+format (the first thousand of each year use the current YEAR_PREFIXES) and
+iPad MAC addresses for half of them. Each kind of query is then timed
+through search_students(), as /api/students/search runs it:
+
+- name prefix, full name and a misspelled name (fuzzy)
+- register number: exact, 3-digit suffix, 2-digit suffix, prefix
+- iPad MAC address in dash notation
+
+Checks (exit code 1 if one fails):
+- the search index exists (backend is not "scan")
+- p95 over every query is at most --budget-ms
+
+Usage (from the repository root):
+    python -m benchmarks.bench_search [--students 100000] [--budget-ms 20] [--database-url postgresql://...]
+
+Without --database-url a throwaway SQLite file is used. A Postgres URL must
+point at a dedicated benchmark database: its tables are dropped.
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.common import configure_database, reset_schema, summarize, write_results
+
+FIRST_NAMES = [
+    "Aarav", "Aditi", "Akash", "Ananya", "Arjun", "Bhavya", "Deepak", "Divya", "Gokul", "Harini",
+    "Ishaan", "Janani", "Karthik", "Kavya", "Lakshmi", "Madhan", "Meera", "Naveen", "Nithya", "Pooja",
+    "Pranav", "Priya", "Rahul", "Ramesh", "Sanjay", "Shreya", "Sneha", "Srinivas", "Swathi", "Varun",
+    "Vignesh", "Yamini",
+]
+LAST_NAMES = [
+    "Balaji", "Chandran", "Ganesan", "Iyer", "Krishnan", "Kumar", "Murugan", "Nair", "Natarajan", "Pillai",
+    "Raghavan", "Rajan", "Ramachandran", "Reddy", "Sharma", "Shankar", "Subramanian", "Sundaram",
+    "Venkatesh", "Vijayakumar",
+]
+
+
+def register_number(year: int, index: int) -> str:
+    """
+    RA<yy>11<department><3 digits>; block 0 of each year uses the real prefix
+    """
+    block, digits = divmod(index, 1000)
+    return f"RA{26 - year}11{26050 + block:06d}{digits:03d}"
+
+
+def populate(engine, count: int, batch_size: int = 5000) -> None:
+    from app.models import Student
+
+    rng = random.Random(42)
+    now = datetime.now(timezone.utc)
+    rows = []
+    with engine.begin() as connection:
+        for i in range(count):
+            year = i % 3 + 1
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice('ABCDEGKMNPRSTV')} {rng.choice(LAST_NAMES)}"
+            rows.append({
+                "name": name,
+                "year": year,
+                "section": "ABCD"[i % 4],
+                "register_number": register_number(year, i // 3),
+                "photo_storage": 0,
+                "has_ipad": bool(i % 2),
+                "ipad_mac": 0x3C22FB000000 + i if i % 2 else None,
+                "signature_storage": 0,
+                "created_at": now - timedelta(minutes=(i * 7919) % (30 * 24 * 60)),
+            })
+            if len(rows) >= batch_size:
+                connection.execute(Student.__table__.insert(), rows)
+                rows.clear()
+        if rows:
+            connection.execute(Student.__table__.insert(), rows)
+
+
+def sample_queries(count: int, samples: int) -> dict:
+    """
+    {kind: [query strings]} drawn from the seeded data
+    """
+    rng = random.Random(7)
+    students = [rng.randrange(count) for _ in range(samples)]
+    macs = [i if i % 2 else i + 1 for i in students]
+
+    def misspell(name: str) -> str:
+        # Swap two adjacent letters after the first
+        i = rng.randrange(1, len(name) - 1)
+        return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+
+    return {
+        "name_prefix": [rng.choice(FIRST_NAMES)[:3] for _ in range(samples)],
+        "full_name": [f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" for _ in range(samples)],
+        "misspelled_name": [misspell(rng.choice(LAST_NAMES)) for _ in range(samples)],
+        "register_exact": [register_number(i % 3 + 1, i // 3) for i in students],
+        "register_suffix_3": [f"{rng.randrange(1000):03d}" for _ in range(samples)],
+        "register_suffix_2": [f"{rng.randrange(100):02d}" for _ in range(samples)],
+        "register_prefix": [register_number(i % 3 + 1, i // 3)[:12] for i in students],
+        "mac_address": ["-".join(f"{0x3C22FB000000 + i:012x}"[j:j + 2] for j in range(0, 12, 2))
+                        for i in macs if i < count],
+    }
+
+
+def run(count: int, samples: int, repeat: int, page_size: int) -> dict:
+    from sqlalchemy import text
+
+    from app.database import SessionLocal, engine
+    from app.search import search_backend, search_students
+
+    reset_schema()
+    populate(engine, count)
+
+    db = SessionLocal()
+    try:
+        db.execute(text("ANALYZE"))
+        db.commit()
+        backend = search_backend(db)
+
+        kinds, everything, empty = {}, [], {}
+        for kind, queries in sample_queries(count, samples).items():
+            timings, misses = [], 0
+            for q in queries:
+                # The first call warms caches; only the repeats are timed
+                result = search_students(db, q, page_size=page_size)
+                misses += not result["results"]
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    search_students(db, q, page_size=page_size)
+                    timings.append((time.perf_counter() - started) * 1000)
+            kinds[kind] = summarize(timings)
+            everything += timings
+            empty[kind] = misses
+    finally:
+        db.close()
+
+    return {
+        "benchmark": "search",
+        "backend": engine.dialect.name,
+        "search_backend": backend,
+        "students": count,
+        "page_size": page_size,
+        "queries": kinds,
+        "queries_without_results": empty,
+        "overall": summarize(everything),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=100000, help="Students to seed")
+    parser.add_argument("--samples", type=int, default=20, help="Different queries per kind")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per query")
+    parser.add_argument("--page-size", type=int, default=20, help="page_size passed to the search")
+    parser.add_argument("--budget-ms", type=float, default=20.0, help="Fail if the overall p95 exceeds this")
+    parser.add_argument("--database-url", help="Measure this database instead of a temporary SQLite file")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    configure_database(args.database_url, prefix="bench_search_")
+    results = run(args.students, args.samples, args.repeat, args.page_size)
+    print(json.dumps(results, indent=2))
+
+    if args.output:
+        write_results(results, args.output)
+
+    passed = True
+    for kind, summary in results["queries"].items():
+        print(f"⏱️  {kind}: median {summary['median_ms']} ms, p95 {summary['p95_ms']} ms")
+
+    if results["search_backend"] == "scan":
+        print("❌ No search index (pg_trgm or FTS5 trigram), queries scan the table")
+        passed = False
+    if results["overall"]["p95_ms"] > args.budget_ms:
+        print(f"❌ Search p95 {results['overall']['p95_ms']} ms is over the {args.budget_ms} ms budget")
+        passed = False
+    else:
+        print(f"✅ Search p95 {results['overall']['p95_ms']} ms at {results['students']:,} students")
+
+    if not passed:
+        sys.exit(1)
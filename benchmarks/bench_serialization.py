@@ -0,0 +1,97 @@
+"""
+Serialization benchmark for /api/students
+
+Compares the old path (ORM objects -> to_dict() -> stdlib json) with the
+current one (selected row tuples -> rows_to_dicts() -> FastJSONResponse) and
+reports payload bytes raw, gzip and brotli.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_serialization [--students 10000] [--output results.json]
+"""
+
+import argparse
+import gzip
+import json
+
+from benchmarks.common import configure_database, reset_schema, seed_students, time_calls, write_results
+
+# Benchmarks run against a throwaway SQLite file, never the configured database
+configure_database(prefix="bench_serialization_")
+
+from app.database import SessionLocal  # noqa: E402
+from app.models import Student, rows_to_dicts, student_columns  # noqa: E402
+from app.responses import FastJSONResponse  # noqa: E402
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def orm_path() -> bytes:
+    """
+    Previous implementation: hydrate ORM objects, to_dict(), stdlib json
+    """
+    db = SessionLocal()
+    try:
+        students = db.query(Student).order_by(Student.created_at.desc()).all()
+        payload = {"total": len(students), "students": [student.to_dict() for student in students]}
+        return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    finally:
+        db.close()
+
+
+def row_path() -> bytes:
+    """
+    Current implementation: row tuples straight to dicts, FastJSONResponse
+    """
+    db = SessionLocal()
+    try:
+        students_data = rows_to_dicts(
+            db.query(*student_columns()).order_by(Student.created_at.desc()).all()
+        )
+        return FastJSONResponse({"total": len(students_data), "students": students_data}).body
+    finally:
+        db.close()
+
+
+def payload_sizes(body: bytes) -> dict:
+    """
+    Payload bytes uncompressed and with each supported encoding
+    """
+    sizes = {"raw": len(body), "gzip": len(gzip.compress(body, compresslevel=6))}
+    if brotli is not None:
+        sizes["br"] = len(brotli.compress(body, quality=4))
+    return sizes
+
+
+def run(students: int, repeat: int) -> dict:
+    reset_schema()
+    seed_students(students, with_files=False)
+
+    orm, _ = time_calls(orm_path, repeat)
+    rows, body = time_calls(row_path, repeat)
+
+    return {
+        "benchmark": "serialization",
+        "students": students,
+        "repeat": repeat,
+        "orm_to_dict_json": orm,
+        "row_tuples_fast_json": rows,
+        "speedup": round(orm["median_ms"] / rows["median_ms"], 2) if rows["median_ms"] else None,
+        "payload_bytes": payload_sizes(body),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=10000, help="Number of synthetic students")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per implementation")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    results = run(args.students, args.repeat)
+    print(json.dumps(results, indent=2))
+
+    if args.output:
+        write_results(results, args.output)
@@ -0,0 +1,104 @@
+"""
+Cold-start import budget for app.main
+
+Runs ``python -X importtime -c "import app.main"`` in fresh interpreters and
+fails (exit code 1) if:
+
+- the median cumulative import time of app.main exceeds the budget, or
+- any dependency that must stay lazy (pandas, openpyxl, PIL) was imported.
+
+Wire it into CI next to the other checks so startup regressions are caught
+before deployment.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_startup [--budget-ms 1500] [--runs 5] [--output results.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Heavy dependencies that must only load on the code path that needs them
+LAZY_MODULES = {"pandas", "openpyxl", "PIL"}
+
+DEFAULT_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "1500"))
+
+
+def import_profile() -> tuple:
+    """
+    Import app.main in a fresh interpreter
+    Returns (cumulative import time in ms, set of top-level modules imported)
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"import app.main failed:\n{completed.stderr[-2000:]}")
+
+    cumulative_us = None
+    modules = set()
+    # Lines look like: "import time:       412 |       9035 |   app.main"
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = [part.strip() for part in line[len("import time:"):].split("|")]
+        if len(parts) != 3 or not parts[1].isdigit():
+            continue
+        name = parts[2]
+        modules.add(name.split(".")[0])
+        if name == "app.main":
+            cumulative_us = int(parts[1])
+
+    if cumulative_us is None:
+        raise RuntimeError("app.main not found in -X importtime output")
+    return cumulative_us / 1000, modules
+
+
+def run(runs: int, budget_ms: float) -> dict:
+    timings = []
+    eager_modules = set()
+    for _ in range(runs):
+        elapsed_ms, modules = import_profile()
+        timings.append(elapsed_ms)
+        eager_modules |= modules & LAZY_MODULES
+
+    median_ms = statistics.median(timings)
+    return {
+        "benchmark": "startup",
+        "runs": runs,
+        "budget_ms": budget_ms,
+        "min_ms": round(min(timings), 1),
+        "median_ms": round(median_ms, 1),
+        "eagerly_imported": sorted(eager_modules),
+        "passed": median_ms <= budget_ms and not eager_modules,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="Maximum median import time of app.main")
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh interpreters to time")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    results = run(args.runs, args.budget_ms)
+    print(json.dumps(results, indent=2))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if not results["passed"]:
+        if results["eagerly_imported"]:
+            print(f"❌ Imported at startup but should be lazy: {', '.join(results['eagerly_imported'])}")
+        if results["median_ms"] > results["budget_ms"]:
+            print(f"❌ Startup import took {results['median_ms']} ms (budget {results['budget_ms']} ms)")
+        sys.exit(1)
+
+    print("✅ Startup import within budget")
@@ -0,0 +1,123 @@
+"""
+Load test: throughput vs. number of server workers
+
+Starts serve.py with each worker count in turn, drives it with several client
+processes over keep-alive connections for a fixed duration, and reports
+requests per second so the scaling with worker count is visible.
+
+The default target is /api/get-prefix/1, which exercises routing and JSON
+rendering without touching the database. Pass --path to load other routes.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_workers [--workers 1 2 4] [--clients 8] [--duration 10]
+"""
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+
+def wait_until_ready(port: int, timeout: float = 30.0) -> None:
+    """
+    Poll /health until the server answers
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                conn.close()
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server on port {port} did not become ready")
+
+
+def client_loop(port: int, path: str, duration: float) -> tuple:
+    """
+    Send requests over one keep-alive connection for `duration` seconds
+    Returns (completed requests, errors)
+    """
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    completed = errors = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        try:
+            conn.request("GET", path)
+            response = conn.getresponse()
+            response.read()
+            if response.status == 200:
+                completed += 1
+            else:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    conn.close()
+    return completed, errors
+
+
+def measure(workers: int, port: int, clients: int, duration: float, path: str) -> dict:
+    """
+    Start the server with `workers` processes and measure throughput
+    """
+    server = subprocess.Popen(
+        [sys.executable, "serve.py", "--workers", str(workers), "--port", str(port),
+         "--host", "127.0.0.1", "--max-requests", "0"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        env={**os.environ},
+    )
+    try:
+        wait_until_ready(port)
+        with multiprocessing.Pool(clients) as pool:
+            started = time.perf_counter()
+            results = pool.starmap(client_loop, [(port, path, duration)] * clients)
+            elapsed = time.perf_counter() - started
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+    completed = sum(r[0] for r in results)
+    errors = sum(r[1] for r in results)
+    return {
+        "workers": workers,
+        "requests": completed,
+        "errors": errors,
+        "requests_per_second": round(completed / elapsed, 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="Worker counts to compare")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent client processes")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load per worker count")
+    parser.add_argument("--path", default="/api/get-prefix/1", help="Route to load")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    runs = [measure(w, args.port, args.clients, args.duration, args.path) for w in args.workers]
+    baseline = runs[0]["requests_per_second"] or 1
+    for run in runs:
+        run["scaling"] = round(run["requests_per_second"] / baseline, 2)
+
+    results = {"benchmark": "workers", "path": args.path, "clients": args.clients,
+               "duration_s": args.duration, "runs": runs}
+    print(json.dumps(results, indent=2))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,136 @@
+"""
+Query-plan check for the report, listing and statistics queries
+
+Seeds a database at the latest migration, runs EXPLAIN on every query built
+by app.queries and fails (exit code 1) if a query the indexes are meant to
+serve is planned without them.
+
+Some checks are only strict on SQLite: PostgreSQL's cost-based planner may
+legitimately prefer a sequential scan when a query reads a large share of
+the table (e.g. every student of one year), so there those are reported as
+warnings instead.
+
+Usage (from the repository root):
+    python -m benchmarks.check_query_plans [--students 20000] [--database-url postgresql://...]
+
+Without --database-url a throwaway SQLite file is used. A Postgres URL must
+point at a dedicated benchmark database: its tables are dropped.
+"""
+
+import argparse
+import json
+import sys
+
+from benchmarks.common import configure_database, reset_schema, seed_students, write_results
+
+COMPOSITE_INDEX = "ix_students_year_section_created_at"
+CREATED_AT_INDEX = "ix_students_created_at"
+
+# PostgreSQL plans name the per-partition copies (students_y1_year_section_created_at_idx, ...)
+COMPOSITE_PARTITION_INDEX = "_year_section_created_at_idx"
+CREATED_AT_PARTITION_INDEX = "_created_at_idx"
+
+BOTH = ("sqlite", "postgresql")
+SQLITE_ONLY = ("sqlite",)
+
+
+def plan_checks(db) -> list:
+    """
+    (name, query, acceptable indexes, backends where the check is strict)
+    """
+    from app.queries import (
+        registered_since_query,
+        section_count_query,
+        student_rows,
+        weekly_cutoff,
+        year_count_query,
+    )
+
+    return [
+        ("section report", student_rows(db, year=1, section="A"), (COMPOSITE_INDEX, COMPOSITE_PARTITION_INDEX), BOTH),
+        ("weekly count", registered_since_query(db, weekly_cutoff()), (CREATED_AT_INDEX, CREATED_AT_PARTITION_INDEX), BOTH),
+        ("year report", student_rows(db, year=1), (COMPOSITE_INDEX,), SQLITE_ONLY),
+        ("all students", student_rows(db), (CREATED_AT_INDEX,), SQLITE_ONLY),
+        ("year counts", year_count_query(db), (COMPOSITE_INDEX,), SQLITE_ONLY),
+        ("section counts", section_count_query(db), (COMPOSITE_INDEX,), SQLITE_ONLY),
+    ]
+
+
+def explain(db, query) -> str:
+    """
+    The database's plan for a Query, as text
+    """
+    bind = db.get_bind()
+    compiled = query.statement.compile(dialect=bind.dialect)
+    params = compiled.construct_params()
+    if compiled.positiontup:
+        params = tuple(params[name] for name in compiled.positiontup)
+
+    prefix = "EXPLAIN QUERY PLAN " if bind.dialect.name == "sqlite" else "EXPLAIN "
+    with bind.connect() as connection:
+        rows = connection.exec_driver_sql(prefix + compiled.string, params).fetchall()
+    # SQLite: (id, parent, notused, detail); PostgreSQL: one text column per line
+    return "\n".join(str(row[-1]) for row in rows)
+
+
+def run(students: int) -> dict:
+    from sqlalchemy import text
+
+    from app.database import SessionLocal
+
+    reset_schema()
+    # A year of history so date windows are as selective as in production
+    seed_students(students, with_files=False, days=365)
+
+    db = SessionLocal()
+    try:
+        backend = db.get_bind().dialect.name
+        db.execute(text("ANALYZE"))
+        db.commit()
+
+        checks = []
+        for name, query, indexes, strict_on in plan_checks(db):
+            plan = explain(db, query)
+            checks.append({
+                "query": name,
+                "uses_index": any(index in plan for index in indexes),
+                "strict": backend in strict_on,
+                "expected": list(indexes),
+                "plan": plan,
+            })
+    finally:
+        db.close()
+
+    return {
+        "benchmark": "query_plans",
+        "backend": backend,
+        "students": students,
+        "checks": checks,
+        "passed": all(check["uses_index"] for check in checks if check["strict"]),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=20000, help="Number of synthetic students")
+    parser.add_argument("--database-url", help="Check this database instead of a temporary SQLite file")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    configure_database(args.database_url, prefix="check_query_plans_")
+    results = run(args.students)
+    print(json.dumps(results, indent=2))
+
+    if args.output:
+        write_results(results, args.output)
+
+    for check in results["checks"]:
+        if check["uses_index"]:
+            print(f"✅ {check['query']}")
+        elif check["strict"]:
+            print(f"❌ {check['query']}: expected {' or '.join(check['expected'])}")
+        else:
+            print(f"⚠️  {check['query']}: planned without {' or '.join(check['expected'])}")
+
+    if not results["passed"]:
+        sys.exit(1)
@@ -0,0 +1,126 @@
+"""
+Read-replica routing check with two local SQLite files
+
+The primary and the "replica" are separate database files; the replica is
+only brought up to date when this script copies the primary into it (SQLite
+backup API), so replication lag is under the script's control:
+
+1. register a student through /api/register (written to the primary),
+2. a client without the read-your-writes cookie must not see it yet on
+   /api/stats and /api/students (they read the stale replica),
+3. the registering client (cookie set) must see it (read from the primary),
+4. after syncing the replica, every client sees it,
+5. writes through the replica engine must be refused.
+
+Exits with code 1 if any step fails.
+
+Usage (from the repository root):
+    python -m benchmarks.check_replica_routing
+"""
+
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+
+from benchmarks.common import REPO_ROOT, enter_workdir, generate_image_bytes
+
+# Both URLs must be set before app.database is imported
+_directory = tempfile.mkdtemp(prefix="check_replica_routing_")
+PRIMARY_PATH = os.path.join(_directory, "primary.db")
+REPLICA_PATH = os.path.join(_directory, "replica.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{PRIMARY_PATH}"
+os.environ["DATABASE_REPLICA_URL"] = f"sqlite:///{REPLICA_PATH}"
+
+
+def sync_replica() -> None:
+    """
+    Copy the primary into the replica, standing in for replication
+    """
+    source = sqlite3.connect(PRIMARY_PATH)
+    target = sqlite3.connect(REPLICA_PATH)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+
+async def total_students(client) -> tuple:
+    stats = (await client.get("/api/stats")).json()
+    listing = (await client.get("/api/students")).json()
+    return stats["total_students"], listing["total"]
+
+
+async def run_checks(app) -> list:
+    import httpx
+
+    from app.database import replica_engine
+
+    checks = []
+
+    def check(name: str, passed: bool, detail: str = "") -> None:
+        checks.append((name, passed, detail))
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://check") as student, \
+            httpx.AsyncClient(transport=transport, base_url="http://check") as dashboard:
+        response = await student.post(
+            "/api/register",
+            data={
+                "name": "Replica Check",
+                "year": "1",
+                "section": "A",
+                "last_digits": "001",
+                "has_ipad": "No",
+            },
+            files={
+                "photo": ("photo.jpg", generate_image_bytes((300, 300), 1), "image/jpeg"),
+                "signature": ("signature.jpg", generate_image_bytes((200, 100), 2), "image/jpeg"),
+            },
+        )
+        check("registration accepted", response.status_code == 200, response.text[:200])
+        check("read-your-writes cookie set", "read_primary_until" in response.cookies)
+
+        stale = await total_students(dashboard)
+        check("other clients read the replica (stale)", stale == (0, 0), f"stats/list totals {stale}")
+
+        own = await total_students(student)
+        check("registering client reads its write", own == (1, 1), f"stats/list totals {own}")
+
+        sync_replica()
+        synced = await total_students(dashboard)
+        check("replica serves the row after sync", synced == (1, 1), f"stats/list totals {synced}")
+
+    try:
+        with replica_engine.begin() as connection:
+            connection.exec_driver_sql("DELETE FROM students")
+        check("replica refuses writes", False, "DELETE succeeded")
+    except Exception as e:
+        check("replica refuses writes", True, type(e).__name__)
+
+    return checks
+
+
+def main():
+    # Import the app from the repository root, then work in a scratch directory
+    sys.path.insert(0, REPO_ROOT)
+    from app.main import app
+    from app.migrations import upgrade
+
+    enter_workdir(prefix="check_replica_routing_work_")
+    upgrade()
+    sync_replica()
+
+    checks = asyncio.run(run_checks(app))
+    for name, passed, detail in checks:
+        suffix = f" ({detail})" if detail else ""
+        print(f"{'✅' if passed else '❌'} {name}{suffix}")
+
+    if not all(passed for _, passed, _ in checks):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
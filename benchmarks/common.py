@@ -0,0 +1,188 @@
+"""
+Shared helpers for the benchmark suite: database setup, synthetic data,
+timing and result files
+
+configure_database() must run before anything imports app.database, since
+the engine is created from DATABASE_URL at import time.
+"""
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def configure_database(database_url: str = None, prefix: str = "bench_") -> str:
+    """
+    Point the application at a benchmark database and return its URL
+
+    Without an explicit URL a throwaway SQLite file is used, never the
+    database configured in .env.
+    """
+    if not database_url:
+        bench_dir = tempfile.mkdtemp(prefix=prefix)
+        database_url = f"sqlite:///{os.path.join(bench_dir, 'bench.db')}"
+    os.environ["DATABASE_URL"] = database_url
+    return database_url
+
+
+def enter_workdir(prefix: str = "bench_work_") -> str:
+    """
+    Run from a temporary directory so uploads/ and reports/ written by the
+    benchmark never land in the repository
+    """
+    workdir = tempfile.mkdtemp(prefix=prefix)
+    os.chdir(workdir)
+    os.makedirs("uploads", exist_ok=True)
+    os.makedirs(os.path.join("reports", "temp"), exist_ok=True)
+    return workdir
+
+
+def reset_schema() -> None:
+    """
+    Drop all tables and recreate the schema at the latest migration
+    """
+    from app.database import Base, engine
+    from app.migrations import upgrade
+
+    Base.metadata.drop_all(bind=engine)
+    upgrade()
+
+
+def generate_image_bytes(size: tuple, seed: int) -> bytes:
+    """
+    A deterministic JPEG of the given size (gradient plus a seed-dependent tint)
+    """
+    import io
+    from PIL import Image
+
+    width, height = size
+    img = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+    tint = Image.new("RGB", (width, height), ((seed * 37) % 256, (seed * 91) % 256, (seed * 53) % 256))
+    img = Image.blend(img, tint, 0.4)
+    buffer = io.BytesIO()
+    img.save(buffer, "JPEG", quality=70)
+    return buffer.getvalue()
+
+
+def seed_students(count: int, with_files: bool = True, distinct_images: int = 64, batch_size: int = 5000,
+                  days: int = 30) -> None:
+    """
+    Insert `count` synthetic students spread over the last `days` days
+
+    With files, `distinct_images` photos and signatures are generated and
+    stored through the configured storage backend, then shared round-robin
+    (content-addressed storage keeps one copy of each). Register numbers use
+    a format the registration form cannot produce, so every real
+    year/last-digits combination stays free for /api/register benchmarks.
+    """
+    from app.database import SessionLocal
+    from app.models import StoredObject, Student, file_fields
+    from app.storage import CAS_PREFIX, get_storage
+
+    photo_keys, signature_keys, sizes = [None], [None], {}
+    if with_files:
+        storage = get_storage()
+        photo_keys, signature_keys = [], []
+        for i in range(distinct_images):
+            photo = generate_image_bytes((300, 300), i)
+            signature = generate_image_bytes((200, 100), i + distinct_images)
+            photo_keys.append(storage.save(photo, 1, "A", f"SEED{i:05d}.jpg"))
+            signature_keys.append(storage.save(signature, 1, "A", f"SEED{i:05d}_signature.jpg"))
+            sizes[photo_keys[-1]] = len(photo)
+            sizes[signature_keys[-1]] = len(signature)
+
+    now = datetime.now(timezone.utc)
+    window_minutes = days * 24 * 60
+    db = SessionLocal()
+    try:
+        for start in range(0, count, batch_size):
+            db.bulk_insert_mappings(Student, [
+                {
+                    "name": f"Student {i:06d}",
+                    "year": i % 3 + 1,
+                    "section": "ABCD"[i % 4],
+                    "register_number": f"SEED{i:08d}",
+                    **file_fields("photo", photo_keys[i % len(photo_keys)] or f"uploads/seed/{i}.jpg"),
+                    **file_fields("signature", signature_keys[i % len(signature_keys)]),
+                    "has_ipad": bool(i % 2),
+                    "ipad_mac": 0xAABBCC000000 + (i & 0xFFFFFF) if i % 2 else None,
+                    "created_at": now - timedelta(minutes=(i * 7919) % window_minutes),
+                }
+                for i in range(start, min(start + batch_size, count))
+            ])
+            db.commit()
+
+        # stored_objects rows for the shared content-addressed files
+        used = set()
+        for i in range(count if with_files else 0):
+            used.add(photo_keys[i % len(photo_keys)])
+            used.add(signature_keys[i % len(signature_keys)])
+        db.bulk_insert_mappings(StoredObject, [
+            {"digest": key[len(CAS_PREFIX):], "size": sizes[key]}
+            for key in used
+            if key.startswith(CAS_PREFIX)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+def summarize(timings_ms: list) -> dict:
+    """
+    min / median / p95 / max of a list of millisecond timings
+    """
+    ordered = sorted(timings_ms)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    return {
+        "runs": len(ordered),
+        "min_ms": round(ordered[0], 2),
+        "median_ms": round(statistics.median(ordered), 2),
+        "p95_ms": round(p95, 2),
+        "max_ms": round(ordered[-1], 2),
+    }
+
+
+def time_calls(func, repeat: int) -> tuple:
+    """
+    Call func `repeat` times; return (summary, last result)
+    """
+    timings, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return summarize(timings), result
+
+
+def environment_info(database_url: str) -> dict:
+    """
+    Context recorded with every result file so runs can be compared
+    """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "database": database_url.split(":", 1)[0],
+    }
+
+
+def write_results(results: dict, path: str) -> None:
+    """
+    Write results as JSON (pass an absolute path if enter_workdir() was used)
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
@@ -0,0 +1,53 @@
+"""
+Compare two benchmark result files
+
+Prints every median timing and throughput found in both files with the
+relative change, e.g. between the results of two commits.
+
+Usage (from the repository root):
+    python -m benchmarks.compare baseline.json candidate.json
+"""
+
+import argparse
+import json
+
+COMPARED_KEYS = ("median_ms", "p95_ms", "registrations_per_second", "requests_per_second")
+
+
+def flatten(results, prefix: str = "") -> dict:
+    """
+    Map "sizes.1000.reads./api/stats.median_ms" style paths to numbers
+    """
+    flat = {}
+    if isinstance(results, dict):
+        for key, value in results.items():
+            flat.update(flatten(value, f"{prefix}{key}."))
+    elif isinstance(results, (int, float)) and prefix.rstrip(".").rsplit(".", 1)[-1] in COMPARED_KEYS:
+        flat[prefix.rstrip(".")] = results
+    return flat
+
+
+def compare(baseline: dict, candidate: dict) -> list:
+    old, new = flatten(baseline), flatten(candidate)
+    rows = []
+    for path in sorted(old.keys() & new.keys()):
+        change = (new[path] - old[path]) / old[path] * 100 if old[path] else 0.0
+        rows.append((path, old[path], new[path], change))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    args = parser.parse_args()
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.candidate, encoding="utf-8") as f:
+        candidate = json.load(f)
+
+    print(f"baseline:  {baseline.get('environment', {}).get('commit')}")
+    print(f"candidate: {candidate.get('environment', {}).get('commit')}\n")
+    for path, old, new, change in compare(baseline, candidate):
+        print(f"{path:<70} {old:>12.2f} {new:>12.2f} {change:>+8.1f}%")
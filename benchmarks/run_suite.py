@@ -0,0 +1,194 @@
+"""
+Reproducible benchmark suite for registration, statistics and reports
+
+For each dataset size the suite:
+
+1. recreates the schema and seeds N synthetic students with generated
+   photos and signatures,
+2. drives /api/register concurrently through an in-process ASGI client,
+3. times /api/stats, /api/students and every /api/download-* report.
+
+Results are written as JSON (with commit, Python and database info) so two
+runs can be compared with benchmarks/compare.py.
+
+Usage (from the repository root):
+    python -m benchmarks.run_suite [--sizes 1000 10000 50000] [--output results.json]
+                                   [--database-url postgresql://...]
+
+Without --database-url a throwaway SQLite file is used. A Postgres URL must
+point at a dedicated benchmark database: its tables are dropped.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+from benchmarks.common import (
+    REPO_ROOT,
+    configure_database,
+    enter_workdir,
+    environment_info,
+    generate_image_bytes,
+    reset_schema,
+    seed_students,
+    summarize,
+    write_results,
+)
+
+READ_ENDPOINTS = (
+    "/api/stats",
+    "/api/students",
+)
+
+REPORT_ENDPOINTS = (
+    "/api/download-report",
+    "/api/download-weekly-report",
+    "/api/download-year-report/1",
+    "/api/download-section-report/1/A",
+)
+
+
+async def time_endpoint(client, path: str, repeat: int) -> dict:
+    """
+    Sequential GETs of one endpoint
+    """
+    timings, status, size = [], None, 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = await client.get(path)
+        timings.append((time.perf_counter() - started) * 1000)
+        status, size = response.status_code, len(response.content)
+    return {**summarize(timings), "status": status, "bytes": size}
+
+
+async def submit_registrations(client, indices, concurrency: int) -> tuple:
+    """
+    POST one registration per index with at most `concurrency` in flight
+    Index i always maps to the same year, section and register number
+    Returns (timings in ms, failures)
+    """
+    photo = generate_image_bytes((640, 640), 1)
+    signature = generate_image_bytes((400, 200), 2)
+    semaphore = asyncio.Semaphore(concurrency)
+    timings, failures = [], 0
+
+    async def register(i: int):
+        nonlocal failures
+        year = i % 3 + 1
+        section = "ABCD"[i // 3 % 4] if year == 3 else "ABCDE"[i // 3 % 5]
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.post(
+                "/api/register",
+                data={
+                    "name": f"Bench Student {i}",
+                    "year": str(year),
+                    "section": section,
+                    "last_digits": f"{i // 3:03d}",
+                    "has_ipad": "Yes" if i % 2 else "No",
+                    "ipad_mac_address": "AA:BB:CC:DD:EE:FF" if i % 2 else "",
+                },
+                files={
+                    "photo": ("photo.jpg", photo, "image/jpeg"),
+                    "signature": ("signature.jpg", signature, "image/jpeg"),
+                },
+            )
+            timings.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                failures += 1
+
+    await asyncio.gather(*(register(i) for i in indices))
+    return timings, failures
+
+
+async def drive_registrations(client, count: int, concurrency: int) -> dict:
+    """
+    Submit `count` registrations with at most `concurrency` in flight
+    """
+    started = time.perf_counter()
+    timings, failures = await submit_registrations(client, range(count), concurrency)
+    elapsed = time.perf_counter() - started
+
+    return {
+        **summarize(timings),
+        "registrations": count,
+        "concurrency": concurrency,
+        "failures": failures,
+        "registrations_per_second": round(count / elapsed, 1),
+    }
+
+
+async def run_size(app, size: int, args) -> dict:
+    import httpx
+
+    print(f"🌱 Seeding {size} students...", file=sys.stderr)
+    reset_schema()
+    seed_started = time.perf_counter()
+    seed_students(size)
+    seed_seconds = round(time.perf_counter() - seed_started, 2)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        print(f"📝 Registering {args.registrations} students...", file=sys.stderr)
+        register = await drive_registrations(client, args.registrations, args.concurrency)
+
+        reads = {}
+        for path in READ_ENDPOINTS:
+            reads[path] = await time_endpoint(client, path, args.repeat)
+
+        reports = {}
+        if size <= args.max_report_rows:
+            for path in REPORT_ENDPOINTS:
+                print(f"📊 {path}...", file=sys.stderr)
+                reports[path] = await time_endpoint(client, path, args.report_repeat)
+
+    return {
+        "seed_seconds": seed_seconds,
+        "register": register,
+        "reads": reads,
+        "reports": reports,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000], help="Seeded student counts")
+    parser.add_argument("--registrations", type=int, default=300, help="Registrations per size (max 2700)")
+    parser.add_argument("--concurrency", type=int, default=20, help="Registrations in flight")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per read endpoint")
+    parser.add_argument("--report-repeat", type=int, default=1, help="Runs per report endpoint")
+    parser.add_argument("--max-report-rows", type=int, default=10 ** 9,
+                        help="Skip report endpoints above this many rows")
+    parser.add_argument("--database-url", help="Benchmark database (default: temporary SQLite file)")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON results file")
+    args = parser.parse_args()
+
+    if args.registrations > 2700:
+        parser.error("--registrations is limited by free register numbers (3 years x 900)")
+
+    output = os.path.abspath(args.output)
+    database_url = configure_database(args.database_url)
+
+    # Import the app from the repository root, then work in a scratch directory
+    os.chdir(REPO_ROOT)
+    from app.main import app
+    enter_workdir()
+
+    results = {
+        "benchmark": "suite",
+        "environment": environment_info(database_url),
+        "sizes": {},
+    }
+    for size in args.sizes:
+        results["sizes"][str(size)] = asyncio.run(run_size(app, size, args))
+        write_results(results, output)
+
+    print(json.dumps(results, indent=2))
+    print(f"✅ Results written to {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Build fingerprinted static assets
+
+Copies every CSS/JS file under app/static into app/static/dist with a content
+hash in its name, writes .gz (and .br, when the brotli package is installed)
+siblings next to each copy, and records the mapping in app/static/manifest.json.
+Templates resolve asset URLs through static_url(), so they pick up the
+fingerprinted names automatically.
+
+Usage:
+    python build_assets.py
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+STATIC_DIRECTORY = os.path.join("app", "static")
+DIST_DIRECTORY = os.path.join(STATIC_DIRECTORY, "dist")
+MANIFEST_PATH = os.path.join(STATIC_DIRECTORY, "manifest.json")
+ASSET_EXTENSIONS = {".css", ".js"}
+
+
+def fingerprint(path: str) -> str:
+    """
+    Short content hash used in the fingerprinted file name
+    """
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+
+def write_precompressed(path: str) -> None:
+    """
+    Write .gz and .br siblings for a built asset
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+
+    # mtime=0 keeps the gzip output byte-for-byte reproducible
+    with open(path + ".gz", "wb") as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+
+    if brotli is not None:
+        with open(path + ".br", "wb") as f:
+            f.write(brotli.compress(data, quality=11))
+
+
+def build_assets():
+    """
+    Fingerprint and precompress all static text assets
+    """
+    print("📦 Building static assets...")
+
+    if os.path.isdir(DIST_DIRECTORY):
+        shutil.rmtree(DIST_DIRECTORY)
+
+    manifest = {}
+    for dirpath, dirnames, filenames in os.walk(STATIC_DIRECTORY):
+        # Never fingerprint our own output
+        dirnames[:] = [d for d in dirnames if os.path.join(dirpath, d) != DIST_DIRECTORY]
+
+        for filename in sorted(filenames):
+            stem, ext = os.path.splitext(filename)
+            if ext not in ASSET_EXTENSIONS:
+                continue
+
+            source = os.path.join(dirpath, filename)
+            relative = os.path.relpath(source, STATIC_DIRECTORY).replace(os.sep, "/")
+            built_relative = f"dist/{os.path.dirname(relative)}/{stem}.{fingerprint(source)}{ext}".replace("//", "/")
+
+            target = os.path.join(STATIC_DIRECTORY, *built_relative.split("/"))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(source, target)
+            write_precompressed(target)
+
+            manifest[relative] = built_relative
+            print(f"   {relative} -> {built_relative}")
+
+    with open(MANIFEST_PATH, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    if brotli is None:
+        print("⚠️  brotli is not installed; only .gz variants were written (pip install brotli)")
+    print(f"✅ Built {len(manifest)} assets, manifest written to {MANIFEST_PATH}")
+
+
+if __name__ == "__main__":
+    build_assets()
@@ -0,0 +1,40 @@
+"""
+Apply database schema migrations (see app/migrations.py)
+
+Usage:
+    python migrate_db.py            # apply pending migrations
+    python migrate_db.py status     # list migrations and whether they are applied
+"""
+
+import argparse
+
+from app.database import database_label
+from app.migrations import latest_version, status, upgrade
+
+
+def show_status():
+    print(f"🗄️  Database: {database_label()}")
+    for version, description, applied in status():
+        marker = "✅" if applied else "⏳"
+        print(f"   {marker} {version:>3}  {description}")
+
+
+def run_upgrade():
+    print(f"🗄️  Database: {database_label()}")
+    applied = upgrade()
+    for entry in applied:
+        print(f"🔧 Applied migration {entry.version}: {entry.description}")
+    if not applied:
+        print("✅ Schema is up to date")
+    print(f"📌 Schema version: {latest_version()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", nargs="?", choices=("upgrade", "status"), default="upgrade")
+    args = parser.parse_args()
+
+    if args.command == "status":
+        show_status()
+    else:
+        run_upgrade()
@@ -0,0 +1,116 @@
+"""
+Migrate uploaded photos and signatures from the legacy
+uploads/{year}/{section}/ layout into content-addressed storage
+
+Usage:
+    python migrate_storage.py [--dry-run] [--delete-legacy] [--batch-size N]
+"""
+
+import argparse
+import os
+
+from app.changes import record_change
+from app.database import SessionLocal
+from app.migrations import upgrade
+from app.models import Student
+from app.storage import CAS_PREFIX, ContentAddressedStorage, resolve_upload_path
+
+
+def migrate_key(storage: ContentAddressedStorage, key: str, student: Student, db, dry_run: bool):
+    """
+    Copy one legacy file into content-addressed storage
+    Returns (new_key, legacy_path) or (None, None) if nothing was migrated
+    """
+    if not key or key.startswith(CAS_PREFIX):
+        return None, None
+
+    legacy_path = resolve_upload_path(key)
+    if not os.path.exists(legacy_path):
+        print(f"   ⚠️  Missing file for {student.register_number}: {legacy_path}")
+        return None, None
+
+    if dry_run:
+        return key, legacy_path
+
+    with open(legacy_path, "rb") as f:
+        data = f.read()
+    new_key = storage.save(data, student.year, student.section, os.path.basename(legacy_path), db=db)
+    return new_key, legacy_path
+
+
+def migrate_storage(dry_run: bool = False, delete_legacy: bool = False, batch_size: int = 500):
+    """
+    Move every legacy upload into content-addressed storage in batches
+    """
+    print("=" * 60)
+    print("Upload Storage Migration: legacy -> content-addressed")
+    print("=" * 60)
+
+    upgrade()
+
+    storage = ContentAddressedStorage()
+    db = SessionLocal()
+    migrated = 0
+    last_id = 0
+
+    try:
+        while True:
+            # Keyset pagination keeps memory flat and survives rows changing under us
+            students = db.query(Student).filter(
+                Student.id > last_id
+            ).order_by(Student.id).limit(batch_size).all()
+
+            if not students:
+                break
+
+            legacy_paths = []
+            for student in students:
+                last_id = student.id
+
+                new_photo, old_photo = migrate_key(storage, student.photo_path, student, db, dry_run)
+                if new_photo:
+                    student.photo_path = new_photo
+                    legacy_paths.append(old_photo)
+                    migrated += 1
+
+                new_signature, old_signature = migrate_key(storage, student.signature_path, student, db, dry_run)
+                if new_signature:
+                    student.signature_path = new_signature
+                    legacy_paths.append(old_signature)
+                    migrated += 1
+
+                # Downstream systems see the new file keys through /api/changes
+                if (new_photo or new_signature) and not dry_run:
+                    record_change(db, student, "updated")
+
+            if dry_run:
+                db.rollback()
+            else:
+                db.commit()
+
+                # Legacy files are only removed once the new keys are committed
+                if delete_legacy:
+                    for legacy_path in legacy_paths:
+                        try:
+                            os.remove(legacy_path)
+                        except OSError:
+                            pass
+
+            db.expunge_all()
+            print(f"📦 Processed students up to id {last_id} ({migrated} files)")
+
+    finally:
+        db.close()
+
+    action = "would be migrated" if dry_run else "migrated"
+    print(f"\n✅ {migrated} files {action}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be migrated without changing anything")
+    parser.add_argument("--delete-legacy", action="store_true", help="Remove legacy files after they are migrated")
+    parser.add_argument("--batch-size", type=int, default=500, help="Students processed per transaction")
+    args = parser.parse_args()
+
+    migrate_storage(dry_run=args.dry_run, delete_legacy=args.delete_legacy, batch_size=args.batch_size)
@@ -0,0 +1,62 @@
+"""
+Find students with near-identical photos (see app/duplicates.py)
+
+Usage:
+    python photo_duplicates.py                        # list duplicate clusters
+    python photo_duplicates.py --distance 4           # stricter matching (bits of 64)
+    python photo_duplicates.py backfill               # hash photos stored before migration 7
+"""
+
+import argparse
+
+from app.database import SessionLocal, database_label
+from app.duplicates import PHOTO_DUPLICATE_DISTANCE, PHOTO_MAX_DISTANCE, backfill_photo_hashes, duplicate_clusters
+from app.migrations import upgrade
+
+
+def run_backfill():
+    print(f"🗄️  Database: {database_label()}")
+    upgrade()
+    db = SessionLocal()
+    try:
+        result = backfill_photo_hashes(db)
+    finally:
+        db.close()
+    print(f"✅ Hashed {result['hashed']} photo(s)")
+    if result["missing_files"]:
+        print(f"⚠️  {result['missing_files']} student(s) have no photo file (see python reconcile_uploads.py)")
+    if result["failed"]:
+        print(f"⚠️  {result['failed']} photo(s) could not be read")
+
+
+def show_clusters(distance: int):
+    print(f"🗄️  Database: {database_label()}")
+    upgrade()
+    db = SessionLocal()
+    try:
+        clusters = duplicate_clusters(db, distance)
+    finally:
+        db.close()
+
+    if not clusters:
+        print(f"✅ No photos within {distance} bits of each other")
+        return
+    print(f"🔍 {len(clusters)} group(s) of near-identical photos:")
+    for cluster in clusters:
+        print(f"   {cluster['size']} students:")
+        for student in cluster["students"]:
+            print(f"      {student['register_number']:<18} Y{student['year']}{student['section']}  {student['name']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", nargs="?", choices=("clusters", "backfill"), default="clusters")
+    parser.add_argument("--distance", type=int, default=PHOTO_DUPLICATE_DISTANCE,
+                        choices=range(PHOTO_MAX_DISTANCE + 1), metavar=f"0-{PHOTO_MAX_DISTANCE}",
+                        help="Most hash bits (of 64) two photos may differ in")
+    args = parser.parse_args()
+
+    if args.command == "backfill":
+        run_backfill()
+    else:
+        show_clusters(args.distance)
@@ -0,0 +1,54 @@
+"""
+Find orphaned upload files and dangling references (see app/reconcile.py)
+
+Usage:
+    python reconcile_uploads.py                          # report only
+    python reconcile_uploads.py --quarantine             # also move orphans to UPLOAD_QUARANTINE_FOLDER
+    python reconcile_uploads.py --log orphans.jsonl      # list every orphan and dangling reference
+    python reconcile_uploads.py --min-age 0              # include files written in the last hour
+"""
+
+import argparse
+import json
+import sys
+
+from app.database import database_label
+from app.migrations import upgrade
+from app.reconcile import RECONCILE_MIN_AGE_SECONDS, reconcile_uploads
+
+
+def run(quarantine: bool, min_age: float, log_path: str = None) -> dict:
+    print(f"🗄️  Database: {database_label()}")
+    upgrade()
+
+    log = open(log_path, "w", encoding="utf-8") if log_path else None
+    try:
+        summary = reconcile_uploads("quarantine" if quarantine else "report", min_age, log=log)
+    finally:
+        if log is not None:
+            log.close()
+
+    print(json.dumps(summary, indent=2))
+    print(f"📂 Scanned {summary['files_scanned']} file(s): {summary['referenced']} referenced, "
+          f"{summary['orphans']} orphaned ({summary['orphan_bytes']:,} bytes), "
+          f"{summary['too_recent']} too recent to judge")
+    if summary["quarantined"]:
+        print(f"📦 Moved {summary['quarantined']} orphan(s) to {summary['quarantine_dir']}")
+    elif summary["orphans"]:
+        print("💡 Run with --quarantine to move the orphans out of the uploads folder")
+    if summary["dangling"]:
+        print(f"⚠️  {summary['dangling']} photo/signature reference(s) point at missing files")
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quarantine", action="store_true", help="Move orphaned files to the quarantine folder")
+    parser.add_argument("--min-age", type=float, default=RECONCILE_MIN_AGE_SECONDS,
+                        help="Seconds since a file was written before it can count as orphaned")
+    parser.add_argument("--log", help="Write every orphan and dangling reference to this JSON-lines file")
+    args = parser.parse_args()
+
+    summary = run(args.quarantine, args.min_age, args.log)
+    if summary["dangling"]:
+        sys.exit(1)
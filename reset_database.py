@@ -3,25 +3,28 @@ Script to reset the database - drops all tables and recreates them
 WARNING: This will delete all existing data!
 """
 
-from app.database import Base, engine
-from app.models import Student
+from app.database import Base, compact_database, database_label, engine
+from app.migrations import upgrade
 
 def reset_database():
     """
     Drop all tables and recreate them
     """
+    print(f"🗄️  Database: {database_label()}")
     print("⚠️  WARNING: This will delete all existing data!")
     confirm = input("Type 'YES' to confirm: ")
     
     if confirm == "YES":
         print("🗑️  Dropping all tables...")
         Base.metadata.drop_all(bind=engine)
+        compact_database()
         print("✅ Tables dropped successfully!")
         
         print("📊 Creating new tables...")
-        Base.metadata.create_all(bind=engine)
+        upgrade()
         print("✅ Tables created successfully!")
         print("🎉 Database reset complete!")
+        print("💡 Uploaded images are kept: python reconcile_uploads.py --quarantine --min-age 0 moves them out")
     else:
         print("❌ Operation cancelled")
 
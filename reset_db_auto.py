@@ -3,31 +3,36 @@ Automatic database reset script - no confirmation needed
 WARNING: This will delete all existing data!
 """
 
-from app.database import Base, engine
-from app.models import Student
+from app.database import Base, compact_database, database_label, engine
+from app.migrations import upgrade
 
 def reset_database():
     """
     Drop all tables and recreate them
     """
+    print(f"🗄️  Database: {database_label()}")
     print("🗑️  Dropping all tables...")
     Base.metadata.drop_all(bind=engine)
+    compact_database()
     print("✅ Tables dropped successfully!")
     
     print("📊 Creating new tables with updated schema...")
-    Base.metadata.create_all(bind=engine)
+    upgrade()
     print("✅ Tables created successfully!")
     print("🎉 Database reset complete!")
+    print("💡 Uploaded images are kept: python reconcile_uploads.py --quarantine --min-age 0 moves them out")
     print("\n📋 New schema includes:")
     print("   - name")
     print("   - year")
     print("   - section")
     print("   - register_number")
-    print("   - photo_path")
-    print("   - has_ipad (NEW)")
-    print("   - ipad_mac_address (NEW)")
-    print("   - signature_path (NEW)")
+    print("   - photo_storage / photo_digest (path derived)")
+    print("   - photo_dhash (perceptual hash for duplicate photos)")
+    print("   - has_ipad (boolean)")
+    print("   - ipad_mac (48-bit integer)")
+    print("   - signature_storage / signature_digest (path derived)")
     print("   - created_at")
+    print("\n💡 Schema changes no longer need a reset: run python migrate_db.py")
 
 if __name__ == "__main__":
     reset_database()
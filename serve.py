@@ -0,0 +1,149 @@
+"""
+Production server launcher
+
+Prepares the runtime once (directories and database tables) in the master
+process, then starts several worker processes:
+
+- Linux/macOS with gunicorn installed: gunicorn master with uvicorn workers,
+  recycled gracefully after --max-requests (+ jitter) requests
+- Otherwise (e.g. Windows): uvicorn's own multi-process mode, which cannot
+  recycle workers
+
+uvloop and httptools are used when installed.
+
+Usage:
+    python serve.py [--workers N] [--host 0.0.0.0] [--port 8000]
+                    [--max-requests 2000] [--keepalive 5] [--backlog 2048]
+"""
+
+import argparse
+import importlib.util
+import os
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+
+def default_workers() -> int:
+    """
+    One worker per CPU unless WEB_CONCURRENCY says otherwise
+    """
+    return int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
+
+
+def event_loop() -> str:
+    """
+    uvloop when installed (not available on Windows)
+    """
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+
+def http_protocol() -> str:
+    """
+    httptools parser when installed
+    """
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+
+def prepare():
+    """
+    Create directories and tables once, before any worker is forked
+    """
+    from app.database import engine
+    from app.main import RUNTIME_PREPARED_ENV, prepare_runtime
+
+    print("📊 Preparing directories and database tables...")
+    prepare_runtime()
+
+    # Forked workers must not inherit connections opened by init_db()
+    engine.dispose()
+
+    # Workers see this and skip their own setup
+    os.environ[RUNTIME_PREPARED_ENV] = "1"
+
+
+def run_gunicorn(args):
+    """
+    gunicorn master + uvicorn workers, with graceful max-requests recycling
+    """
+    from gunicorn.app.base import BaseApplication
+    from uvicorn.workers import UvicornWorker
+
+    loop, http = event_loop(), http_protocol()
+
+    class TunedUvicornWorker(UvicornWorker):
+        CONFIG_KWARGS = {"loop": loop, "http": http}
+
+    class Application(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"{args.host}:{args.port}")
+            self.cfg.set("workers", args.workers)
+            self.cfg.set("worker_class", TunedUvicornWorker)
+            self.cfg.set("max_requests", args.max_requests)
+            self.cfg.set("max_requests_jitter", args.max_requests_jitter)
+            self.cfg.set("keepalive", args.keepalive)
+            self.cfg.set("backlog", args.backlog)
+            self.cfg.set("graceful_timeout", args.graceful_timeout)
+            self.cfg.set("timeout", args.timeout)
+
+        def load(self):
+            from app.main import app
+            return app
+
+    print(f"🚀 gunicorn: {args.workers} workers, loop={loop}, http={http}, "
+          f"recycle after {args.max_requests}±{args.max_requests_jitter} requests")
+    Application().run()
+
+
+def run_uvicorn(args):
+    """
+    uvicorn multi-process fallback (no worker recycling)
+    """
+    import uvicorn
+
+    loop, http = event_loop(), http_protocol()
+    print(f"🚀 uvicorn: {args.workers} workers, loop={loop}, http={http}")
+    if args.max_requests:
+        print("⚠️  gunicorn is not available; workers will not be recycled after --max-requests")
+
+    uvicorn.run(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop=loop,
+        http=http,
+        timeout_keep_alive=args.keepalive,
+        backlog=args.backlog,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.getenv("APP_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("APP_PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=default_workers(), help="Worker processes (default: CPU count)")
+    parser.add_argument("--max-requests", type=int, default=int(os.getenv("MAX_REQUESTS", "2000")),
+                        help="Recycle a worker after this many requests (0 disables)")
+    parser.add_argument("--max-requests-jitter", type=int, default=int(os.getenv("MAX_REQUESTS_JITTER", "200")),
+                        help="Random extra requests so workers do not all restart together")
+    parser.add_argument("--keepalive", type=int, default=int(os.getenv("KEEPALIVE", "5")),
+                        help="Seconds to hold idle keep-alive connections")
+    parser.add_argument("--backlog", type=int, default=int(os.getenv("BACKLOG", "2048")),
+                        help="Maximum pending connections in the listen queue")
+    parser.add_argument("--graceful-timeout", type=int, default=30, help="Seconds a recycled worker gets to finish")
+    parser.add_argument("--timeout", type=int, default=120, help="Kill workers silent for this many seconds")
+    args = parser.parse_args()
+
+    prepare()
+
+    if importlib.util.find_spec("gunicorn"):
+        run_gunicorn(args)
+    else:
+        run_uvicorn(args)
+
+
+if __name__ == "__main__":
+    main()